@@ -4,9 +4,16 @@ from typing import Optional
 from fastapi import Depends, FastAPI, Query, Response, status
 from pydantic import EmailStr
 
+from dripdrop.admin.responses import (
+    AudioCacheResponse,
+    DatabasePoolResponse,
+    GoogleApiQuotaResponse,
+    PasswordHasherResponse,
+)
+from dripdrop.authentication import passwords
 from dripdrop.authentication.dependencies import get_admin_user
 from dripdrop.music import tasks as music_tasks
-from dripdrop.services import rq_client
+from dripdrop.services import audio_cache, database, google_quota, rq_client
 from dripdrop.youtube import tasks as youtube_tasks
 
 app = FastAPI(
@@ -21,6 +28,26 @@ async def check_admin_session():
     return Response(None, status_code=status.HTTP_200_OK)
 
 
+@app.get("/database/pool", response_model=DatabasePoolResponse)
+async def get_database_pool_status():
+    return DatabasePoolResponse.model_validate(database.get_pool_status())
+
+
+@app.get("/password_hasher", response_model=PasswordHasherResponse)
+async def get_password_hasher_status():
+    return PasswordHasherResponse.model_validate(passwords.get_hasher_status())
+
+
+@app.get("/audio_cache", response_model=AudioCacheResponse)
+async def get_audio_cache_status():
+    return AudioCacheResponse.model_validate(await audio_cache.get_status())
+
+
+@app.get("/google_api_quota", response_model=GoogleApiQuotaResponse)
+async def get_google_api_quota_status():
+    return GoogleApiQuotaResponse.model_validate(await google_quota.get_status())
+
+
 @app.get("/cron/run")
 async def run_cron_jobs():
     update_video_categories_job = await asyncio.to_thread(
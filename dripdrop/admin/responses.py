@@ -0,0 +1,21 @@
+from dripdrop.authentication.passwords import PasswordHasherStatus
+from dripdrop.base.responses import ResponseBaseModel
+from dripdrop.services.audio_cache import AudioCacheStatus
+from dripdrop.services.database import PoolStatus
+from dripdrop.services.google_quota import QuotaStatus
+
+
+class DatabasePoolResponse(ResponseBaseModel, PoolStatus):
+    pass
+
+
+class PasswordHasherResponse(ResponseBaseModel, PasswordHasherStatus):
+    pass
+
+
+class AudioCacheResponse(ResponseBaseModel, AudioCacheStatus):
+    pass
+
+
+class GoogleApiQuotaResponse(ResponseBaseModel, QuotaStatus):
+    pass
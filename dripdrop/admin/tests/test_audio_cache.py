@@ -0,0 +1,27 @@
+from fastapi import status
+
+from dripdrop.base.test import BaseTest
+
+AUDIO_CACHE_URL = "api/admin/audio_cache"
+
+
+class GetAudioCacheTestCase(BaseTest):
+    async def test_audio_cache_when_not_logged_in(self):
+        response = await self.client.get(AUDIO_CACHE_URL)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_audio_cache_as_regular_user(self):
+        await self.create_and_login_user(email="user@gmail.com", password="password")
+        response = await self.client.get(AUDIO_CACHE_URL)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    async def test_audio_cache_as_admin_user(self):
+        await self.create_and_login_user(
+            email="user@gmail.com", password="password", admin=True
+        )
+        response = await self.client.get(AUDIO_CACHE_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        json = response.json()
+        self.assertEqual(json.get("hits"), 0)
+        self.assertIn("evictedBytes", json)
+        self.assertEqual(json.get("hostSizes"), {})
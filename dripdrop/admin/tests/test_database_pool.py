@@ -0,0 +1,27 @@
+from fastapi import status
+
+from dripdrop.base.test import BaseTest
+
+DATABASE_POOL_URL = "api/admin/database/pool"
+
+
+class GetDatabasePoolTestCase(BaseTest):
+    async def test_database_pool_when_not_logged_in(self):
+        response = await self.client.get(DATABASE_POOL_URL)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_database_pool_as_regular_user(self):
+        await self.create_and_login_user(email="user@gmail.com", password="password")
+        response = await self.client.get(DATABASE_POOL_URL)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    async def test_database_pool_as_admin_user(self):
+        await self.create_and_login_user(
+            email="user@gmail.com", password="password", admin=True
+        )
+        response = await self.client.get(DATABASE_POOL_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        json = response.json()
+        self.assertFalse(json.get("pooled"))
+        self.assertIn("checkedOut", json)
+        self.assertIn("averageWait", json)
@@ -0,0 +1,28 @@
+from fastapi import status
+
+from dripdrop.base.test import BaseTest
+
+GOOGLE_API_QUOTA_URL = "api/admin/google_api_quota"
+
+
+class GetGoogleApiQuotaTestCase(BaseTest):
+    async def test_google_api_quota_when_not_logged_in(self):
+        response = await self.client.get(GOOGLE_API_QUOTA_URL)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_google_api_quota_as_regular_user(self):
+        await self.create_and_login_user(email="user@gmail.com", password="password")
+        response = await self.client.get(GOOGLE_API_QUOTA_URL)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    async def test_google_api_quota_as_admin_user(self):
+        await self.create_and_login_user(
+            email="user@gmail.com", password="password", admin=True
+        )
+        response = await self.client.get(GOOGLE_API_QUOTA_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        json = response.json()
+        self.assertEqual(json.get("used"), 0)
+        self.assertEqual(json.get("remaining"), json.get("limit"))
+        self.assertIn("lowPriorityReserve", json)
+        self.assertIn("resetsAt", json)
@@ -0,0 +1,27 @@
+from fastapi import status
+
+from dripdrop.base.test import BaseTest
+
+PASSWORD_HASHER_URL = "api/admin/password_hasher"
+
+
+class GetPasswordHasherTestCase(BaseTest):
+    async def test_password_hasher_when_not_logged_in(self):
+        response = await self.client.get(PASSWORD_HASHER_URL)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_password_hasher_as_regular_user(self):
+        await self.create_and_login_user(email="user@gmail.com", password="password")
+        response = await self.client.get(PASSWORD_HASHER_URL)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    async def test_password_hasher_as_admin_user(self):
+        await self.create_and_login_user(
+            email="user@gmail.com", password="password", admin=True
+        )
+        response = await self.client.get(PASSWORD_HASHER_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        json = response.json()
+        self.assertGreaterEqual(json.get("completed"), 2)
+        self.assertEqual(json.get("pending"), 0)
+        self.assertIn("averageWait", json)
@@ -8,6 +8,7 @@ from fastapi.responses import JSONResponse
 from dripdrop.admin.app import app as admin_app
 from dripdrop.authentication.app import app as auth_app
 from dripdrop.music.app import app as music_app
+from dripdrop.services import http_client, redis_client
 from dripdrop.services.websocket_channel import WebsocketChannel
 from dripdrop.settings import ENV, settings
 from dripdrop.youtube.app import app as youtube_app
@@ -27,9 +28,12 @@ register_router(prefix="/youtube", app=youtube_app)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    await http_client.start()
     await WebsocketChannel.start()
     yield
     await WebsocketChannel.close()
+    await http_client.close()
+    await redis_client.close()
 
 
 app = FastAPI(
@@ -10,16 +10,16 @@ from fastapi import (
     Response,
     status,
 )
-from fastapi.responses import RedirectResponse
+from fastapi.responses import JSONResponse, RedirectResponse
 from pydantic import BaseModel, EmailStr
 
-from dripdrop.authentication import utils
+from dripdrop.authentication import cache, passwords, utils
 from dripdrop.authentication.dependencies import (
     COOKIE_NAME,
     AuthenticatedUser,
     get_authenticated_user,
 )
-from dripdrop.authentication.models import User, password_context
+from dripdrop.authentication.models import User
 from dripdrop.authentication.responses import (
     AuthenticatedResponse,
     AuthenticatedResponseModel,
@@ -33,6 +33,17 @@ from dripdrop.services import sendgrid_client
 app = FastAPI(openapi_tags=["Authentication"])
 
 
+@app.exception_handler(passwords.PasswordHasherBusyError)
+async def password_hasher_busy_handler(
+    request: Request, exc: passwords.PasswordHasherBusyError
+):
+    return JSONResponse(
+        content={"detail": ErrorMessages.ServerBusy},
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": "1"},
+    )
+
+
 @app.get(
     "/session",
     response_model=UserResponse,
@@ -55,8 +66,8 @@ async def login(
     user = await User.find_by_email(email=email, session=session)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
-    verified, new_hashed_pw = password_context.verify_and_update(
-        secret=password, hash=user.password
+    verified, new_hashed_pw = await passwords.verify_and_update_password(
+        password=password, hashed_password=user.password
     )
     if new_hashed_pw:
         user.password = new_hashed_pw
@@ -105,7 +116,7 @@ async def create_account(
         raise HTTPException(
             detail=ErrorMessages.AccountExists, status_code=status.HTTP_400_BAD_REQUEST
         )
-    user = User(email=email, password=password)
+    user = User(email=email, password=await passwords.hash_password(password))
     verification_code = utils.generate_random_string(length=7)
     await redis.set(f"verify:{verification_code}", email, ex=3600)
     verify_link = utils.generate_server_link(
@@ -145,6 +156,7 @@ async def verify_email(
         )
     user.verified = True
     await session.commit()
+    await cache.invalidate_user(email=email)
     await redis.delete(f"verify:{token}")
     return RedirectResponse("/account")
 
@@ -202,7 +214,8 @@ async def reset_password(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=ErrorMessages.AccountDoesNotExist,
         )
-    user.password = password_context.hash(password)
+    user.password = await passwords.hash_password(password)
     await session.commit()
+    await cache.invalidate_user(email=email)
     await redis.delete(f"reset:{token}")
     return Response(None, status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,108 @@
+import hashlib
+import time
+import traceback
+from collections import OrderedDict
+
+from pydantic import BaseModel
+
+from dripdrop.authentication.models import User
+from dripdrop.logger import logger
+from dripdrop.services import redis_client
+from dripdrop.settings import settings
+
+USER_CACHE_KEY = "user_cache:{key}"
+USER_CACHE_TOKENS_KEY = "user_cache:tokens:{email}"
+
+
+class CachedUser(BaseModel):
+    email: str
+    admin: bool
+    verified: bool
+
+    def to_user(self):
+        # Detached user, only the fields needed for authorization are loaded
+        return User(email=self.email, admin=self.admin, verified=self.verified)
+
+
+_local_cache: OrderedDict[str, tuple[float, CachedUser]] = OrderedDict()
+
+
+def _get_key(token: str):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _get_local(key: str):
+    entry = _local_cache.get(key)
+    if not entry:
+        return None
+    expires, cached_user = entry
+    if expires < time.monotonic():
+        _local_cache.pop(key, None)
+        return None
+    _local_cache.move_to_end(key)
+    return cached_user
+
+
+def _set_local(key: str, cached_user: CachedUser):
+    _local_cache[key] = (time.monotonic() + settings.user_cache_local_ttl, cached_user)
+    _local_cache.move_to_end(key)
+    while len(_local_cache) > settings.user_cache_size:
+        _local_cache.popitem(last=False)
+
+
+def clear():
+    _local_cache.clear()
+
+
+async def get_user(token: str):
+    key = _get_key(token=token)
+    cached_user = _get_local(key=key)
+    if cached_user:
+        return cached_user
+    try:
+        data = await redis_client.get_client().get(USER_CACHE_KEY.format(key=key))
+    except Exception:
+        logger.exception(traceback.format_exc())
+        return None
+    if not data:
+        return None
+    cached_user = CachedUser.model_validate_json(data)
+    _set_local(key=key, cached_user=cached_user)
+    return cached_user
+
+
+async def set_user(token: str, user: User, expires: float):
+    key = _get_key(token=token)
+    cached_user = CachedUser(email=user.email, admin=user.admin, verified=user.verified)
+    _set_local(key=key, cached_user=cached_user)
+    ttl = int(min(settings.user_cache_ttl, expires - time.time()))
+    if ttl <= 0:
+        return
+    tokens_key = USER_CACHE_TOKENS_KEY.format(email=user.email)
+    try:
+        async with redis_client.get_client().pipeline() as pipeline:
+            pipeline.set(
+                USER_CACHE_KEY.format(key=key), cached_user.model_dump_json(), ex=ttl
+            )
+            pipeline.sadd(tokens_key, key)
+            pipeline.expire(tokens_key, settings.user_cache_ttl)
+            await pipeline.execute()
+    except Exception:
+        logger.exception(traceback.format_exc())
+
+
+async def invalidate_user(email: str):
+    for key, (_, cached_user) in list(_local_cache.items()):
+        if cached_user.email == email:
+            _local_cache.pop(key, None)
+    tokens_key = USER_CACHE_TOKENS_KEY.format(email=email)
+    try:
+        client = redis_client.get_client()
+        keys = await client.smembers(tokens_key)
+        async with client.pipeline() as pipeline:
+            for key in keys:
+                pipeline.delete(USER_CACHE_KEY.format(key=key.decode()))
+            pipeline.delete(tokens_key)
+            await pipeline.execute()
+    except Exception:
+        logger.exception(traceback.format_exc())
@@ -4,7 +4,7 @@ from fastapi import Cookie, Depends, Header, HTTPException, WebSocket, status
 from pydantic import BaseModel
 from sqlalchemy import select
 
-from dripdrop.authentication import utils
+from dripdrop.authentication import cache, utils
 from dripdrop.authentication.models import User
 from dripdrop.base.dependencies import AsyncSession, DatabaseSession
 
@@ -21,11 +21,18 @@ class Headers(BaseModel):
 
 async def get_user_from_token(token: str, session: AsyncSession):
     payload = utils.decode_jwt(token=token)
+    if not payload:
+        return None
     email = payload.get("email", None)
     if not email:
         return None
+    cached_user = await cache.get_user(token=token)
+    if cached_user and cached_user.email == email:
+        return cached_user.to_user()
     query = select(User).where(User.email == email)
     user = await session.scalar(query)
+    if user:
+        await cache.set_user(token=token, user=user, expires=payload.get("exp"))
     return user
 
 
@@ -1,14 +1,11 @@
 from typing import TYPE_CHECKING
 
-from passlib.context import CryptContext
-from sqlalchemy import event, select
+from sqlalchemy import select
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from dripdrop.base.models import Base
 from dripdrop.services.database import AsyncSession
 
-password_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 if TYPE_CHECKING:
     from dripdrop.music.models import MusicJob
     from dripdrop.youtube.models import (
@@ -49,9 +46,3 @@ class User(Base):
         query = select(User).where(User.email == email)
         user = await session.scalar(query)
         return user
-
-
-@event.listens_for(User, "init")
-def init_user(target: User, args, kwargs):
-    if "password" in kwargs:
-        kwargs["password"] = password_context.hash(kwargs["password"])
@@ -0,0 +1,121 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from passlib.context import CryptContext
+from pydantic import BaseModel
+
+from dripdrop.settings import settings
+
+T = TypeVar("T")
+
+password_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+class PasswordHasherBusyError(Exception):
+    pass
+
+
+class PasswordHasherStatus(BaseModel):
+    workers: int
+    pending: int
+    completed: int
+    rejected: int
+    average_wait: float
+    max_wait: float
+    average_duration: float
+    max_duration: float
+
+
+class PasswordHasherMetrics:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_duration = 0.0
+        self.max_duration = 0.0
+
+    def record(self, wait: float, duration: float):
+        self.completed += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.total_duration += duration
+        self.max_duration = max(self.max_duration, duration)
+
+
+hasher_metrics = PasswordHasherMetrics()
+
+_executor: ThreadPoolExecutor | None = None
+
+
+def _get_executor():
+    # bcrypt releases the GIL while hashing, so threads give real parallelism
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.password_hasher_workers,
+            thread_name_prefix="password-hasher",
+        )
+    return _executor
+
+
+def _reset_executor_after_fork():
+    global _executor
+    _executor = None
+    hasher_metrics.reset()
+
+
+os.register_at_fork(after_in_child=_reset_executor_after_fork)
+
+
+async def _run(fn: Callable[..., T], *args) -> T:
+    if hasher_metrics.pending >= settings.password_hasher_max_pending:
+        hasher_metrics.rejected += 1
+        raise PasswordHasherBusyError()
+    submitted = time.perf_counter()
+
+    def timed_fn():
+        started = time.perf_counter()
+        result = fn(*args)
+        return result, started - submitted, time.perf_counter() - started
+
+    hasher_metrics.pending += 1
+    try:
+        result, wait, duration = await asyncio.get_running_loop().run_in_executor(
+            _get_executor(), timed_fn
+        )
+    finally:
+        hasher_metrics.pending -= 1
+    hasher_metrics.record(wait=wait, duration=duration)
+    return result
+
+
+async def hash_password(password: str):
+    return await _run(password_context.hash, password)
+
+
+async def verify_and_update_password(password: str, hashed_password: str):
+    return await _run(password_context.verify_and_update, password, hashed_password)
+
+
+def get_hasher_status():
+    completed = hasher_metrics.completed
+    return PasswordHasherStatus(
+        workers=settings.password_hasher_workers,
+        pending=hasher_metrics.pending,
+        completed=completed,
+        rejected=hasher_metrics.rejected,
+        average_wait=hasher_metrics.total_wait / completed if completed else 0.0,
+        max_wait=hasher_metrics.max_wait,
+        average_duration=(
+            hasher_metrics.total_duration / completed if completed else 0.0
+        ),
+        max_duration=hasher_metrics.max_duration,
+    )
@@ -46,3 +46,4 @@ class ErrorMessages:
     ResetEmailExists = "Reset password email already sent"
     EmailSendFail = "Email failed to send"
     TokenError = "Token is not valid"
+    ServerBusy = "Server is busy, try again"
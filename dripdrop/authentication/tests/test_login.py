@@ -1,7 +1,10 @@
+from unittest.mock import patch
+
 from fastapi import status
 
 from dripdrop.authentication.dependencies import COOKIE_NAME
 from dripdrop.authentication.tests.test_base import AuthenticationBaseTest
+from dripdrop.settings import settings
 
 LOGIN_URL = "/api/auth/login"
 
@@ -44,3 +47,15 @@ class LoginTestCase(AuthenticationBaseTest):
         self.assertIsNotNone(json.get("accessToken"))
         self.assertIsNotNone(json.get("tokenType"))
         self.assertEqual(json.get("user"), {"email": user.email, "admin": False})
+
+    async def test_login_when_password_hasher_is_busy(self):
+        TEST_PASSWORD = "password"
+        user = await self.create_user(
+            email="user@gmail.com", password=TEST_PASSWORD, verified=True
+        )
+        with patch.object(settings, "password_hasher_max_pending", 0):
+            response = await self.client.post(
+                LOGIN_URL, json={"email": user.email, "password": TEST_PASSWORD}
+            )
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response.headers.get("Retry-After"), "1")
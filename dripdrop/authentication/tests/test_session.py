@@ -2,6 +2,7 @@ from unittest.mock import patch
 
 from fastapi import status
 
+from dripdrop.authentication import cache
 from dripdrop.base.test import BaseTest
 
 CREATE_URL = "/api/auth/create"
@@ -32,3 +33,19 @@ class GetSessionTestCase(BaseTest):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         json = response.json()
         self.assertEqual(json, {"email": user.email, "admin": False})
+
+    async def test_session_after_user_cache_invalidated(self):
+        user = await self.create_and_login_user(
+            email="user@gmail.com", password="password"
+        )
+        response = await self.client.get(SESSION_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {"email": user.email, "admin": False})
+        user.admin = True
+        await self.session.commit()
+        response = await self.client.get(SESSION_URL)
+        self.assertEqual(response.json(), {"email": user.email, "admin": False})
+        await cache.invalidate_user(email=user.email)
+        response = await self.client.get(SESSION_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {"email": user.email, "admin": True})
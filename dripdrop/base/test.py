@@ -2,14 +2,16 @@ import asyncio
 import shutil
 import traceback
 from datetime import datetime
-from typing import AsyncContextManager, TypeVar
+from typing import AsyncContextManager, Callable, TypeVar
 from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
 
 from fastapi import status
-from httpx import ASGITransport, AsyncClient
+from httpx import ASGITransport, AsyncClient, MockTransport, Request, Response
 from pydantic import BaseModel
 
 from dripdrop.app import app
+from dripdrop.authentication import cache, passwords
 from dripdrop.authentication.dependencies import COOKIE_NAME
 from dripdrop.authentication.models import User
 from dripdrop.models import Base
@@ -33,8 +35,11 @@ class BaseTest(IsolatedAsyncioTestCase):
         )
         self.session = await self.enter_async_context(database.create_session())
         self.http_client = await self.enter_async_context(http_client.create_client())
+        self.addAsyncCleanup(http_client.close)
         self.redis = await self.enter_async_context(redis_client.create_client())
+        self.addAsyncCleanup(redis_client.close)
         await self.redis.flushall()
+        cache.clear()
 
     async def asyncTearDown(self):
         await self.delete_temp_directories()
@@ -62,7 +67,7 @@ class BaseTest(IsolatedAsyncioTestCase):
     async def create_user(self, email: str, password: str, admin=False, verified=True):
         user = User(
             email=email,
-            password=password,
+            password=await passwords.hash_password(password),
             admin=admin,
             verified=verified,
         )
@@ -99,3 +104,17 @@ class BaseTest(IsolatedAsyncioTestCase):
                 return self.items.pop(0)
 
         return MockAsyncGenerator(items)
+
+    def mock_http_client(self, handler: Callable[[Request], Response]):
+        requests: list[Request] = []
+
+        def record_request(request: Request):
+            requests.append(request)
+            return handler(request)
+
+        client = AsyncClient(transport=MockTransport(record_request))
+        self.addAsyncCleanup(client.aclose)
+        patcher = patch.object(http_client, "get_client", return_value=client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return requests
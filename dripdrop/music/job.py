@@ -10,16 +10,18 @@ from fastapi import (
     Depends,
     File,
     Form,
+    Header,
     HTTPException,
     Path,
     Response,
     UploadFile,
     status,
 )
-from fastapi.responses import StreamingResponse
+from fastapi.responses import RedirectResponse, StreamingResponse
 from pydantic import HttpUrl
 from rq.job import Retry
 from sqlalchemy import select
+from starlette.background import BackgroundTask
 
 from dripdrop.authentication.dependencies import (
     AuthenticatedUser,
@@ -33,8 +35,9 @@ from dripdrop.music.responses import (
     MusicJobResponse,
     MusicJobUpdateResponse,
 )
-from dripdrop.services import http_client, rq_client
+from dripdrop.services import http_client, rq_client, s3
 from dripdrop.services.websocket_channel import RedisChannels, WebsocketChannel
+from dripdrop.settings import DownloadMode, settings
 from dripdrop.utils import get_current_time
 
 api = APIRouter(
@@ -88,7 +91,9 @@ async def create_job(
     session.add(music_job)
     await session.commit()
     await WebsocketChannel(channel=RedisChannels.MUSIC_JOB_UPDATE).publish(
-        message=MusicJobUpdateResponse(id=job_id, status="STARTED")
+        message=MusicJobUpdateResponse(
+            id=job_id, status="STARTED", user_email=user.email
+        )
     )
     await utils.handle_files(job_id=job_id, file=file, artwork_url=artwork_url)
     background_tasks.add_task(
@@ -116,14 +121,18 @@ async def delete_job(
             status_code=status.HTTP_404_NOT_FOUND, detail=ErrorMessages.JOB_NOT_FOUND
         )
     await asyncio.to_thread(rq_client.stop_job, job_id=job_id)
-    await music_job.cleanup()
+    await music_job.cleanup(session=session)
     music_job.deleted_at = get_current_time()
     await session.commit()
     return Response(None)
 
 
 @api.get("/{job_id}/download", responses={status.HTTP_404_NOT_FOUND: {}})
-async def download_job(session: DatabaseSession, job_id: str = Path(...)):
+async def download_job(
+    session: DatabaseSession,
+    job_id: str = Path(...),
+    range_header: Optional[str] = Header(None, alias="Range"),
+):
     query = select(MusicJob).where(MusicJob.id == job_id)
     music_job = await session.scalar(query)
     if not music_job:
@@ -136,12 +145,48 @@ async def download_job(session: DatabaseSession, job_id: str = Path(...)):
             detail=ErrorMessages.DOWNLOAD_NOT_FOUND,
         )
     filename = music_job.download_filename.split("/")[-1]
-    async with http_client.create_client() as client:
-        response = await client.get(music_job.download_url)
-        return StreamingResponse(
-            content=response.aiter_bytes(chunk_size=500),
-            media_type=response.headers.get("content-type"),
+    content_disposition = f"attachment; filename*=UTF-8''{quote(filename)}"
+    if settings.music_download_mode == DownloadMode.PRESIGNED:
+        url = await s3.generate_presigned_url(
+            filename=music_job.download_filename,
+            content_disposition=content_disposition,
+            content_type="audio/mpeg",
+        )
+        return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+    if settings.music_download_mode == DownloadMode.ACCEL_REDIRECT:
+        return Response(
+            None,
+            media_type="audio/mpeg",
             headers={
-                "Content-Disposition": f"attachment; filename*=UTF-8''{quote(filename)}"
+                "Content-Disposition": content_disposition,
+                "X-Accel-Redirect": (
+                    f"{settings.music_download_accel_prefix}/"
+                    f"{quote(music_job.download_filename)}"
+                ),
             },
         )
+    headers = {}
+    if range_header:
+        headers["Range"] = range_header
+    client = http_client.get_client()
+    response = await client.send(
+        client.build_request("GET", music_job.download_url, headers=headers),
+        stream=True,
+    )
+    if response.is_error:
+        await response.aclose()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ErrorMessages.DOWNLOAD_NOT_FOUND,
+        )
+    headers = {"Content-Disposition": content_disposition}
+    for header in ("Accept-Ranges", "Content-Length", "Content-Range"):
+        if header in response.headers:
+            headers[header] = response.headers[header]
+    return StreamingResponse(
+        content=response.aiter_bytes(chunk_size=settings.music_download_chunk_size),
+        status_code=response.status_code,
+        media_type=response.headers.get("content-type"),
+        headers=headers,
+        background=BackgroundTask(response.aclose),
+    )
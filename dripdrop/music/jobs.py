@@ -1,4 +1,5 @@
 import math
+from collections import OrderedDict
 
 from fastapi import APIRouter, Depends, HTTPException, Path, WebSocket, status
 from sqlalchemy import func, select
@@ -17,6 +18,8 @@ from dripdrop.music.responses import (
 from dripdrop.services import database
 from dripdrop.services.websocket_channel import RedisChannels, WebsocketChannel
 
+OWNED_JOBS_CACHE_SIZE = 256
+
 api = APIRouter(
     prefix="/jobs",
     tags=["Music Jobs"],
@@ -57,18 +60,33 @@ async def get_jobs(
 
 @api.websocket("/listen")
 async def listen_jobs(user: AuthenticatedUser, websocket: WebSocket):
-    async def handler(msg):
-        message = MusicJobUpdateResponse.model_validate(msg)
-        job_id = message.id
+    owned_jobs: OrderedDict[str, bool] = OrderedDict()
+
+    async def is_owned_job(job_id: str):
+        # Messages published before user_email was added need a lookup
+        if job_id in owned_jobs:
+            owned_jobs.move_to_end(job_id)
+            return owned_jobs[job_id]
         async with database.create_session() as session:
-            query = select(MusicJob).where(
+            query = select(MusicJob.id).where(
                 MusicJob.user_email == user.email,
                 MusicJob.id == job_id,
                 MusicJob.deleted_at.is_(None),
             )
-            music_job = await session.scalar(query)
-            if music_job:
-                await websocket.send_json(message.model_dump())
+            owned = await session.scalar(query) is not None
+        owned_jobs[job_id] = owned
+        if len(owned_jobs) > OWNED_JOBS_CACHE_SIZE:
+            owned_jobs.popitem(last=False)
+        return owned
+
+    async def handler(msg):
+        message = MusicJobUpdateResponse.model_validate(msg)
+        if message.user_email is not None:
+            owned = message.user_email == user.email
+        else:
+            owned = await is_owned_job(job_id=message.id)
+        if owned:
+            await websocket.send_json(message.model_dump(exclude={"user_email"}))
 
     await WebsocketChannel(channel=RedisChannels.MUSIC_JOB_UPDATE).listen(
         websocket=websocket, handler=handler
@@ -1,11 +1,14 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from sqlalchemy import TIMESTAMP, ForeignKey
+from sqlalchemy import JSON, TIMESTAMP, ForeignKey, and_, func, or_, select
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from dripdrop.authentication.models import User
 from dripdrop.base.models import Base
 from dripdrop.services import s3
+from dripdrop.services.database import AsyncSession
+from dripdrop.settings import settings
+from dripdrop.utils import get_current_time
 
 
 class MusicJob(Base):
@@ -34,15 +37,47 @@ class MusicJob(Base):
     grouping: Mapped[str | None] = mapped_column(nullable=True)
     completed: Mapped[bool] = mapped_column(nullable=False)
     failed: Mapped[bool] = mapped_column(nullable=False)
+    stage_timings: Mapped[dict[str, float] | None] = mapped_column(JSON, nullable=True)
+    recipe_hash: Mapped[str | None] = mapped_column(nullable=True, index=True)
     deleted_at: Mapped[datetime | None] = mapped_column(
         TIMESTAMP(timezone=True), nullable=True
     )
     user: Mapped[User] = relationship(back_populates="jobs", uselist=True)
 
-    async def cleanup(self):
+    async def _has_output_references(self, session: AsyncSession):
+        # The output may be shared with other jobs made from the same recipe,
+        # including ones of the same owner still running that may pick it up.
+        # Jobs older than the job timeout are treated as dead. Deletes of the
+        # same recipe are serialized until commit so each one sees the others.
+        if session.bind.dialect.name == "postgresql":
+            lock_key = self.recipe_hash or self.download_filename
+            await session.execute(
+                select(func.pg_advisory_xact_lock(func.hashtextextended(lock_key, 0)))
+            )
+        references = MusicJob.download_filename == self.download_filename
+        if self.recipe_hash:
+            references = or_(
+                references,
+                and_(
+                    MusicJob.user_email == self.user_email,
+                    MusicJob.recipe_hash == self.recipe_hash,
+                    MusicJob.download_filename.is_(None),
+                    MusicJob.failed.is_(False),
+                    MusicJob.created_at
+                    > get_current_time() - timedelta(seconds=settings.timeout),
+                ),
+            )
+        query = select(func.count(MusicJob.id)).where(
+            MusicJob.id != self.id, MusicJob.deleted_at.is_(None), references
+        )
+        return bool(await session.scalar(query))
+
+    async def cleanup(self, session: AsyncSession):
         if self.artwork_filename:
             await s3.delete_file(filename=self.artwork_filename)
-        if self.download_filename:
+        if self.download_filename and not await self._has_output_references(
+            session=session
+        ):
             await s3.delete_file(filename=self.download_filename)
         if self.original_filename:
             await s3.delete_file(filename=self.original_filename)
@@ -21,6 +21,7 @@ class MusicJobResponse(ResponseBaseModel):
     grouping: Optional[str] = Field(None)
     completed: bool
     failed: bool
+    stage_timings: Optional[dict[str, float]] = Field(None)
     created_at: datetime
 
     @field_validator("artwork_filename", "original_filename", "download_filename")
@@ -33,6 +34,8 @@ class MusicJobResponse(ResponseBaseModel):
 class MusicJobUpdateResponse(ResponseBaseModel):
     id: str
     status: Literal["STARTED", "COMPLETED"]
+    user_email: Optional[str] = Field(None)
+    stage_timings: Optional[dict[str, float]] = Field(None)
 
 
 class GroupingResponse(ResponseBaseModel):
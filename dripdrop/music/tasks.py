@@ -1,15 +1,20 @@
 import asyncio
 import os
 import shutil
+import time
+from contextlib import aclosing
 from datetime import timedelta
-from typing import Union
+from typing import Any, AsyncIterator, Coroutine, TypeVar, Union
 
+from pydantic import BaseModel
 from sqlalchemy import select
 from yt_dlp.utils import sanitize_filename
 
+from dripdrop.logger import logger
 from dripdrop.music.models import MusicJob
 from dripdrop.music.responses import MusicJobUpdateResponse
 from dripdrop.services import (
+    audio_cache,
     database,
     ffmpeg,
     http_client,
@@ -23,34 +28,49 @@ from dripdrop.services import (
 from dripdrop.services.audio_tag import AudioTags
 from dripdrop.services.database import AsyncSession
 from dripdrop.services.websocket_channel import RedisChannels, WebsocketChannel
+from dripdrop.settings import settings
 from dripdrop.utils import get_current_time, parse_youtube_video_id
 
+T = TypeVar("T")
+
+
+def _get_audio_cache_key(music_job: MusicJob):
+    if "youtube.com" in music_job.video_url:
+        return f"youtube:{parse_youtube_video_id(music_job.video_url)}"
+    return music_job.video_url
+
 
 async def _retrieve_audio_file(music_job_path: str, music_job: MusicJob):
     filename = None
     if music_job.filename_url:
-        async with http_client.create_client() as client:
-            res = await client.get(music_job.filename_url)
         audio_file_path = os.path.join(
             music_job_path, f"temp{os.path.splitext(music_job.original_filename)[1]}"
         )
-        with open(audio_file_path, "wb") as f:
-            f.write(res.content)
+        await http_client.download_file(
+            url=music_job.filename_url, path=audio_file_path
+        )
         filename = await ffmpeg.convert_audio_to_mp3(audio_file=audio_file_path)
     elif music_job.video_url:
+        cache_key = _get_audio_cache_key(music_job=music_job)
+        filename = await audio_cache.get(
+            key=cache_key, destination=os.path.join(music_job_path, "cached.mp3")
+        )
+        if filename:
+            return filename
         if "youtube.com" in music_job.video_url:
-            video_id = parse_youtube_video_id(music_job.video_url)
             audio_file_path = os.path.join(music_job_path, "temp.audio")
             await invidious.download_audio_from_youtube_video(
-                video_id=video_id, download_path=audio_file_path
+                video_id=parse_youtube_video_id(music_job.video_url),
+                download_path=audio_file_path,
             )
             filename = await ffmpeg.convert_audio_to_mp3(audio_file=audio_file_path)
         else:
-            filename = os.path.join(music_job_path, "temp.mp3")
-            await ytdlp.download_audio_from_video(
+            audio_file_path = await ytdlp.download_audio_from_video(
                 url=music_job.video_url,
-                download_path=f"{os.path.splitext(filename)[0]}",
+                download_path=os.path.join(music_job_path, "temp"),
             )
+            filename = await ffmpeg.convert_audio_to_mp3(audio_file=audio_file_path)
+        await audio_cache.put(key=cache_key, path=filename)
     return filename
 
 
@@ -67,22 +87,208 @@ async def _retrieve_artwork(music_job: MusicJob):
     return None
 
 
+def _apply_audio_tags(
+    audio_tag_service: AudioTags,
+    music_job: MusicJob,
+    artwork_info: Union[dict, None] = None,
+):
+    with audio_tag_service.batch():
+        audio_tag_service.title = music_job.title
+        audio_tag_service.artist = music_job.artist
+        audio_tag_service.album = music_job.album
+        if music_job.grouping:
+            audio_tag_service.grouping = music_job.grouping
+        if artwork_info:
+            audio_tag_service.set_artwork(
+                data=artwork_info["image"],
+                mime_type=f"image/{artwork_info['extension']}",
+            )
+
+
 def _update_audio_tags(
     music_job: MusicJob,
     filename: str,
     artwork_info: Union[dict, None] = None,
 ):
-    audio_tag_service = AudioTags(file_path=filename)
-    audio_tag_service.title = music_job.title
-    audio_tag_service.artist = music_job.artist
-    audio_tag_service.album = music_job.album
-    if music_job.grouping:
-        audio_tag_service.grouping = music_job.grouping
-    if artwork_info:
-        audio_tag_service.set_artwork(
-            data=artwork_info["image"],
-            mime_type=f"image/{artwork_info['extension']}",
+    _apply_audio_tags(
+        audio_tag_service=AudioTags(file_path=filename),
+        music_job=music_job,
+        artwork_info=artwork_info,
+    )
+
+
+async def _run_stage(
+    stage_timings: dict[str, float], stage: str, coroutine: Coroutine[Any, Any, T]
+) -> T:
+    start = time.perf_counter()
+    try:
+        return await coroutine
+    finally:
+        stage_timings[stage] = round(time.perf_counter() - start, 3)
+
+
+async def _run_concurrently(*coroutines: Coroutine):
+    try:
+        async with asyncio.TaskGroup() as task_group:
+            tasks = [task_group.create_task(coroutine) for coroutine in coroutines]
+    except ExceptionGroup as e:
+        raise e.exceptions[0]
+    return [task.result() for task in tasks]
+
+
+async def _process_audio_file(
+    music_job: MusicJob,
+    job_path: str,
+    new_filename: str,
+    stage_timings: dict[str, float],
+):
+    # Audio and artwork don't depend on each other, only tagging needs both
+    filename, artwork_info = await _run_concurrently(
+        _run_stage(
+            stage_timings=stage_timings,
+            stage="audio",
+            coroutine=_retrieve_audio_file(
+                music_job_path=job_path, music_job=music_job
+            ),
+        ),
+        _run_stage(
+            stage_timings=stage_timings,
+            stage="artwork",
+            coroutine=_retrieve_artwork(music_job=music_job),
+        ),
+    )
+    await _run_stage(
+        stage_timings=stage_timings,
+        stage="tags",
+        coroutine=asyncio.to_thread(
+            _update_audio_tags,
+            music_job=music_job,
+            filename=filename,
+            artwork_info=artwork_info,
+        ),
+    )
+    await _run_stage(
+        stage_timings=stage_timings,
+        stage="upload",
+        coroutine=s3.upload_path(
+            filename=new_filename, path=filename, content_type="audio/mpeg"
+        ),
+    )
+
+
+class AudioStreamSource(BaseModel):
+    url: str
+    stream_info: ffmpeg.AudioStreamInfo
+    cache_key: str | None
+
+
+async def _get_audio_stream_source(music_job: MusicJob):
+    cache_key = None
+    if music_job.filename_url:
+        audio_url = music_job.filename_url
+    elif music_job.video_url and "youtube.com" in music_job.video_url:
+        cache_key = _get_audio_cache_key(music_job=music_job)
+        # Cached audio is already converted, copying it from disk is cheaper
+        if await audio_cache.contains(key=cache_key):
+            return None
+        audio_url = await invidious.get_audio_url(
+            video_id=parse_youtube_video_id(music_job.video_url)
+        )
+    else:
+        return None
+    try:
+        stream_info = await ffmpeg.probe_audio_stream(audio_file=audio_url)
+    except Exception:
+        logger.warning(f"Failed to probe audio for job {music_job.id}, not streaming")
+        return None
+    if not stream_info.can_read_from_pipe():
+        return None
+    return AudioStreamSource(
+        url=audio_url, stream_info=stream_info, cache_key=cache_key
+    )
+
+
+async def _prepend(data: bytes, stream: AsyncIterator[bytes]):
+    yield data
+    async for chunk in stream:
+        yield chunk
+
+
+async def _tee(stream: AsyncIterator[bytes], path: str | None):
+    if not path:
+        async for chunk in stream:
+            yield chunk
+        return
+    with open(path, "wb") as f:
+        async for chunk in stream:
+            await asyncio.to_thread(f.write, chunk)
+            yield chunk
+
+
+async def _process_audio_stream(
+    music_job: MusicJob,
+    job_path: str,
+    new_filename: str,
+    stream_source: AudioStreamSource,
+    stage_timings: dict[str, float],
+):
+    # Downloaded bytes are piped through ffmpeg straight into the upload. The
+    # tags have to be known up front since they are written ahead of the
+    # audio. The converted audio is only written to disk to fill the cache.
+    artwork_info = await _run_stage(
+        stage_timings=stage_timings,
+        stage="artwork",
+        coroutine=_retrieve_artwork(music_job=music_job),
+    )
+    audio_tag_service = AudioTags()
+    _apply_audio_tags(
+        audio_tag_service=audio_tag_service,
+        music_job=music_job,
+        artwork_info=artwork_info,
+    )
+    cache_path = None
+    if stream_source.cache_key and settings.audio_cache_enabled:
+        cache_path = os.path.join(job_path, "stream.mp3")
+    async with aclosing(
+        ffmpeg.convert_stream_to_mp3(
+            source=http_client.stream_download(url=stream_source.url),
+            chunk_size=settings.s3_multipart_part_size,
+            stream_info=stream_source.stream_info,
+        )
+    ) as audio_stream:
+        await _run_stage(
+            stage_timings=stage_timings,
+            stage="stream",
+            coroutine=s3.upload_stream(
+                filename=new_filename,
+                stream=_prepend(
+                    data=audio_tag_service.to_bytes(),
+                    stream=_tee(stream=audio_stream, path=cache_path),
+                ),
+                content_type="audio/mpeg",
+            ),
         )
+    if cache_path:
+        await audio_cache.put(key=stream_source.cache_key, path=cache_path)
+
+
+async def _find_reusable_job(session: AsyncSession, music_job: MusicJob):
+    if not music_job.recipe_hash:
+        return None
+    query = (
+        select(MusicJob)
+        .where(
+            MusicJob.user_email == music_job.user_email,
+            MusicJob.recipe_hash == music_job.recipe_hash,
+            MusicJob.id != music_job.id,
+            MusicJob.completed.is_(True),
+            MusicJob.download_filename.is_not(None),
+            MusicJob.deleted_at.is_(None),
+        )
+        .order_by(MusicJob.created_at.desc())
+        .limit(1)
+    )
+    return await session.scalar(query)
 
 
 @rq_client.worker_task
@@ -99,32 +305,48 @@ async def run_music_job(music_job_id: str, session: AsyncSession):
         raise Exception(f"Job with id ({job_id}) not found")
     websocket_channel = WebsocketChannel(channel=RedisChannels.MUSIC_JOB_UPDATE)
     await websocket_channel.publish(
-        message=MusicJobUpdateResponse(id=job_id, status="STARTED")
+        message=MusicJobUpdateResponse(
+            id=job_id, status="STARTED", user_email=music_job.user_email
+        )
     )
     job_path = None
+    stage_timings: dict[str, float] = {}
+    start = time.perf_counter()
     try:
         job_path = os.path.join(root_job_path, music_job.id)
         await asyncio.to_thread(os.mkdir, job_path)
-        filename = await _retrieve_audio_file(
-            music_job_path=job_path, music_job=music_job
-        )
-        artwork_info = await _retrieve_artwork(music_job=music_job)
-        await asyncio.to_thread(
-            _update_audio_tags,
-            music_job=music_job,
-            filename=filename,
-            artwork_info=artwork_info,
-        )
-        new_filename = (
-            sanitize_filename(f"{music_job.title} {music_job.artist}").lower() + ".mp3"
-        )
-        new_filename = f"{s3.MUSIC_FOLDER}/{music_job.id}/{new_filename}"
-        with open(filename, "rb") as file:
-            await s3.upload_file(
-                filename=new_filename,
-                body=await asyncio.to_thread(file.read),
-                content_type="audio/mpeg",
+        reusable_job = await _find_reusable_job(session=session, music_job=music_job)
+        if reusable_job:
+            logger.info(f"Reusing output of job {reusable_job.id} for job {job_id}")
+            new_filename = reusable_job.download_filename
+        else:
+            new_filename = (
+                sanitize_filename(f"{music_job.title} {music_job.artist}").lower()
+                + ".mp3"
             )
+            new_filename = f"{s3.MUSIC_FOLDER}/{music_job.id}/{new_filename}"
+            stream_source = None
+            if settings.music_job_streaming:
+                stream_source = await _run_stage(
+                    stage_timings=stage_timings,
+                    stage="probe",
+                    coroutine=_get_audio_stream_source(music_job=music_job),
+                )
+            if stream_source:
+                await _process_audio_stream(
+                    music_job=music_job,
+                    job_path=job_path,
+                    new_filename=new_filename,
+                    stream_source=stream_source,
+                    stage_timings=stage_timings,
+                )
+            else:
+                await _process_audio_file(
+                    music_job=music_job,
+                    job_path=job_path,
+                    new_filename=new_filename,
+                    stage_timings=stage_timings,
+                )
         music_job.completed = True
         music_job.download_filename = new_filename
         music_job.download_url = s3.resolve_url(filename=new_filename)
@@ -132,9 +354,16 @@ async def run_music_job(music_job_id: str, session: AsyncSession):
         music_job.failed = True
         raise e
     finally:
+        stage_timings["total"] = round(time.perf_counter() - start, 3)
+        music_job.stage_timings = stage_timings
         await session.commit()
         await websocket_channel.publish(
-            message=MusicJobUpdateResponse(id=job_id, status="COMPLETED")
+            message=MusicJobUpdateResponse(
+                id=job_id,
+                status="COMPLETED",
+                user_email=music_job.user_email,
+                stage_timings=stage_timings,
+            )
         )
         if job_path:
             await asyncio.to_thread(shutil.rmtree, job_path)
@@ -146,7 +375,7 @@ async def delete_music_job(music_job_id: str, session: AsyncSession = ...):
     music_job = await session.scalar(query)
     if not music_job:
         raise Exception(f"Music Job ({music_job_id}) could not be found")
-    await music_job.cleanup()
+    await music_job.cleanup(session=session)
     music_job.deleted_at = get_current_time()
     await session.commit()
 
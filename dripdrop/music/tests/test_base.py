@@ -64,6 +64,7 @@ class MusicBaseTest(BaseTest):
         grouping: str | None = None,
         completed: bool = False,
         failed: bool = False,
+        recipe_hash: str | None = None,
         deleted_at: datetime | None = None,
     ):
         job = MusicJob(
@@ -82,6 +83,7 @@ class MusicBaseTest(BaseTest):
             grouping=grouping,
             completed=completed,
             failed=failed,
+            recipe_hash=recipe_hash,
             deleted_at=deleted_at,
         )
         self.session.add(job)
@@ -1,8 +1,13 @@
+import os
 from unittest import skip
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from fastapi import status
 
 from dripdrop.music.tests.test_base import MusicBaseTest
+from dripdrop.services import ffmpeg, temp_files
+from dripdrop.services.audio_tag import AudioTags
+from dripdrop.settings import settings
 
 CREATE_URL = "/api/music/job/create"
 
@@ -127,6 +132,163 @@ class CreateMusicFileJobTestCase(MusicBaseTest):
         self.assertIsNotNone(job.download_url)
         response = await self.http_client.get(job.download_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(job.stage_timings.keys()),
+            {"audio", "artwork", "tags", "upload", "total"},
+        )
+
+    @patch.object(AudioTags, "save", autospec=True, side_effect=AudioTags.save)
+    async def test_creating_music_file_job_saves_tags_once(self, mock_save: MagicMock):
+        user = await self.create_and_login_user(
+            email="user@gmail.com", password="password"
+        )
+        response = await self.client.post(
+            CREATE_URL,
+            data={
+                "title": "title",
+                "artist": "artist",
+                "album": "album",
+                "grouping": "grouping",
+                "artwork_url": self.test_image_url,
+            },
+            files={
+                "file": ("tun suh.mp3", MusicBaseTest.test_audio_file, "audio/mpeg"),
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        json = response.json()
+        job = await self.get_music_job(email=user.email, music_job_id=json.get("id"))
+        self.assertTrue(job.completed)
+        self.assertEqual(mock_save.call_count, 1)
+
+    async def test_creating_music_file_job_with_streaming(self):
+        user = await self.create_and_login_user(
+            email="user@gmail.com", password="password"
+        )
+        with patch.object(settings, "music_job_streaming", True):
+            response = await self.client.post(
+                CREATE_URL,
+                data={"title": "title", "artist": "artist", "album": "album"},
+                files={
+                    "file": (
+                        "tun suh.mp3",
+                        MusicBaseTest.test_audio_file,
+                        "audio/mpeg",
+                    ),
+                },
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        json = response.json()
+        job = await self.get_music_job(email=user.email, music_job_id=json.get("id"))
+        self.assertTrue(job.completed)
+        self.assertFalse(job.failed)
+        self.assertEqual(
+            set(job.stage_timings.keys()),
+            {"probe", "artwork", "stream", "total"},
+        )
+        response = await self.http_client.get(job.download_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        directory = await temp_files.create_new_directory(
+            directory="streaming", raise_on_exists=False
+        )
+        download_path = os.path.join(directory, "download.mp3")
+        with open(download_path, "wb") as f:
+            f.write(response.content)
+        tags = AudioTags.read_tags(file_path=download_path)
+        self.assertEqual(tags.title, "title")
+        self.assertEqual(tags.artist, "artist")
+        self.assertEqual(tags.album, "album")
+        stream_info = await ffmpeg.probe_audio_stream(audio_file=download_path)
+        self.assertEqual(stream_info.codec_name, "mp3")
+
+    @patch("dripdrop.services.ffmpeg.probe_audio_stream", new_callable=AsyncMock)
+    async def test_creating_music_file_job_with_streaming_and_mp4_source(
+        self, mock_probe_audio_stream: AsyncMock
+    ):
+        mock_probe_audio_stream.return_value = ffmpeg.AudioStreamInfo(
+            codec_name="aac", format_name="mov,mp4,m4a,3gp,3g2,mj2"
+        )
+        user = await self.create_and_login_user(
+            email="user@gmail.com", password="password"
+        )
+        with patch.object(settings, "music_job_streaming", True):
+            response = await self.client.post(
+                CREATE_URL,
+                data={"title": "title", "artist": "artist", "album": "album"},
+                files={
+                    "file": (
+                        "tun suh.mp3",
+                        MusicBaseTest.test_audio_file,
+                        "audio/mpeg",
+                    ),
+                },
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        json = response.json()
+        job = await self.get_music_job(email=user.email, music_job_id=json.get("id"))
+        self.assertTrue(job.completed)
+        self.assertFalse(job.failed)
+        self.assertIn("audio", job.stage_timings)
+        self.assertNotIn("stream", job.stage_timings)
+
+    async def test_creating_duplicate_music_file_jobs(self):
+        user = await self.create_and_login_user(
+            email="user@gmail.com", password="password"
+        )
+        jobs = []
+        for _ in range(2):
+            response = await self.client.post(
+                CREATE_URL,
+                data={
+                    "title": "title",
+                    "artist": "artist",
+                    "album": "album",
+                    "grouping": "grouping",
+                },
+                files={
+                    "file": (
+                        "tun suh.mp3",
+                        MusicBaseTest.test_audio_file,
+                        "audio/mpeg",
+                    ),
+                },
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            json = response.json()
+            jobs.append(
+                await self.get_music_job(email=user.email, music_job_id=json.get("id"))
+            )
+        first_job, second_job = jobs
+        self.assertTrue(second_job.completed)
+        self.assertEqual(first_job.recipe_hash, second_job.recipe_hash)
+        self.assertEqual(first_job.download_filename, second_job.download_filename)
+        self.assertNotIn("audio", second_job.stage_timings)
+
+    async def test_creating_duplicate_music_file_jobs_for_different_users(self):
+        jobs = []
+        for email in ["user@gmail.com", "other@gmail.com"]:
+            user = await self.create_and_login_user(email=email, password="password")
+            response = await self.client.post(
+                CREATE_URL,
+                data={"title": "title", "artist": "artist", "album": "album"},
+                files={
+                    "file": (
+                        "tun suh.mp3",
+                        MusicBaseTest.test_audio_file,
+                        "audio/mpeg",
+                    ),
+                },
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            json = response.json()
+            jobs.append(
+                await self.get_music_job(email=user.email, music_job_id=json.get("id"))
+            )
+        first_job, second_job = jobs
+        self.assertTrue(second_job.completed)
+        self.assertEqual(first_job.recipe_hash, second_job.recipe_hash)
+        self.assertNotEqual(first_job.download_filename, second_job.download_filename)
+        self.assertIn("audio", second_job.stage_timings)
 
     async def test_creating_music_file_job_with_valid_file_and_artwork_url(self):
         user = await self.create_and_login_user(
@@ -1,12 +1,32 @@
+from datetime import datetime, timedelta
+
 from fastapi import status
 
 from dripdrop.music.tests.test_base import MusicBaseTest
+from dripdrop.settings import settings
 
 CREATE_URL = "/api/music/job/create"
 DELETE_URL = "/api/music/job/{job_id}/delete"
 
 
 class DeleteMusicJobTestCase(MusicBaseTest):
+    async def create_completed_job(self):
+        user = await self.create_and_login_user(
+            email="user@gmail.com", password="password"
+        )
+        response = await self.client.post(
+            CREATE_URL,
+            data={"title": "title", "artist": "artist", "album": "album"},
+            files={
+                "file": ("tun suh.mp3", MusicBaseTest.test_audio_file, "audio/mpeg"),
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        json = response.json()
+        job = await self.get_music_job(email=user.email, music_job_id=json.get("id"))
+        self.assertTrue(job.completed)
+        return job
+
     async def test_deleting_job_when_not_logged_in(self):
         response = await self.client.delete(DELETE_URL.format(job_id=1))
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -61,3 +81,99 @@ class DeleteMusicJobTestCase(MusicBaseTest):
         self.assertIn(
             response.status_code, [status.HTTP_404_NOT_FOUND, status.HTTP_403_FORBIDDEN]
         )
+
+    async def test_deleting_job_with_shared_output(self):
+        user = await self.create_and_login_user(
+            email="user@gmail.com", password="password"
+        )
+        jobs = []
+        for _ in range(2):
+            response = await self.client.post(
+                CREATE_URL,
+                data={
+                    "title": "title",
+                    "artist": "artist",
+                    "album": "album",
+                    "grouping": "grouping",
+                },
+                files={
+                    "file": (
+                        "tun suh.mp3",
+                        MusicBaseTest.test_audio_file,
+                        "audio/mpeg",
+                    ),
+                },
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            json = response.json()
+            jobs.append(
+                await self.get_music_job(email=user.email, music_job_id=json.get("id"))
+            )
+        first_job, second_job = jobs
+        self.assertEqual(first_job.download_url, second_job.download_url)
+        response = await self.client.delete(DELETE_URL.format(job_id=first_job.id))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = await self.http_client.get(second_job.download_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = await self.client.delete(DELETE_URL.format(job_id=second_job.id))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = await self.http_client.get(second_job.download_url)
+        self.assertIn(
+            response.status_code, [status.HTTP_404_NOT_FOUND, status.HTTP_403_FORBIDDEN]
+        )
+
+    async def test_deleting_job_with_output_pending_reuse(self):
+        job = await self.create_completed_job()
+        await self.create_music_job(
+            id="pending",
+            email=job.user_email,
+            title="title",
+            artist="artist",
+            album="album",
+            recipe_hash=job.recipe_hash,
+        )
+        response = await self.client.delete(DELETE_URL.format(job_id=job.id))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = await self.http_client.get(job.download_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    async def test_deleting_job_with_same_recipe_pending_for_other_user(self):
+        job = await self.create_completed_job()
+        other_user = await self.create_user(
+            email="other@gmail.com", password="password"
+        )
+        await self.create_music_job(
+            id="pending",
+            email=other_user.email,
+            title="title",
+            artist="artist",
+            album="album",
+            recipe_hash=job.recipe_hash,
+        )
+        response = await self.client.delete(DELETE_URL.format(job_id=job.id))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = await self.http_client.get(job.download_url)
+        self.assertIn(
+            response.status_code, [status.HTTP_404_NOT_FOUND, status.HTTP_403_FORBIDDEN]
+        )
+
+    async def test_deleting_job_with_stale_pending_reuse(self):
+        job = await self.create_completed_job()
+        pending_job = await self.create_music_job(
+            id="pending",
+            email=job.user_email,
+            title="title",
+            artist="artist",
+            album="album",
+            recipe_hash=job.recipe_hash,
+        )
+        pending_job.created_at = datetime.now(settings.timezone) - timedelta(
+            seconds=settings.timeout + 60
+        )
+        await self.session.commit()
+        response = await self.client.delete(DELETE_URL.format(job_id=job.id))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = await self.http_client.get(job.download_url)
+        self.assertIn(
+            response.status_code, [status.HTTP_404_NOT_FOUND, status.HTTP_403_FORBIDDEN]
+        )
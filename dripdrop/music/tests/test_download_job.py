@@ -1,6 +1,10 @@
+from unittest.mock import patch
+from urllib.parse import quote
+
 from fastapi import status
 
 from dripdrop.music.tests.test_base import MusicBaseTest
+from dripdrop.settings import DownloadMode, settings
 
 CREATE_URL = "/api/music/job/create"
 DOWNLOAD_URL = "/api/music/job/{job_id}/download"
@@ -31,7 +35,7 @@ class DownloadMusicJobTestCase(MusicBaseTest):
         response = await self.client.get(DOWNLOAD_URL.format(job_id=job.id))
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
-    async def test_downloading_job(self):
+    async def create_completed_job(self):
         user = await self.create_and_login_user(
             email="user@gmail.com", password="password"
         )
@@ -51,7 +55,42 @@ class DownloadMusicJobTestCase(MusicBaseTest):
         json = response.json()
         job = await self.get_music_job(email=user.email, music_job_id=json.get("id"))
         self.assertTrue(job.completed)
-        response = await self.client.get(DOWNLOAD_URL.format(job_id=job.id))
+        return job
+
+    async def test_downloading_job(self):
+        job = await self.create_completed_job()
+        with patch.object(settings, "music_download_mode", DownloadMode.PROXY):
+            response = await self.client.get(DOWNLOAD_URL.format(job_id=job.id))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.headers.get("Content-Type"), "audio/mpeg")
         self.assertIsNotNone(response.headers.get("Content-Disposition"))
+
+    async def test_downloading_job_with_range(self):
+        job = await self.create_completed_job()
+        with patch.object(settings, "music_download_mode", DownloadMode.PROXY):
+            response = await self.client.get(
+                DOWNLOAD_URL.format(job_id=job.id), headers={"Range": "bytes=0-99"}
+            )
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(len(response.content), 100)
+        self.assertIsNotNone(response.headers.get("Content-Range"))
+
+    async def test_downloading_job_with_presigned_url(self):
+        job = await self.create_completed_job()
+        with patch.object(settings, "music_download_mode", DownloadMode.PRESIGNED):
+            response = await self.client.get(DOWNLOAD_URL.format(job_id=job.id))
+        self.assertEqual(response.status_code, status.HTTP_307_TEMPORARY_REDIRECT)
+        location = response.headers.get("Location")
+        self.assertIn(job.id, location)
+        self.assertIn("response-content-disposition", location)
+
+    async def test_downloading_job_with_accel_redirect(self):
+        job = await self.create_completed_job()
+        with patch.object(settings, "music_download_mode", DownloadMode.ACCEL_REDIRECT):
+            response = await self.client.get(DOWNLOAD_URL.format(job_id=job.id))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.headers.get("X-Accel-Redirect"),
+            f"{settings.music_download_accel_prefix}/{quote(job.download_filename)}",
+        )
+        self.assertIsNotNone(response.headers.get("Content-Disposition"))
@@ -1,12 +1,14 @@
 import asyncio
 import base64
+import hashlib
 import os
 import shutil
 import traceback
 import uuid
 
+import orjson
 from fastapi import UploadFile
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from sqlalchemy import select
 
 from dripdrop.logger import logger
@@ -14,11 +16,29 @@ from dripdrop.music.models import MusicJob
 from dripdrop.music.responses import TagsResponse
 from dripdrop.services import database, http_client, image_downloader, s3, temp_files
 from dripdrop.services.audio_tag import AudioTags
+from dripdrop.settings import settings
 
 
 class UploadedFileInfo(BaseModel):
     url: str | None
     filename: str | None
+    content_hash: str | None = Field(None)
+
+
+def get_recipe_hash(
+    music_job: MusicJob, audio_hash: str | None, artwork_hash: str | None
+):
+    # Jobs with the same recipe produce the same mp3, so the output can be shared
+    recipe = {
+        "source": audio_hash or music_job.video_url,
+        "title": music_job.title,
+        "artist": music_job.artist,
+        "album": music_job.album,
+        "grouping": music_job.grouping,
+        "artwork": artwork_hash,
+        "profile": settings.ffmpeg_audio_profile.value,
+    }
+    return hashlib.sha256(orjson.dumps(recipe, option=orjson.OPT_SORT_KEYS)).hexdigest()
 
 
 async def handle_files(job_id: str, file: UploadFile, artwork_url: str | None = None):
@@ -36,6 +56,11 @@ async def handle_files(job_id: str, file: UploadFile, artwork_url: str | None =
             music_job.artwork_filename = artwork_info.filename
             music_job.original_filename = audiofile_info.filename
             music_job.filename_url = audiofile_info.url
+            music_job.recipe_hash = get_recipe_hash(
+                music_job=music_job,
+                audio_hash=audiofile_info.content_hash,
+                artwork_hash=artwork_info.content_hash,
+            )
         except Exception:
             music_job.failed = True
         finally:
@@ -60,6 +85,7 @@ async def handle_artwork_url(job_id: str, artwork_url: str | None = None):
             dataString = ",".join(artwork_url.split(",")[1:])
             data = dataString.encode()
             data_bytes = base64.b64decode(data)
+            uploaded_file_info.content_hash = hashlib.sha256(data_bytes).hexdigest()
             uploaded_file_info.filename = (
                 f"{s3.ARTWORK_FOLDER}/{job_id}/artwork.{extension}"
             )
@@ -78,19 +104,30 @@ async def handle_artwork_url(job_id: str, artwork_url: str | None = None):
                 response=response
             ):
                 return UploadedFileInfo(url=None, filename=None)
+            uploaded_file_info.content_hash = hashlib.sha256(
+                response.content
+            ).hexdigest()
     return uploaded_file_info
 
 
+async def _read_upload_file(file: UploadFile, file_hash: "hashlib._Hash"):
+    while chunk := await file.read(settings.s3_multipart_part_size):
+        file_hash.update(chunk)
+        yield chunk
+
+
 async def handle_audio_file(job_id: str, file: UploadFile):
     uploaded_file_info = UploadedFileInfo(url=None, filename=None)
     if file:
         uploaded_file_info.filename = f"{s3.MUSIC_FOLDER}/{job_id}/old/{file.filename}"
         uploaded_file_info.url = s3.resolve_url(filename=uploaded_file_info.filename)
-        await s3.upload_file(
+        file_hash = hashlib.sha256()
+        await s3.upload_stream(
             filename=uploaded_file_info.filename,
-            body=await file.read(),
+            stream=_read_upload_file(file=file, file_hash=file_hash),
             content_type=file.content_type,
         )
+        uploaded_file_info.content_hash = file_hash.hexdigest()
     return uploaded_file_info
 
 
@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+import os
+import shutil
+import socket
+import traceback
+import uuid
+
+from pydantic import BaseModel
+
+from dripdrop.logger import logger
+from dripdrop.services import redis_client, temp_files
+from dripdrop.settings import settings
+
+CACHE_DIRECTORY = "audio_cache"
+METRICS_KEY = "audio_cache:metrics"
+SIZES_KEY = "audio_cache:sizes"
+
+
+class AudioCacheStatus(BaseModel):
+    hits: int
+    misses: int
+    stores: int
+    evictions: int
+    evicted_bytes: int
+    size: int
+    host_sizes: dict[str, int]
+
+
+def _get_cache_path(directory: str, key: str):
+    key_hash = hashlib.sha256(
+        f"{settings.ffmpeg_audio_profile.value}:{key}".encode()
+    ).hexdigest()
+    return os.path.join(directory, f"{key_hash}.mp3")
+
+
+async def _record(size: int | None = None, **values: int):
+    try:
+        async with redis_client.get_client().pipeline() as pipeline:
+            for field, value in values.items():
+                pipeline.hincrby(METRICS_KEY, field, value)
+            # Every host has its own cache directory, so sizes are kept per host
+            if size is not None:
+                pipeline.hset(SIZES_KEY, socket.gethostname(), size)
+            await pipeline.execute()
+    except Exception:
+        logger.exception(traceback.format_exc())
+
+
+def _evict(directory: str, max_size: int):
+    entries = []
+    for entry in os.scandir(directory):
+        if entry.is_file() and entry.name.endswith(".mp3"):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    size = sum(entry_size for _, entry_size, _ in entries)
+    evictions = 0
+    evicted_bytes = 0
+    for _, entry_size, path in sorted(entries):
+        if size <= max_size:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        size -= entry_size
+        evictions += 1
+        evicted_bytes += entry_size
+    return size, evictions, evicted_bytes
+
+
+def _copy_from_cache(cache_path: str, destination: str):
+    try:
+        shutil.copyfile(cache_path, destination)
+    except FileNotFoundError:
+        return False
+    # Access time is tracked through mtime, atime is often disabled
+    os.utime(cache_path)
+    return True
+
+
+def _copy_to_cache(path: str, cache_path: str):
+    temp_path = f"{cache_path}.{uuid.uuid4()}.tmp"
+    shutil.copyfile(path, temp_path)
+    os.replace(temp_path, cache_path)
+
+
+async def get(key: str, destination: str):
+    if not settings.audio_cache_enabled:
+        return None
+    directory = await temp_files.create_new_directory(
+        directory=CACHE_DIRECTORY, raise_on_exists=False
+    )
+    cache_path = _get_cache_path(directory=directory, key=key)
+    if await asyncio.to_thread(_copy_from_cache, cache_path, destination):
+        await _record(hits=1)
+        return destination
+    await _record(misses=1)
+    return None
+
+
+async def contains(key: str):
+    if not settings.audio_cache_enabled:
+        return False
+    directory = await temp_files.create_new_directory(
+        directory=CACHE_DIRECTORY, raise_on_exists=False
+    )
+    cache_path = _get_cache_path(directory=directory, key=key)
+    return await asyncio.to_thread(os.path.exists, cache_path)
+
+
+async def put(key: str, path: str):
+    if not settings.audio_cache_enabled:
+        return
+    directory = await temp_files.create_new_directory(
+        directory=CACHE_DIRECTORY, raise_on_exists=False
+    )
+    cache_path = _get_cache_path(directory=directory, key=key)
+    await asyncio.to_thread(_copy_to_cache, path, cache_path)
+    size, evictions, evicted_bytes = await asyncio.to_thread(
+        _evict, directory, settings.audio_cache_max_size
+    )
+    if evictions:
+        logger.info(f"Evicted {evictions} cached audio files ({evicted_bytes} bytes)")
+    await _record(stores=1, evictions=evictions, evicted_bytes=evicted_bytes, size=size)
+
+
+async def get_status():
+    client = redis_client.get_client()
+    metrics = await client.hgetall(METRICS_KEY)
+    host_sizes = {
+        host.decode(): int(size)
+        for host, size in (await client.hgetall(SIZES_KEY)).items()
+    }
+    return AudioCacheStatus(
+        hits=int(metrics.get(b"hits", 0)),
+        misses=int(metrics.get(b"misses", 0)),
+        stores=int(metrics.get(b"stores", 0)),
+        evictions=int(metrics.get(b"evictions", 0)),
+        evicted_bytes=int(metrics.get(b"evicted_bytes", 0)),
+        size=sum(host_sizes.values()),
+        host_sizes=host_sizes,
+    )
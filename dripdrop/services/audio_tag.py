@@ -1,7 +1,9 @@
 import base64
 import io
 import re
+from contextlib import contextmanager
 
+import mutagen
 import mutagen.id3
 
 
@@ -12,8 +14,41 @@ class AudioTags:
     _GROUPING_TAG = "TIT1"
     _ARTWORK_TAG = "APIC:"
 
-    def __init__(self, file_path: str):
-        self.tags = mutagen.id3.ID3(file_path)
+    def __init__(self, file_path: str | None = None):
+        self.file_path = file_path
+        self.tags = mutagen.id3.ID3(file_path) if file_path else mutagen.id3.ID3()
+        self._batch_depth = 0
+
+    @staticmethod
+    def _keep_padding(info: mutagen.PaddingInfo):
+        # Reusing the existing padding lets mutagen rewrite only the ID3 header
+        # instead of moving the audio data
+        if info.padding >= 0:
+            return info.padding
+        return info.get_default_padding()
+
+    def save(self):
+        if self.file_path:
+            self.tags.save(padding=AudioTags._keep_padding)
+
+    def to_bytes(self):
+        buffer = io.BytesIO()
+        self.tags.save(buffer, padding=lambda info: info.get_default_padding())
+        return buffer.getvalue()
+
+    def _save(self):
+        if not self._batch_depth:
+            self.save()
+
+    @contextmanager
+    def batch(self):
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+        if not self._batch_depth:
+            self.save()
 
     def _get_tag(self, tag_name: str = ...) -> str | None:
         tag = self.tags.get(tag_name)
@@ -29,7 +64,7 @@ class AudioTags:
     def title(self, value: str):
         self.tags.delall(AudioTags._TITLE_TAG)
         self.tags.add(mutagen.id3.TIT2(text=[value]))
-        self.tags.save()
+        self._save()
 
     @property
     def artist(self):
@@ -39,7 +74,7 @@ class AudioTags:
     def artist(self, value: str):
         self.tags.delall(AudioTags._ARTIST_TAG)
         self.tags.add(mutagen.id3.TPE1(text=value))
-        self.tags.save()
+        self._save()
 
     @property
     def album(self):
@@ -49,7 +84,7 @@ class AudioTags:
     def album(self, value: str):
         self.tags.delall(AudioTags._ALBUM_TAG)
         self.tags.add(mutagen.id3.TALB(text=value))
-        self.tags.save()
+        self._save()
 
     @property
     def grouping(self):
@@ -59,7 +94,7 @@ class AudioTags:
     def grouping(self, value: str):
         self.tags.delall(AudioTags._GROUPING_TAG)
         self.tags.add(mutagen.id3.TIT1(text=value))
-        self.tags.save()
+        self._save()
 
     @property
     def artwork(self):
@@ -71,7 +106,7 @@ class AudioTags:
     def set_artwork(self, data: bytes, mime_type: str):
         self.tags.delall(AudioTags._ARTWORK_TAG)
         self.tags.add(mutagen.id3.APIC(mime=mime_type, data=data))
-        self.tags.save()
+        self._save()
 
     def get_artwork_as_base64(self):
         tag = self.artwork
@@ -1,11 +1,15 @@
+import os
+import time
 from contextlib import asynccontextmanager
 from enum import Enum
-from typing import AsyncGenerator, Literal, Sequence, Tuple, TypeVar, overload
+from typing import Any, AsyncGenerator, Literal, Sequence, Tuple, TypeVar, overload
 
-from sqlalchemy import Select
+from pydantic import BaseModel
+from sqlalchemy import ColumnElement, Select, inspect, tuple_
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 
 from dripdrop.settings import settings
 
@@ -16,14 +20,110 @@ class StreamType(Enum):
     SCALARS = 0
 
 
-engine = create_async_engine(
-    settings.async_database_url,
-    poolclass=NullPool,
-    echo=False,
-)
+class StreamMode(Enum):
+    AUTO = "auto"
+    OFFSET = "offset"
+    KEYSET = "keyset"
+    CURSOR = "cursor"
+
+
+class PoolStatus(BaseModel):
+    pooled: bool
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    checkouts: int
+    timeouts: int
+    average_wait: float
+    max_wait: float
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record_checkout(self, wait: float, timed_out: bool = False):
+        self.checkouts += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        if timed_out:
+            self.timeouts += 1
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            pool_metrics.record_checkout(
+                wait=time.perf_counter() - start, timed_out=timed_out
+            )
+
+
+def _create_engine():
+    if not settings.database_pool_enabled:
+        return create_async_engine(
+            settings.async_database_url,
+            poolclass=NullPool,
+            echo=False,
+        )
+    return create_async_engine(
+        settings.async_database_url,
+        poolclass=InstrumentedPool,
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        pool_recycle=settings.database_pool_recycle,
+        pool_timeout=settings.database_pool_timeout,
+        pool_pre_ping=settings.database_pool_pre_ping,
+        echo=False,
+    )
+
+
+engine = _create_engine()
 session_maker = sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
 
 
+def _reset_pool_after_fork():
+    # Forked processes (RQ work horses) must not reuse the parent's sockets
+    engine.sync_engine.dispose(close=False)
+    pool_metrics.reset()
+
+
+os.register_at_fork(after_in_child=_reset_pool_after_fork)
+
+
+def get_pool_status():
+    pool = engine.pool
+    pooled = isinstance(pool, InstrumentedPool)
+    checkouts = pool_metrics.checkouts
+    return PoolStatus(
+        pooled=pooled,
+        size=pool.size() if pooled else 0,
+        checked_in=pool.checkedin() if pooled else 0,
+        checked_out=pool.checkedout() if pooled else 0,
+        overflow=pool.overflow() if pooled else 0,
+        checkouts=checkouts,
+        timeouts=pool_metrics.timeouts,
+        average_wait=pool_metrics.total_wait / checkouts if checkouts else 0.0,
+        max_wait=pool_metrics.max_wait,
+    )
+
+
 @asynccontextmanager
 async def create_session():
     session: AsyncSession = session_maker()
@@ -36,12 +136,109 @@ async def create_session():
         await session.close()
 
 
+def _get_keyset_columns(query: Select) -> list[ColumnElement[Any]] | None:
+    if query._order_by_clauses or len(query.column_descriptions) != 1:
+        return None
+    description = query.column_descriptions[0]
+    entity = description.get("entity")
+    expression = description.get("expr")
+    if entity is None:
+        return None
+    mapper = inspect(entity)
+    if expression is entity:
+        return list(mapper.primary_key)
+    columns = getattr(getattr(expression, "property", None), "columns", None)
+    if not columns:
+        return None
+    primary_key = list(mapper.primary_key)
+    if query._distinct or (len(primary_key) == 1 and columns[0] is primary_key[0]):
+        return [expression]
+    return None
+
+
+def _resolve_stream_mode(
+    query: Select,
+    mode: StreamMode,
+    keys: Sequence[ColumnElement[Any]] | None,
+):
+    if mode == StreamMode.AUTO:
+        if keys is None:
+            keys = _get_keyset_columns(query)
+        return (StreamMode.KEYSET, keys) if keys else (StreamMode.CURSOR, None)
+    if mode == StreamMode.KEYSET:
+        if keys is None:
+            keys = _get_keyset_columns(query)
+        if not keys:
+            raise ValueError("Unable to determine keyset columns for query")
+    return mode, keys
+
+
+def _get_rows(results, stream_type: StreamType):
+    if stream_type == StreamType.SCALARS:
+        return results.scalars()
+    return results
+
+
+async def _stream_offset(
+    query: Select, yield_per: int, session: AsyncSession, stream_type: StreamType
+):
+    page = 0
+    while True:
+        results = await session.execute(query.offset(page * yield_per).limit(yield_per))
+        rows = _get_rows(results=results, stream_type=stream_type).all()
+        if not rows:
+            break
+        yield rows
+        page += 1
+
+
+async def _stream_keyset(
+    query: Select,
+    yield_per: int,
+    session: AsyncSession,
+    stream_type: StreamType,
+    keys: Sequence[ColumnElement[Any]],
+):
+    key_count = len(keys)
+    keyset_query = query.add_columns(*keys).order_by(*keys).limit(yield_per)
+    last_key = None
+    while True:
+        page_query = keyset_query
+        if last_key is not None:
+            page_query = page_query.where(tuple_(*keys) > tuple_(*last_key))
+        results = await session.execute(page_query)
+        rows = results.all()
+        if not rows:
+            break
+        last_key = tuple(rows[-1][-key_count:])
+        if stream_type == StreamType.SCALARS:
+            yield [row[0] for row in rows]
+        else:
+            yield [row[:-key_count] for row in rows]
+        if len(rows) < yield_per:
+            break
+
+
+async def _stream_cursor(
+    query: Select, yield_per: int, session: AsyncSession, stream_type: StreamType
+):
+    results = await session.stream(query.execution_options(yield_per=yield_per))
+    try:
+        rows = _get_rows(results=results, stream_type=stream_type)
+        async for partition in rows.partitions(yield_per):
+            yield partition
+    finally:
+        await results.close()
+
+
 @overload
 async def stream(
     query: Select[Tuple[T]],
     yield_per: int,
     session: AsyncSession,
     stream_type: Literal[StreamType.SCALARS],
+    mode: StreamMode = ...,
+    keys: Sequence[ColumnElement[Any]] | None = ...,
 ) -> AsyncGenerator[Sequence[T], None]: ...
 
 
@@ -50,35 +247,68 @@ async def stream(
     yield_per: int,
     session: AsyncSession,
     stream_type: StreamType,
+    mode: StreamMode = StreamMode.AUTO,
+    keys: Sequence[ColumnElement[Any]] | None = None,
 ):
-    page = 0
-    while True:
-        results = await session.execute(query.offset(page * yield_per))
-        if stream_type == StreamType.SCALARS:
-            rows = results.scalars().fetchmany(yield_per)
-        if not rows:
-            break
+    mode, keys = _resolve_stream_mode(query=query, mode=mode, keys=keys)
+    if mode == StreamMode.KEYSET:
+        pages = _stream_keyset(
+            query=query,
+            yield_per=yield_per,
+            session=session,
+            stream_type=stream_type,
+            keys=keys,
+        )
+    elif mode == StreamMode.CURSOR:
+        pages = _stream_cursor(
+            query=query,
+            yield_per=yield_per,
+            session=session,
+            stream_type=stream_type,
+        )
+    else:
+        pages = _stream_offset(
+            query=query,
+            yield_per=yield_per,
+            session=session,
+            stream_type=stream_type,
+        )
+    async for rows in pages:
         yield rows
-        page += 1
 
 
 async def stream_scalars(
-    query: Select[Tuple[T]], yield_per: int, session: AsyncSession
+    query: Select[Tuple[T]],
+    yield_per: int,
+    session: AsyncSession,
+    mode: StreamMode = StreamMode.AUTO,
+    keys: Sequence[ColumnElement[Any]] | None = None,
 ):
     async for rows in stream(
         query=query,
         yield_per=yield_per,
         session=session,
         stream_type=StreamType.SCALARS,
+        mode=mode,
+        keys=keys,
     ):
         yield rows
 
 
-async def stream_scalar(query: Select[Tuple[T]], session: AsyncSession):
+async def stream_scalar(
+    query: Select[Tuple[T]],
+    session: AsyncSession,
+    yield_per: int = 100,
+    mode: StreamMode = StreamMode.AUTO,
+    keys: Sequence[ColumnElement[Any]] | None = None,
+):
     async for rows in stream(
         query=query,
-        yield_per=1,
+        yield_per=yield_per,
         session=session,
         stream_type=StreamType.SCALARS,
+        mode=mode,
+        keys=keys,
     ):
-        yield rows[0]
+        for row in rows:
+            yield row
@@ -1,24 +1,266 @@
 import asyncio
+import fcntl
+import json
 import os
+import shutil
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable
 
+from pydantic import BaseModel
 
-async def convert_audio_to_mp3(audio_file: str):
-    root, ext = os.path.splitext(audio_file)
-    if ext == ".mp3":
-        return audio_file
-    output_filename = f"{root}.mp3"
+from dripdrop.logger import logger
+from dripdrop.services import temp_files
+from dripdrop.settings import AudioProfile, settings
+
+SLOTS_DIRECTORY = "transcode_slots"
+SLOT_POLL_INTERVAL = 0.25
+STDERR_TAIL_LINES = 50
+# Codecs that can be written into an mp3 file without re-encoding
+MP3_COMPATIBLE_CODECS = {"mp3"}
+# Containers whose index can sit at the end of the file, which ffmpeg can't
+# seek back to when reading from a pipe
+PIPE_INCOMPATIBLE_FORMATS = {"mov", "mp4", "m4a"}
+AUDIO_PROFILE_ARGS = {
+    AudioProfile.CBR_320: ["-b:a", "320k"],
+    AudioProfile.VBR_V0: ["-q:a", "0"],
+    AudioProfile.VBR_V2: ["-q:a", "2"],
+}
+
+
+class TranscodeProgress(BaseModel):
+    out_time: float
+    speed: str | None
+    finished: bool
+
+
+class AudioStreamInfo(BaseModel):
+    codec_name: str | None
+    format_name: str | None = None
+
+    def can_read_from_pipe(self):
+        if not self.format_name:
+            return False
+        return not PIPE_INCOMPATIBLE_FORMATS.intersection(self.format_name.split(","))
+
+
+ProgressCallback = Callable[[TranscodeProgress], Awaitable[None]]
+
+
+def get_max_concurrency():
+    return settings.ffmpeg_max_concurrency or max((os.cpu_count() or 1) // 2, 1)
+
+
+def _try_lock(path: str):
+    fd = os.open(path, os.O_RDWR | os.O_CREAT)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return fd
+    except BlockingIOError:
+        os.close(fd)
+        return None
+
+
+@asynccontextmanager
+async def transcode_slot():
+    # Slots are lock files so the cap holds across every worker process on the
+    # host, not only within this event loop
+    slots_path = await temp_files.create_new_directory(
+        directory=SLOTS_DIRECTORY, raise_on_exists=False
+    )
+    fd = None
+    while fd is None:
+        for slot in range(get_max_concurrency()):
+            fd = _try_lock(os.path.join(slots_path, f"{slot}.lock"))
+            if fd is not None:
+                break
+        else:
+            await asyncio.sleep(SLOT_POLL_INTERVAL)
+    try:
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+def _build_command(args: list[str], piped=False):
+    command = ["ffmpeg", "-hide_banner", "-nostats", "-y"]
+    if not piped:
+        command.extend(["-nostdin", "-progress", "pipe:1"])
+    command.extend(args)
+    if settings.ffmpeg_nice and shutil.which("nice"):
+        command = ["nice", "-n", str(settings.ffmpeg_nice), *command]
+    return command
+
+
+async def _read_progress(
+    stream: asyncio.StreamReader, on_progress: ProgressCallback | None
+):
+    values: dict[str, str] = {}
+    async for line in stream:
+        key, _, value = line.decode().strip().partition("=")
+        if key != "progress":
+            values[key] = value
+            continue
+        out_time_us = values.get("out_time_us", "")
+        progress = TranscodeProgress(
+            out_time=int(out_time_us) / 1_000_000 if out_time_us.isdigit() else 0.0,
+            speed=values.get("speed"),
+            finished=value == "end",
+        )
+        values.clear()
+        if on_progress:
+            await on_progress(progress)
+
+
+async def _read_stderr_tail(stream: asyncio.StreamReader):
+    tail = deque(maxlen=STDERR_TAIL_LINES)
+    async for line in stream:
+        tail.append(line.decode(errors="replace"))
+    return "".join(tail)
+
+
+async def transcode(args: list[str], on_progress: ProgressCallback | None = None):
+    async with transcode_slot():
+        process = await asyncio.subprocess.create_subprocess_exec(
+            *_build_command(args=args),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            _, error = await asyncio.gather(
+                _read_progress(stream=process.stdout, on_progress=on_progress),
+                _read_stderr_tail(stream=process.stderr),
+            )
+            await process.wait()
+        except BaseException:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            raise
+    if process.returncode != 0:
+        raise Exception(error)
+
+
+async def probe_audio_stream(audio_file: str):
     process = await asyncio.subprocess.create_subprocess_exec(
-        "ffmpeg",
-        "-i",
+        "ffprobe",
+        "-v",
+        "error",
+        "-select_streams",
+        "a:0",
+        "-show_entries",
+        "stream=codec_name:format=format_name",
+        "-of",
+        "json",
         audio_file,
-        "-b:a",
-        "320k",
-        output_filename,
         stdout=asyncio.subprocess.PIPE,
         stderr=asyncio.subprocess.PIPE,
     )
-    error = await process.stderr.read()
-    await process.wait()
+    output, error = await process.communicate()
     if process.returncode != 0:
         raise Exception(error.decode())
+    probe = json.loads(output)
+    streams = probe.get("streams", [])
+    return AudioStreamInfo(
+        codec_name=streams[0].get("codec_name") if streams else None,
+        format_name=probe.get("format", {}).get("format_name"),
+    )
+
+
+def _get_codec_args(stream_info: AudioStreamInfo):
+    if stream_info.codec_name in MP3_COMPATIBLE_CODECS:
+        return ["-map", "0:a:0", "-c:a", "copy"]
+    return [
+        *AUDIO_PROFILE_ARGS[settings.ffmpeg_audio_profile],
+        "-threads",
+        str(settings.ffmpeg_threads),
+    ]
+
+
+async def convert_audio_to_mp3(
+    audio_file: str, on_progress: ProgressCallback | None = None
+):
+    root, ext = os.path.splitext(audio_file)
+    if ext == ".mp3":
+        return audio_file
+    output_filename = f"{root}.mp3"
+    try:
+        stream_info = await probe_audio_stream(audio_file=audio_file)
+    except Exception:
+        logger.warning(f"Failed to probe {audio_file}, transcoding")
+        stream_info = AudioStreamInfo(codec_name=None)
+    codec_args = _get_codec_args(stream_info=stream_info)
+
+    async def log_progress(progress: TranscodeProgress):
+        if progress.finished:
+            logger.info(
+                f"Converted {audio_file} ({stream_info.codec_name}) "
+                f"({progress.out_time:.1f}s of audio)"
+            )
+        if on_progress:
+            await on_progress(progress)
+
+    await transcode(
+        args=["-i", audio_file, *codec_args, output_filename],
+        on_progress=log_progress,
+    )
     return output_filename
+
+
+async def _feed_stdin(
+    process: asyncio.subprocess.Process, source: AsyncIterator[bytes]
+):
+    try:
+        async for chunk in source:
+            process.stdin.write(chunk)
+            await process.stdin.drain()
+    except (BrokenPipeError, ConnectionResetError):
+        # ffmpeg exited early, its return code carries the error
+        pass
+    finally:
+        process.stdin.close()
+
+
+async def convert_stream_to_mp3(
+    source: AsyncIterator[bytes], chunk_size: int, stream_info: AudioStreamInfo
+):
+    # Output goes to a pipe, so ffmpeg can't seek back to write an ID3 or Xing
+    # header. Tags are prepended by the caller.
+    args = [
+        "-i",
+        "pipe:0",
+        "-vn",
+        *_get_codec_args(stream_info=stream_info),
+        "-f",
+        "mp3",
+        "-id3v2_version",
+        "0",
+        "-write_xing",
+        "0",
+        "pipe:1",
+    ]
+    async with transcode_slot():
+        process = await asyncio.subprocess.create_subprocess_exec(
+            *_build_command(args=args, piped=True),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        feeder = asyncio.create_task(_feed_stdin(process=process, source=source))
+        stderr_reader = asyncio.create_task(_read_stderr_tail(stream=process.stderr))
+        try:
+            while chunk := await process.stdout.read(chunk_size):
+                yield chunk
+            await feeder
+            await process.wait()
+        except BaseException:
+            feeder.cancel()
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            raise
+        finally:
+            error = await stderr_reader
+    if process.returncode != 0:
+        raise Exception(error)
@@ -1,11 +1,15 @@
+import hashlib
 import traceback
 from urllib.parse import urljoin
 
+import orjson
 from bs4 import BeautifulSoup
+from httpx import codes
 from pydantic import BaseModel
 
 from dripdrop.logger import logger
-from dripdrop.services import http_client
+from dripdrop.services import google_quota, http_client, redis_client
+from dripdrop.services.google_quota import QuotaPriority
 from dripdrop.settings import settings
 
 
@@ -24,12 +28,82 @@ class YoutubeVideoInfo(BaseModel):
     published: str
 
 
+class YoutubePlaylistItemInfo(BaseModel):
+    video_id: str
+    published: str | None
+
+
 class YoutubeVideoCategoryInfo(BaseModel):
     id: int
     name: str
 
 
 YOUTUBE_API = "https://youtube.googleapis.com"
+VIDEOS_BATCH_SIZE = 50
+RESPONSE_CACHE_KEY = "google_api:response:{key}"
+UPLOAD_PLAYLIST_KEY = "google_api:upload_playlist:{channel_id}"
+# Video batches rarely repeat and later pages shift whenever an item is added,
+# so only first pages of these listings are worth an ETag lookup
+CACHED_PATHS = {
+    "/youtube/v3/channels",
+    "/youtube/v3/playlistItems",
+    "/youtube/v3/subscriptions",
+    "/youtube/v3/videoCategories",
+}
+
+
+def _get_cache_key(path: str, params: dict):
+    if path not in CACHED_PATHS or params.get("pageToken"):
+        return None
+    cache_params = {key: value for key, value in params.items() if key != "key"}
+    digest = hashlib.sha256(
+        orjson.dumps([path, cache_params], option=orjson.OPT_SORT_KEYS)
+    ).hexdigest()
+    return RESPONSE_CACHE_KEY.format(key=digest)
+
+
+async def _get_cached_response(cache_key: str | None):
+    if not cache_key:
+        return {}
+    try:
+        return await redis_client.get_client().hgetall(cache_key)
+    except Exception:
+        logger.exception(traceback.format_exc())
+        return {}
+
+
+async def _set_cached_response(cache_key: str, etag: str, body: bytes):
+    try:
+        async with redis_client.get_client().pipeline() as pipeline:
+            pipeline.hset(cache_key, mapping={"etag": etag, "body": body})
+            pipeline.expire(cache_key, settings.google_api_cache_ttl)
+            await pipeline.execute()
+    except Exception:
+        logger.exception(traceback.format_exc())
+
+
+async def _get(path: str, params: dict, priority: QuotaPriority = QuotaPriority.HIGH):
+    # Unchanged resources are answered with 304 when their ETag is sent back, so
+    # the cached body is reused instead of being downloaded and parsed again
+    cache_key = _get_cache_key(path=path, params=params)
+    cached_response = await _get_cached_response(cache_key=cache_key)
+    headers = {}
+    if cached_response.get(b"etag"):
+        headers["If-None-Match"] = cached_response[b"etag"].decode()
+    await google_quota.acquire(path=path, priority=priority)
+    async with http_client.create_client() as client:
+        response = await client.get(
+            urljoin(YOUTUBE_API, path), params=params, headers=headers
+        )
+    if response.status_code == codes.NOT_MODIFIED and cached_response.get(b"body"):
+        return orjson.loads(cached_response[b"body"])
+    response.raise_for_status()
+    etag = response.headers.get("ETag")
+    if cache_key and etag:
+        await _set_cached_response(
+            cache_key=cache_key, etag=etag, body=response.content
+        )
+    return response.json()
 
 
 async def get_channel_subscriptions(channel_id: str):
@@ -38,35 +112,30 @@ async def get_channel_subscriptions(channel_id: str):
         "channelId": channel_id,
         "key": settings.google_api_key,
     }
-    async with http_client.create_client() as client:
-        while True:
-            response = await client.get(
-                urljoin(YOUTUBE_API, "/youtube/v3/subscriptions"), params=params
-            )
-            response.raise_for_status()
-            json = response.json()
-            channels: list[YoutubeChannelInfo] = []
-            for item in json.get("items", []):
-                snippet = item.get("snippet")
-                resource_id = snippet.get("resourceId")
-                channel_id = resource_id.get("channelId")
-                channel_title = snippet.get("title")
-                thumbnails = snippet.get("thumbnails")
-                channel_thumbnail = thumbnails.get("high", {}).get("url")
-                try:
-                    channels.append(
-                        YoutubeChannelInfo(
-                            id=channel_id,
-                            title=channel_title,
-                            thumbnail=channel_thumbnail,
-                        )
+    while True:
+        json = await _get(path="/youtube/v3/subscriptions", params=params)
+        channels: list[YoutubeChannelInfo] = []
+        for item in json.get("items", []):
+            snippet = item.get("snippet")
+            resource_id = snippet.get("resourceId")
+            channel_id = resource_id.get("channelId")
+            channel_title = snippet.get("title")
+            thumbnails = snippet.get("thumbnails")
+            channel_thumbnail = thumbnails.get("high", {}).get("url")
+            try:
+                channels.append(
+                    YoutubeChannelInfo(
+                        id=channel_id,
+                        title=channel_title,
+                        thumbnail=channel_thumbnail,
                     )
-                except TypeError:
-                    logger.exception(traceback.format_exc())
-            yield channels
-            params["pageToken"] = json.get("nextPageToken")
-            if params.get("pageToken", None) is None:
-                break
+                )
+            except TypeError:
+                logger.exception(traceback.format_exc())
+        yield channels
+        params["pageToken"] = json.get("nextPageToken")
+        if params.get("pageToken", None) is None:
+            break
 
 
 async def get_channel_info(channel_id: str):
@@ -96,87 +165,97 @@ async def get_channel_info(channel_id: str):
             return None
 
 
-async def _get_channel_upload_playlist_id(channel_id: str):
+async def _get_channel_upload_playlist_id(
+    channel_id: str, priority: QuotaPriority = QuotaPriority.HIGH
+):
+    # A channel's uploads playlist never changes, so it is cached without expiry
+    cache_key = UPLOAD_PLAYLIST_KEY.format(channel_id=channel_id)
+    try:
+        uploads_playlist_id = await redis_client.get_client().get(cache_key)
+        if uploads_playlist_id:
+            return uploads_playlist_id.decode()
+    except Exception:
+        logger.exception(traceback.format_exc())
     params = {
         "part": "contentDetails",
         "id": channel_id,
         "key": settings.google_api_key,
     }
-    async with http_client.create_client() as client:
-        response = await client.get(
-            urljoin(YOUTUBE_API, "/youtube/v3/channels"), params=params
-        )
-        response.raise_for_status()
-        json = response.json()
-        uploads_playlist_id = json["items"][0]["contentDetails"]["relatedPlaylists"][
-            "uploads"
-        ]
-        return uploads_playlist_id
+    json = await _get(path="/youtube/v3/channels", params=params, priority=priority)
+    uploads_playlist_id = json["items"][0]["contentDetails"]["relatedPlaylists"][
+        "uploads"
+    ]
+    try:
+        await redis_client.get_client().set(cache_key, uploads_playlist_id)
+    except Exception:
+        logger.exception(traceback.format_exc())
+    return uploads_playlist_id
 
 
-async def _get_channel_upload_playlist_videos(channel_id: str):
-    channel_upload_playlist_id = await _get_channel_upload_playlist_id(channel_id)
+async def get_channel_upload_playlist_items(
+    channel_id: str, priority: QuotaPriority = QuotaPriority.HIGH
+):
+    channel_upload_playlist_id = await _get_channel_upload_playlist_id(
+        channel_id=channel_id, priority=priority
+    )
     params = {
         "part": "contentDetails",
         "playlistId": channel_upload_playlist_id,
-        "maxResults": 50,
+        "maxResults": VIDEOS_BATCH_SIZE,
         "key": settings.google_api_key,
     }
-    async with http_client.create_client() as client:
-        while True:
-            response = await client.get(
-                urljoin(YOUTUBE_API, "/youtube/v3/playlistItems"), params=params
+    while True:
+        json = await _get(
+            path="/youtube/v3/playlistItems", params=params, priority=priority
+        )
+        playlist_items: list[YoutubePlaylistItemInfo] = []
+        for item in json.get("items", []):
+            content_details = item.get("contentDetails")
+            playlist_items.append(
+                YoutubePlaylistItemInfo(
+                    video_id=content_details.get("videoId"),
+                    published=content_details.get("videoPublishedAt"),
+                )
             )
-            response.raise_for_status()
-            json = response.json()
-            video_ids = []
-            for item in json.get("items", []):
-                content_details = item.get("contentDetails")
-                video_id = content_details.get("videoId")
-                video_ids.append(video_id)
-            yield video_ids
-            params["pageToken"] = json.get("nextPageToken")
-            if params.get("pageToken", None) is None:
-                break
-
-
-async def get_channel_latest_videos(channel_id: str):
-    async for video_ids in _get_channel_upload_playlist_videos(channel_id):
-        params = {
-            "part": "snippet",
-            "id": ",".join(video_ids),
-            "key": settings.google_api_key,
-        }
-        async with http_client.create_client() as client:
-            response = await client.get(
-                urljoin(YOUTUBE_API, "/youtube/v3/videos"), params=params
+        yield playlist_items
+        params["pageToken"] = json.get("nextPageToken")
+        if params.get("pageToken", None) is None:
+            break
+
+
+async def get_videos(
+    video_ids: list[str], priority: QuotaPriority = QuotaPriority.HIGH
+):
+    params = {
+        "part": "snippet",
+        "id": ",".join(video_ids),
+        "key": settings.google_api_key,
+    }
+    json = await _get(path="/youtube/v3/videos", params=params, priority=priority)
+    videos: list[YoutubeVideoInfo] = []
+    for item in json.get("items", []):
+        snippet = item.get("snippet")
+        video_id = item.get("id")
+        title = snippet.get("title")
+        category_id = int(snippet.get("categoryId"))
+        description = snippet.get("description")
+        published = snippet.get("publishedAt")
+        thumbnails = snippet.get("thumbnails")
+        video_thumbnail = thumbnails.get("high", {}).get("url")
+        try:
+            videos.append(
+                YoutubeVideoInfo(
+                    id=video_id,
+                    title=title,
+                    thumbnail=video_thumbnail,
+                    category_id=category_id,
+                    description=description,
+                    published=published,
+                )
             )
-            response.raise_for_status()
-            json = response.json()
-            videos: list[YoutubeVideoInfo] = []
-            for item in json.get("items", []):
-                snippet = item.get("snippet")
-                video_id = item.get("id")
-                title = snippet.get("title")
-                category_id = int(snippet.get("categoryId"))
-                description = snippet.get("description")
-                published = snippet.get("publishedAt")
-                thumbnails = snippet.get("thumbnails")
-                video_thumbnail = thumbnails.get("high", {}).get("url")
-                try:
-                    videos.append(
-                        YoutubeVideoInfo(
-                            id=video_id,
-                            title=title,
-                            thumbnail=video_thumbnail,
-                            category_id=category_id,
-                            description=description,
-                            published=published,
-                        )
-                    )
-                except TypeError:
-                    logger.exception(traceback.format_exc())
-            yield videos
+        except TypeError:
+            logger.exception(traceback.format_exc())
+    return videos
 
 
 async def get_video_category(category_id: str):
@@ -185,17 +264,12 @@ async def get_video_category(category_id: str):
         "id": category_id,
         "key": settings.google_api_key,
     }
-    async with http_client.create_client() as client:
-        response = await client.get(
-            urljoin(YOUTUBE_API, "/youtube/v3/videoCategories"), params=params
-        )
-        response.raise_for_status()
-        json = response.json()
-        category = json["items"][0]["snippet"]["title"]
-        try:
-            return YoutubeVideoCategoryInfo(id=category_id, name=category)
-        except TypeError:
-            return None
+    json = await _get(path="/youtube/v3/videoCategories", params=params)
+    category = json["items"][0]["snippet"]["title"]
+    try:
+        return YoutubeVideoCategoryInfo(id=category_id, name=category)
+    except TypeError:
+        return None
 
 
 async def get_video_categories():
@@ -204,27 +278,22 @@ async def get_video_categories():
         "regionCode": "US",
         "key": settings.google_api_key,
     }
-    async with http_client.create_client() as client:
-        while True:
-            response = await client.get(
-                urljoin(YOUTUBE_API, "/youtube/v3/videoCategories"), params=params
-            )
-            response.raise_for_status()
-            json = response.json()
-            categories: list[YoutubeVideoCategoryInfo] = []
-            for item in json.get("items", []):
-                category_id = int(item.get("id"))
-                category_name = item.get("snippet").get("title")
-                try:
-                    categories.append(
-                        YoutubeVideoCategoryInfo(id=category_id, name=category_name)
-                    )
-                except TypeError:
-                    logger.exception(traceback.format_exc())
-            yield categories
-            params["pageToken"] = json.get("nextPageToken")
-            if params.get("pageToken", None) is None:
-                break
+    while True:
+        json = await _get(path="/youtube/v3/videoCategories", params=params)
+        categories: list[YoutubeVideoCategoryInfo] = []
+        for item in json.get("items", []):
+            category_id = int(item.get("id"))
+            category_name = item.get("snippet").get("title")
+            try:
+                categories.append(
+                    YoutubeVideoCategoryInfo(id=category_id, name=category_name)
+                )
+            except TypeError:
+                logger.exception(traceback.format_exc())
+        yield categories
+        params["pageToken"] = json.get("nextPageToken")
+        if params.get("pageToken", None) is None:
+            break
 
 
 async def get_video_uploader(video_id: str):
@@ -0,0 +1,148 @@
+import asyncio
+import traceback
+from datetime import datetime, timedelta
+from enum import Enum
+from zoneinfo import ZoneInfo
+
+from pydantic import BaseModel
+
+from dripdrop.logger import logger
+from dripdrop.services import redis_client
+from dripdrop.settings import settings
+
+# The daily quota resets at midnight Pacific time
+QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+LEDGER_KEY = "google_api:quota:{date}"
+BUCKET_KEY = "google_api:bucket"
+DEFAULT_COST = 1
+ENDPOINT_COSTS = {
+    "/youtube/v3/channels": 1,
+    "/youtube/v3/playlistItems": 1,
+    "/youtube/v3/subscriptions": 1,
+    "/youtube/v3/videoCategories": 1,
+    "/youtube/v3/videos": 1,
+}
+
+SPEND_SCRIPT = """
+local used = tonumber(redis.call("GET", KEYS[1]) or "0")
+local cost = tonumber(ARGV[1])
+if used + cost > tonumber(ARGV[2]) then
+    return 0
+end
+redis.call("INCRBY", KEYS[1], cost)
+redis.call("EXPIRE", KEYS[1], ARGV[3])
+return 1
+"""
+
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local time = redis.call("TIME")
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "updated")
+local tokens = tonumber(bucket[1]) or burst
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(now - updated, 0) * rate)
+local wait = 0
+if tokens < cost then
+    wait = (cost - tokens) / rate
+else
+    tokens = tokens - cost
+end
+redis.call("HSET", KEYS[1], "tokens", tokens, "updated", now)
+redis.call("EXPIRE", KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+class QuotaPriority(Enum):
+    HIGH = "high"
+    LOW = "low"
+
+
+class QuotaExceededError(Exception):
+    pass
+
+
+class QuotaDeferredError(Exception):
+    pass
+
+
+class QuotaStatus(BaseModel):
+    limit: int
+    used: int
+    remaining: int
+    low_priority_reserve: int
+    resets_at: datetime
+
+
+def _get_quota_day():
+    return datetime.now(tz=QUOTA_TIMEZONE).date()
+
+
+def _get_ledger_key():
+    return LEDGER_KEY.format(date=_get_quota_day().isoformat())
+
+
+async def _spend(cost: int, limit: int):
+    client = redis_client.get_client()
+    spend = client.register_script(SPEND_SCRIPT)
+    # Ledger keys outlive their day so the previous total is still visible
+    ttl = int(timedelta(days=2).total_seconds())
+    return bool(await spend(keys=[_get_ledger_key()], args=[cost, limit, ttl]))
+
+
+async def _wait_for_tokens(cost: int):
+    client = redis_client.get_client()
+    take = client.register_script(TOKEN_BUCKET_SCRIPT)
+    while True:
+        wait = float(
+            await take(
+                keys=[BUCKET_KEY],
+                args=[
+                    settings.google_api_rate_limit,
+                    settings.google_api_burst,
+                    cost,
+                ],
+            )
+        )
+        if wait <= 0:
+            return
+        await asyncio.sleep(wait)
+
+
+async def acquire(path: str, priority: QuotaPriority = QuotaPriority.HIGH):
+    cost = ENDPOINT_COSTS.get(path, DEFAULT_COST)
+    limit = settings.google_api_daily_quota
+    if priority == QuotaPriority.LOW:
+        limit -= settings.google_api_low_priority_reserve
+    try:
+        spent = await _spend(cost=cost, limit=limit)
+    except Exception:
+        logger.exception(traceback.format_exc())
+        return
+    if not spent:
+        if priority == QuotaPriority.LOW:
+            raise QuotaDeferredError(f"Deferred {path}, quota reserve reached")
+        raise QuotaExceededError(f"Daily quota exhausted, rejected {path}")
+    try:
+        await _wait_for_tokens(cost=cost)
+    except Exception:
+        logger.exception(traceback.format_exc())
+
+
+async def get_status():
+    used = await redis_client.get_client().get(_get_ledger_key())
+    used = int(used or 0)
+    limit = settings.google_api_daily_quota
+    tomorrow = _get_quota_day() + timedelta(days=1)
+    return QuotaStatus(
+        limit=limit,
+        used=used,
+        remaining=max(limit - used, 0),
+        low_priority_reserve=settings.google_api_low_priority_reserve,
+        resets_at=datetime(
+            tomorrow.year, tomorrow.month, tomorrow.day, tzinfo=QUOTA_TIMEZONE
+        ),
+    )
@@ -1,22 +1,183 @@
+import asyncio
+import importlib.util
+import os
+import weakref
+from collections import defaultdict
 from contextlib import asynccontextmanager
 
 from fake_useragent import UserAgent
-from httpx import AsyncClient, AsyncHTTPTransport
+from httpx import (
+    AsyncBaseTransport,
+    AsyncByteStream,
+    AsyncClient,
+    AsyncHTTPTransport,
+    Limits,
+    PoolTimeout,
+    Request,
+    Response,
+    TransportError,
+    codes,
+)
+
+from dripdrop.settings import settings
 
 user_agent = UserAgent()
 
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
 
-@asynccontextmanager
-async def create_client():
-    transport = AsyncHTTPTransport(retries=3)
-    client = AsyncClient(
+
+class _ReleasingStream(AsyncByteStream):
+    def __init__(self, stream: AsyncByteStream, semaphore: asyncio.Semaphore):
+        self._stream = stream
+        self._semaphore = semaphore
+        self._released = False
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._released:
+                self._released = True
+                self._semaphore.release()
+
+
+class HostLimitedTransport(AsyncBaseTransport):
+    def __init__(self, transport: AsyncBaseTransport, max_connections_per_host: int):
+        self._transport = transport
+        self._semaphores: defaultdict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(max_connections_per_host)
+        )
+
+    async def handle_async_request(self, request: Request) -> Response:
+        semaphore = self._semaphores[request.url.host]
+        # Waiting on a busy host counts against the pool timeout like waiting
+        # on the connection pool itself
+        timeout = request.extensions.get("timeout", {}).get("pool")
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=timeout)
+        except TimeoutError as e:
+            raise PoolTimeout(
+                f"Timed out waiting for a connection to {request.url.host}",
+                request=request,
+            ) from e
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            semaphore.release()
+            raise
+        response.stream = _ReleasingStream(stream=response.stream, semaphore=semaphore)
+        return response
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncClient] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _build_client():
+    http2 = settings.http_client_http2 and HTTP2_AVAILABLE
+    limits = Limits(
+        max_connections=settings.http_client_max_connections,
+        max_keepalive_connections=settings.http_client_max_keepalive_connections,
+        keepalive_expiry=settings.http_client_keepalive_expiry,
+    )
+    transport = HostLimitedTransport(
+        transport=AsyncHTTPTransport(retries=3, http2=http2, limits=limits),
+        max_connections_per_host=settings.http_client_max_connections_per_host,
+    )
+    return AsyncClient(
         follow_redirects=True,
         headers={"User-Agent": user_agent.random},
         transport=transport,
     )
-    try:
-        yield client
-    except Exception as e:
-        raise e
-    finally:
+
+
+def get_client():
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = _build_client()
+        _clients[loop] = client
+    return client
+
+
+async def start():
+    get_client()
+
+
+async def close():
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client:
         await client.aclose()
+
+
+@asynccontextmanager
+async def create_client():
+    yield get_client()
+
+
+async def download_file(
+    url: str,
+    path: str,
+    chunk_size: int | None = None,
+    max_size: int | None = None,
+    resume_attempts: int | None = None,
+):
+    chunk_size = chunk_size or settings.download_chunk_size
+    max_size = max_size or settings.download_max_size
+    if resume_attempts is None:
+        resume_attempts = settings.download_resume_attempts
+    client = get_client()
+    attempt = 0
+    while True:
+        offset = os.path.getsize(path) if attempt and os.path.exists(path) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        try:
+            async with client.stream("GET", url, headers=headers) as response:
+                if (
+                    offset
+                    and response.status_code == codes.REQUESTED_RANGE_NOT_SATISFIABLE
+                ):
+                    return offset
+                response.raise_for_status()
+                if offset and response.status_code != codes.PARTIAL_CONTENT:
+                    offset = 0
+                content_length = response.headers.get("Content-Length")
+                if content_length and offset + int(content_length) > max_size:
+                    raise Exception(f"File exceeds max download size ({max_size})")
+                size = offset
+                with open(path, "ab" if offset else "wb") as f:
+                    async for chunk in response.aiter_bytes(chunk_size=chunk_size):
+                        size += len(chunk)
+                        if size > max_size:
+                            raise Exception(
+                                f"File exceeds max download size ({max_size})"
+                            )
+                        await asyncio.to_thread(f.write, chunk)
+                return size
+        except TransportError:
+            if attempt >= resume_attempts:
+                raise
+            attempt += 1
+
+
+async def stream_download(
+    url: str, chunk_size: int | None = None, max_size: int | None = None
+):
+    chunk_size = chunk_size or settings.download_chunk_size
+    max_size = max_size or settings.download_max_size
+    async with get_client().stream("GET", url) as response:
+        response.raise_for_status()
+        size = 0
+        async for chunk in response.aiter_bytes(chunk_size=chunk_size):
+            size += len(chunk)
+            if size > max_size:
+                raise Exception(f"File exceeds max download size ({max_size})")
+            yield chunk
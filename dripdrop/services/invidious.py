@@ -21,7 +21,7 @@ async def get_youtube_video_info(video_id: str):
         return response.json()
 
 
-async def download_audio_from_youtube_video(video_id: str, download_path: str):
+async def get_audio_url(video_id: str):
     video_info = await get_youtube_video_info(video_id)
     adaptive_formats = video_info.get("adaptiveFormats", [])
     audio_formats = [
@@ -32,11 +32,12 @@ async def download_audio_from_youtube_video(video_id: str, download_path: str):
     if not audio_formats:
         raise Exception("No audio formats found")
     best_format = sorted(audio_formats, key=lambda x: x["bitrate"], reverse=True)[0]
-    audio_url = best_format["url"]
-    with open(download_path, "wb") as f:
-        async with http_client.create_client() as client:
-            response = await client.get(audio_url)
-            f.write(response.content)
+    return best_format["url"]
+
+
+async def download_audio_from_youtube_video(video_id: str, download_path: str):
+    audio_url = await get_audio_url(video_id=video_id)
+    await http_client.download_file(url=audio_url, path=download_path)
 
 
 async def get_youtube_channel_videos(channel_id: str, continuation_token: str = None):
@@ -1,9 +1,15 @@
+import asyncio
+import weakref
 from contextlib import asynccontextmanager
 
 from redis.asyncio.client import Redis
 
 from dripdrop.settings import settings
 
+_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Redis] = (
+    weakref.WeakKeyDictionary()
+)
+
 
 @asynccontextmanager
 async def create_client():
@@ -15,3 +21,19 @@ async def create_client():
     finally:
         await client.aclose()
         await client.connection_pool.disconnect()
+
+
+def get_client():
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = Redis.from_url(settings.redis_url)
+        _clients[loop] = client
+    return client
+
+
+async def close():
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client:
+        await client.aclose()
+        await client.connection_pool.disconnect()
@@ -1,6 +1,9 @@
 import asyncio
 import functools
+import threading
+from concurrent.futures import Future
 from inspect import signature
+from typing import Coroutine
 
 from redis import Redis
 from rq import Callback, Queue, get_current_job
@@ -9,7 +12,7 @@ from rq.exceptions import NoSuchJobError
 from rq.job import Job, JobStatus
 
 from dripdrop.logger import logger
-from dripdrop.services import database
+from dripdrop.services import database, http_client, redis_client
 from dripdrop.settings import ENV, settings
 
 connection = Redis.from_url(settings.redis_url)
@@ -27,26 +30,100 @@ def report_job_time(job: Job, *_):
         )
 
 
+class EventLoopRunner:
+    def __init__(self):
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._current: Future | None = None
+
+    @property
+    def running(self):
+        return self._loop is not None and self._loop.is_running()
+
+    def start(self):
+        if self.running:
+            return
+        loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run_loop():
+            asyncio.set_event_loop(loop)
+            loop.call_soon(started.set)
+            loop.run_forever()
+
+        self._loop = loop
+        self._thread = threading.Thread(
+            target=run_loop, name="worker-event-loop", daemon=True
+        )
+        self._thread.start()
+        started.wait()
+
+    def run(self, coroutine: Coroutine):
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        self._current = future
+        try:
+            return future.result()
+        except BaseException:
+            # Job timeouts are raised in the calling thread, so the coroutine
+            # has to be cancelled explicitly
+            future.cancel()
+            raise
+        finally:
+            self._current = None
+
+    def cancel(self):
+        future = self._current
+        if future:
+            future.cancel()
+
+    def close(self):
+        if not self.running:
+            return
+
+        async def close_resources():
+            await http_client.close()
+            await redis_client.close()
+            await database.engine.dispose()
+
+        asyncio.run_coroutine_threadsafe(close_resources(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+        self._thread = None
+
+
+event_loop = EventLoopRunner()
+
+
 def worker_task(function):
+    parameters = signature(function).parameters
+    is_coroutine = asyncio.iscoroutinefunction(function)
+    takes_job = "job" in parameters
+    takes_session = "session" in parameters
+
+    async def _call(args, kwargs):
+        if takes_session and "session" not in kwargs:
+            async with database.create_session() as session:
+                return await function(*args, **kwargs, session=session)
+        return await function(*args, **kwargs)
+
+    async def _run_once(args, kwargs):
+        try:
+            return await _call(args, kwargs)
+        finally:
+            await http_client.close()
+            await redis_client.close()
+
     @functools.wraps(function)
     def wrapper(*args, **kwargs):
-        async def _async_task_runner():
-            func_signature = signature(function)
-            parameters = func_signature.parameters
-            if "session" in parameters and "session" not in kwargs:
-                async with database.create_session() as session:
-                    kwargs["session"] = session
-                    return await function(*args, **kwargs)
-
-        func_signature = signature(function)
-        parameters = func_signature.parameters
-        if "job" in parameters:
+        if takes_job:
             kwargs["job"] = get_current_job(connection=connection)
-
-        if asyncio.iscoroutinefunction(function):
-            return asyncio.run(_async_task_runner())
-        else:
+        if not is_coroutine:
             return function(*args, **kwargs)
+        if event_loop.running:
+            return event_loop.run(_call(args, kwargs))
+        return asyncio.run(_run_once(args, kwargs))
 
     return wrapper
 
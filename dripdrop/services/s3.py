@@ -1,7 +1,11 @@
 import asyncio
+import time
+from typing import AsyncIterator
 
 import boto3
+from pydantic import BaseModel
 
+from dripdrop.logger import logger
 from dripdrop.settings import settings
 
 AWS_ENDPOINT_URL = settings.aws_endpoint_url
@@ -41,6 +45,176 @@ async def upload_file(
     )
 
 
+class UploadStats(BaseModel):
+    filename: str
+    size: int
+    parts: int
+    seconds: float
+
+    @property
+    def throughput(self):
+        return self.size / self.seconds if self.seconds else 0.0
+
+
+async def _read_file(path: str, chunk_size: int):
+    with open(path, "rb") as f:
+        while chunk := await asyncio.to_thread(f.read, chunk_size):
+            yield chunk
+
+
+async def _iter_parts(buffer: bytearray, stream: AsyncIterator[bytes], part_size: int):
+    async for chunk in stream:
+        buffer.extend(chunk)
+        while len(buffer) >= part_size:
+            yield bytes(buffer[:part_size])
+            del buffer[:part_size]
+    if buffer:
+        yield bytes(buffer)
+
+
+async def _upload_multipart(
+    filename: str,
+    parts: AsyncIterator[bytes],
+    content_type: str,
+    acl: str,
+):
+    multipart_upload = await asyncio.to_thread(
+        _client.create_multipart_upload,
+        Bucket=BUCKET,
+        Key=filename,
+        ACL=acl,
+        ContentType=content_type,
+    )
+    upload_id = multipart_upload["UploadId"]
+    # Bounds the number of parts held in memory, not only the uploads in flight
+    semaphore = asyncio.Semaphore(settings.s3_multipart_concurrency)
+
+    async def upload_part(part_number: int, body: bytes):
+        try:
+            response = await asyncio.to_thread(
+                _client.upload_part,
+                Bucket=BUCKET,
+                Key=filename,
+                PartNumber=part_number,
+                UploadId=upload_id,
+                Body=body,
+            )
+            return {"ETag": response["ETag"], "PartNumber": part_number}
+        finally:
+            semaphore.release()
+
+    tasks: list[asyncio.Task] = []
+    try:
+        async for part in parts:
+            await semaphore.acquire()
+            tasks.append(
+                asyncio.create_task(upload_part(part_number=len(tasks) + 1, body=part))
+            )
+        completed_parts = await asyncio.gather(*tasks)
+        await asyncio.to_thread(
+            _client.complete_multipart_upload,
+            Bucket=BUCKET,
+            Key=filename,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": completed_parts},
+        )
+        return len(completed_parts)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.to_thread(
+            _client.abort_multipart_upload,
+            Bucket=BUCKET,
+            Key=filename,
+            UploadId=upload_id,
+        )
+        raise
+
+
+async def upload_stream(
+    filename: str,
+    stream: AsyncIterator[bytes],
+    content_type: str,
+    acl="public-read",
+):
+    start = time.perf_counter()
+    buffer = bytearray()
+    size = 0
+    stream = aiter(stream)
+    async for chunk in stream:
+        buffer.extend(chunk)
+        size += len(chunk)
+        if len(buffer) >= settings.s3_multipart_threshold:
+            break
+    parts = 1
+    if len(buffer) < settings.s3_multipart_threshold:
+        await upload_file(
+            filename=filename, body=bytes(buffer), content_type=content_type, acl=acl
+        )
+    else:
+
+        async def counted_stream():
+            nonlocal size
+            async for chunk in stream:
+                size += len(chunk)
+                yield chunk
+
+        parts = await _upload_multipart(
+            filename=filename,
+            parts=_iter_parts(
+                buffer=buffer,
+                stream=counted_stream(),
+                part_size=settings.s3_multipart_part_size,
+            ),
+            content_type=content_type,
+            acl=acl,
+        )
+    stats = UploadStats(
+        filename=filename,
+        size=size,
+        parts=parts,
+        seconds=time.perf_counter() - start,
+    )
+    logger.info(
+        f"Uploaded {filename} ({stats.size} bytes, {stats.parts} parts) in "
+        f"{stats.seconds:.2f} seconds ({stats.throughput / 1024 / 1024:.2f} MB/s)"
+    )
+    return stats
+
+
+async def upload_path(
+    filename: str,
+    path: str,
+    content_type: str,
+    acl="public-read",
+):
+    return await upload_stream(
+        filename=filename,
+        stream=_read_file(path=path, chunk_size=settings.s3_multipart_part_size),
+        content_type=content_type,
+        acl=acl,
+    )
+
+
+async def generate_presigned_url(
+    filename: str,
+    content_disposition: str | None = None,
+    content_type: str | None = None,
+):
+    params = {"Bucket": BUCKET, "Key": filename}
+    if content_disposition:
+        params["ResponseContentDisposition"] = content_disposition
+    if content_type:
+        params["ResponseContentType"] = content_type
+    return await asyncio.to_thread(
+        _client.generate_presigned_url,
+        "get_object",
+        Params=params,
+        ExpiresIn=settings.s3_presigned_url_expiry,
+    )
+
+
 async def delete_file(filename: str):
     return await asyncio.to_thread(_client.delete_object, Bucket=BUCKET, Key=filename)
 
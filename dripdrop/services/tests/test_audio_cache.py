@@ -0,0 +1,80 @@
+import os
+import socket
+from unittest.mock import patch
+
+from dripdrop.base.test import BaseTest
+from dripdrop.services import audio_cache, temp_files
+from dripdrop.settings import settings
+
+CONTENT = b"audio" * 1024
+
+
+class AudioCacheTestCase(BaseTest):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.directory = await temp_files.create_new_directory(
+            directory="audio_cache_test", raise_on_exists=False
+        )
+        self.path = os.path.join(self.directory, "audio.mp3")
+        with open(self.path, "wb") as f:
+            f.write(CONTENT)
+        self.destination = os.path.join(self.directory, "destination.mp3")
+
+    async def get_cache_path(self, key: str):
+        directory = await temp_files.create_new_directory(
+            directory=audio_cache.CACHE_DIRECTORY, raise_on_exists=False
+        )
+        return audio_cache._get_cache_path(directory=directory, key=key)
+
+    async def test_get_after_put(self):
+        await audio_cache.put(key="key", path=self.path)
+
+        destination = await audio_cache.get(key="key", destination=self.destination)
+
+        self.assertEqual(destination, self.destination)
+        with open(destination, "rb") as f:
+            self.assertEqual(f.read(), CONTENT)
+        self.assertTrue(await audio_cache.contains(key="key"))
+        status = await audio_cache.get_status()
+        self.assertEqual(status.hits, 1)
+        self.assertEqual(status.misses, 0)
+        self.assertEqual(status.stores, 1)
+        self.assertEqual(status.size, len(CONTENT))
+
+    async def test_get_missing_key(self):
+        destination = await audio_cache.get(key="key", destination=self.destination)
+
+        self.assertIsNone(destination)
+        self.assertFalse(os.path.exists(self.destination))
+        self.assertFalse(await audio_cache.contains(key="key"))
+        status = await audio_cache.get_status()
+        self.assertEqual(status.hits, 0)
+        self.assertEqual(status.misses, 1)
+
+    async def test_put_evicts_least_recently_used(self):
+        with patch.object(settings, "audio_cache_max_size", len(CONTENT) * 2):
+            for mtime, key in enumerate(["first", "second"]):
+                await audio_cache.put(key=key, path=self.path)
+                os.utime(await self.get_cache_path(key=key), (mtime, mtime))
+            await audio_cache.get(key="first", destination=self.destination)
+            await audio_cache.put(key="third", path=self.path)
+
+        self.assertTrue(await audio_cache.contains(key="first"))
+        self.assertFalse(await audio_cache.contains(key="second"))
+        self.assertTrue(await audio_cache.contains(key="third"))
+        status = await audio_cache.get_status()
+        self.assertEqual(status.evictions, 1)
+        self.assertEqual(status.evicted_bytes, len(CONTENT))
+        self.assertEqual(status.size, len(CONTENT) * 2)
+
+    async def test_status_keeps_size_per_host(self):
+        await audio_cache.put(key="key", path=self.path)
+        with patch.object(socket, "gethostname", return_value="other"):
+            await audio_cache._record(size=10)
+
+        status = await audio_cache.get_status()
+
+        self.assertEqual(
+            status.host_sizes, {socket.gethostname(): len(CONTENT), "other": 10}
+        )
+        self.assertEqual(status.size, len(CONTENT) + 10)
@@ -0,0 +1,71 @@
+import os
+from unittest.mock import patch
+
+import mutagen.id3
+
+from dripdrop.base.test import BaseTest
+from dripdrop.services import temp_files
+from dripdrop.services.audio_tag import AudioTags
+
+
+class AudioTagsTestCase(BaseTest):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        directory = await temp_files.create_new_directory(
+            directory="audio_tags", raise_on_exists=False
+        )
+        self.path = os.path.join(directory, "audio.mp3")
+        mutagen.id3.ID3().save(self.path)
+        patcher = patch.object(
+            AudioTags, "save", autospec=True, side_effect=AudioTags.save
+        )
+        self.mock_save = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_batch_saves_once(self):
+        audio_tags = AudioTags(file_path=self.path)
+
+        with audio_tags.batch():
+            audio_tags.title = "title"
+            audio_tags.artist = "artist"
+            audio_tags.album = "album"
+            audio_tags.grouping = "grouping"
+            audio_tags.set_artwork(data=b"artwork", mime_type="image/png")
+
+        self.assertEqual(self.mock_save.call_count, 1)
+        audio_tags = AudioTags.read_tags(file_path=self.path)
+        self.assertEqual(audio_tags.title, "title")
+        self.assertEqual(audio_tags.artist, "artist")
+        self.assertEqual(audio_tags.album, "album")
+        self.assertEqual(audio_tags.grouping, "grouping")
+        self.assertEqual(audio_tags.artwork.data, b"artwork")
+
+    def test_nested_batch_saves_once(self):
+        audio_tags = AudioTags(file_path=self.path)
+
+        with audio_tags.batch():
+            audio_tags.title = "title"
+            with audio_tags.batch():
+                audio_tags.artist = "artist"
+            self.mock_save.assert_not_called()
+
+        self.assertEqual(self.mock_save.call_count, 1)
+
+    def test_setters_save_outside_batch(self):
+        audio_tags = AudioTags(file_path=self.path)
+
+        audio_tags.title = "title"
+        audio_tags.artist = "artist"
+
+        self.assertEqual(self.mock_save.call_count, 2)
+
+    def test_batch_does_not_save_on_error(self):
+        audio_tags = AudioTags(file_path=self.path)
+
+        with self.assertRaises(ValueError):
+            with audio_tags.batch():
+                audio_tags.title = "title"
+                raise ValueError()
+
+        self.mock_save.assert_not_called()
+        self.assertIsNone(AudioTags.read_tags(file_path=self.path).title)
@@ -0,0 +1,163 @@
+from unittest.mock import patch
+
+from sqlalchemy import select
+
+from dripdrop.authentication.models import User
+from dripdrop.services import database
+from dripdrop.services.database import StreamMode, StreamType
+from dripdrop.youtube.models import YoutubeVideo
+from dripdrop.youtube.tests.test_base import YoutubeBaseTest
+
+
+class DatabaseStreamTestCase(YoutubeBaseTest):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.category = await self.create_youtube_video_category(id=1, name="category")
+        for channel_id in ["channel_1", "channel_2", "channel_3"]:
+            await self.create_youtube_channel(
+                id=channel_id, title=channel_id, thumbnail="thumbnail"
+            )
+
+    async def create_videos(self, videos: dict[str, str]):
+        for video_id, channel_id in videos.items():
+            await self.create_youtube_video(
+                id=video_id,
+                title=video_id,
+                thumbnail="thumbnail",
+                channel_id=channel_id,
+                category_id=self.category.id,
+            )
+
+    async def get_pages(self, query, yield_per: int, **kwargs):
+        return [
+            rows
+            async for rows in database.stream(
+                query=query,
+                yield_per=yield_per,
+                session=self.session,
+                stream_type=StreamType.SCALARS,
+                **kwargs,
+            )
+        ]
+
+    async def test_stream_keyset_orders_by_primary_key(self):
+        for email in ["c@gmail.com", "a@gmail.com", "e@gmail.com", "b@gmail.com"]:
+            await self.create_user(email=email, password="password")
+        await self.create_user(email="d@gmail.com", password="password")
+
+        with patch(
+            "dripdrop.services.database._stream_keyset",
+            wraps=database._stream_keyset,
+        ) as mock_stream_keyset:
+            pages = await self.get_pages(query=select(User), yield_per=2)
+
+        mock_stream_keyset.assert_called_once()
+        self.assertEqual(
+            [[user.email for user in page] for page in pages],
+            [
+                ["a@gmail.com", "b@gmail.com"],
+                ["c@gmail.com", "d@gmail.com"],
+                ["e@gmail.com"],
+            ],
+        )
+
+    async def test_stream_keyset_with_full_last_page(self):
+        for email in ["a@gmail.com", "b@gmail.com", "c@gmail.com", "d@gmail.com"]:
+            await self.create_user(email=email, password="password")
+
+        pages = await self.get_pages(query=select(User.email), yield_per=2)
+
+        self.assertEqual(
+            pages, [["a@gmail.com", "b@gmail.com"], ["c@gmail.com", "d@gmail.com"]]
+        )
+
+    async def test_stream_keyset_with_equal_keys_across_pages(self):
+        await self.create_videos(
+            videos={
+                "1": "channel_2",
+                "2": "channel_1",
+                "3": "channel_2",
+                "4": "channel_1",
+                "5": "channel_2",
+            }
+        )
+
+        pages = await self.get_pages(
+            query=select(YoutubeVideo),
+            yield_per=2,
+            mode=StreamMode.KEYSET,
+            keys=[YoutubeVideo.channel_id, YoutubeVideo.id],
+        )
+
+        self.assertEqual(
+            [[(video.channel_id, video.id) for video in page] for page in pages],
+            [
+                [("channel_1", "2"), ("channel_1", "4")],
+                [("channel_2", "1"), ("channel_2", "3")],
+                [("channel_2", "5")],
+            ],
+        )
+
+    async def test_stream_keyset_with_distinct_duplicate_keys(self):
+        await self.create_videos(
+            videos={
+                "1": "channel_3",
+                "2": "channel_1",
+                "3": "channel_2",
+                "4": "channel_1",
+                "5": "channel_3",
+            }
+        )
+
+        with patch(
+            "dripdrop.services.database._stream_keyset",
+            wraps=database._stream_keyset,
+        ) as mock_stream_keyset:
+            pages = await self.get_pages(
+                query=select(YoutubeVideo.channel_id).distinct(), yield_per=2
+            )
+
+        mock_stream_keyset.assert_called_once()
+        self.assertEqual(pages, [["channel_1", "channel_2"], ["channel_3"]])
+
+    async def test_stream_cursor_keeps_query_order(self):
+        for email in ["b@gmail.com", "a@gmail.com", "c@gmail.com"]:
+            await self.create_user(email=email, password="password")
+
+        with patch(
+            "dripdrop.services.database._stream_cursor",
+            wraps=database._stream_cursor,
+        ) as mock_stream_cursor:
+            pages = await self.get_pages(
+                query=select(User.email).order_by(User.email.desc()), yield_per=2
+            )
+
+        mock_stream_cursor.assert_called_once()
+        self.assertEqual(pages, [["c@gmail.com", "b@gmail.com"], ["a@gmail.com"]])
+
+    async def test_stream_auto_uses_cursor_for_non_unique_column(self):
+        await self.create_videos(
+            videos={"1": "channel_1", "2": "channel_1", "3": "channel_2"}
+        )
+
+        with patch(
+            "dripdrop.services.database._stream_cursor",
+            wraps=database._stream_cursor,
+        ) as mock_stream_cursor:
+            pages = await self.get_pages(
+                query=select(YoutubeVideo.channel_id), yield_per=2
+            )
+
+        mock_stream_cursor.assert_called_once()
+        self.assertEqual(
+            sorted(channel_id for page in pages for channel_id in page),
+            ["channel_1", "channel_1", "channel_2"],
+        )
+
+    async def test_stream_keyset_without_keys(self):
+        with self.assertRaises(ValueError):
+            await self.get_pages(
+                query=select(YoutubeVideo.channel_id),
+                yield_per=2,
+                mode=StreamMode.KEYSET,
+            )
@@ -0,0 +1,163 @@
+import asyncio
+import os
+from unittest.mock import patch
+
+from dripdrop.base.test import BaseTest
+from dripdrop.music.tests.test_base import MusicBaseTest
+from dripdrop.services import ffmpeg, temp_files
+from dripdrop.settings import settings
+
+
+class FfmpegTestCase(MusicBaseTest):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.directory = await temp_files.create_new_directory(
+            directory="ffmpeg", raise_on_exists=False
+        )
+        self.audio_path = os.path.join(self.directory, "source.audio")
+        with open(self.audio_path, "wb") as f:
+            f.write(MusicBaseTest.test_audio_file)
+
+    async def test_convert_audio_to_mp3_remuxes_mp3_source(self):
+        with patch(
+            "dripdrop.services.ffmpeg.transcode", wraps=ffmpeg.transcode
+        ) as mock_transcode:
+            output = await ffmpeg.convert_audio_to_mp3(audio_file=self.audio_path)
+
+        args = mock_transcode.call_args.kwargs["args"]
+        self.assertEqual(args[args.index("-c:a") + 1], "copy")
+        stream_info = await ffmpeg.probe_audio_stream(audio_file=output)
+        self.assertEqual(stream_info.codec_name, "mp3")
+
+    async def test_convert_audio_to_mp3_transcodes_other_codecs(self):
+        wav_path = os.path.join(self.directory, "source.wav")
+        await ffmpeg.transcode(args=["-i", self.audio_path, wav_path])
+
+        with patch(
+            "dripdrop.services.ffmpeg.transcode", wraps=ffmpeg.transcode
+        ) as mock_transcode:
+            output = await ffmpeg.convert_audio_to_mp3(audio_file=wav_path)
+
+        args = mock_transcode.call_args.kwargs["args"]
+        self.assertNotIn("copy", args)
+        profile_args = ffmpeg.AUDIO_PROFILE_ARGS[settings.ffmpeg_audio_profile]
+        self.assertEqual(args[2 : 2 + len(profile_args)], profile_args)
+        stream_info = await ffmpeg.probe_audio_stream(audio_file=output)
+        self.assertEqual(stream_info.codec_name, "mp3")
+
+    async def test_convert_stream_to_mp3_remuxes_mp3_source(self):
+        stream_info = await ffmpeg.probe_audio_stream(audio_file=self.audio_path)
+
+        async def source():
+            yield MusicBaseTest.test_audio_file
+
+        with patch(
+            "dripdrop.services.ffmpeg._build_command", wraps=ffmpeg._build_command
+        ) as mock_build_command:
+            chunks = [
+                chunk
+                async for chunk in ffmpeg.convert_stream_to_mp3(
+                    source=source(), chunk_size=65536, stream_info=stream_info
+                )
+            ]
+
+        args = mock_build_command.call_args.kwargs["args"]
+        self.assertEqual(args[args.index("-c:a") + 1], "copy")
+        output_path = os.path.join(self.directory, "stream.mp3")
+        with open(output_path, "wb") as f:
+            f.write(b"".join(chunks))
+        stream_info = await ffmpeg.probe_audio_stream(audio_file=output_path)
+        self.assertEqual(stream_info.codec_name, "mp3")
+
+    def test_audio_stream_info_can_read_from_pipe(self):
+        self.assertTrue(
+            ffmpeg.AudioStreamInfo(
+                codec_name="mp3", format_name="mp3"
+            ).can_read_from_pipe()
+        )
+        self.assertTrue(
+            ffmpeg.AudioStreamInfo(
+                codec_name="opus", format_name="matroska,webm"
+            ).can_read_from_pipe()
+        )
+        self.assertFalse(
+            ffmpeg.AudioStreamInfo(
+                codec_name="aac", format_name="mov,mp4,m4a,3gp,3g2,mj2"
+            ).can_read_from_pipe()
+        )
+        self.assertFalse(ffmpeg.AudioStreamInfo(codec_name=None).can_read_from_pipe())
+
+    async def test_transcode_reports_progress(self):
+        progress: list[ffmpeg.TranscodeProgress] = []
+
+        async def on_progress(value: ffmpeg.TranscodeProgress):
+            progress.append(value)
+
+        await ffmpeg.convert_audio_to_mp3(
+            audio_file=self.audio_path, on_progress=on_progress
+        )
+
+        self.assertTrue(progress)
+        self.assertTrue(progress[-1].finished)
+        self.assertGreater(progress[-1].out_time, 0)
+
+
+class TranscodeTestCase(BaseTest):
+    async def test_transcode_slot_limits_concurrency(self):
+        active = 0
+        max_active = 0
+
+        async def run_in_slot():
+            nonlocal active, max_active
+            async with ffmpeg.transcode_slot():
+                active += 1
+                max_active = max(max_active, active)
+                await asyncio.sleep(0.05)
+                active -= 1
+
+        with (
+            patch.object(settings, "ffmpeg_max_concurrency", 2),
+            patch.object(ffmpeg, "SLOT_POLL_INTERVAL", 0.01),
+        ):
+            await asyncio.gather(*[run_in_slot() for _ in range(5)])
+
+        self.assertEqual(max_active, 2)
+
+    async def test_transcode_slot_released_on_error(self):
+        with patch.object(settings, "ffmpeg_max_concurrency", 1):
+            with self.assertRaises(ValueError):
+                async with ffmpeg.transcode_slot():
+                    raise ValueError()
+            async with asyncio.timeout(1):
+                async with ffmpeg.transcode_slot():
+                    pass
+
+    async def test_read_progress(self):
+        stream = asyncio.StreamReader()
+        stream.feed_data(
+            b"out_time_us=1500000\n"
+            b"speed=2.0x\n"
+            b"progress=continue\n"
+            b"out_time_us=N/A\n"
+            b"speed=N/A\n"
+            b"progress=continue\n"
+            b"out_time_us=3000000\n"
+            b"speed=2.1x\n"
+            b"progress=end\n"
+        )
+        stream.feed_eof()
+        progress: list[ffmpeg.TranscodeProgress] = []
+
+        async def on_progress(value: ffmpeg.TranscodeProgress):
+            progress.append(value)
+
+        await ffmpeg._read_progress(stream=stream, on_progress=on_progress)
+
+        self.assertEqual(
+            progress,
+            [
+                ffmpeg.TranscodeProgress(out_time=1.5, speed="2.0x", finished=False),
+                ffmpeg.TranscodeProgress(out_time=0.0, speed="N/A", finished=False),
+                ffmpeg.TranscodeProgress(out_time=3.0, speed="2.1x", finished=True),
+            ],
+        )
@@ -0,0 +1,160 @@
+from unittest.mock import AsyncMock, patch
+
+from httpx import Request, Response
+
+from dripdrop.base.test import BaseTest
+from dripdrop.services import google_api
+
+VIDEO_CATEGORIES = {"items": [{"id": "1", "snippet": {"title": "category"}}]}
+
+
+@patch("dripdrop.services.google_quota.acquire", new_callable=AsyncMock)
+class GoogleApiTestCase(BaseTest):
+    def mock_client(self, handler):
+        self.requests = self.mock_http_client(handler)
+
+    async def test_get_replays_cached_body_when_not_modified(
+        self, mock_acquire: AsyncMock
+    ):
+        def handler(request: Request):
+            if request.headers.get("If-None-Match") == '"etag"':
+                return Response(304)
+            return Response(200, json=VIDEO_CATEGORIES, headers={"ETag": '"etag"'})
+
+        self.mock_client(handler)
+
+        first = await google_api._get(
+            path="/youtube/v3/videoCategories", params={"key": "1"}
+        )
+        second = await google_api._get(
+            path="/youtube/v3/videoCategories", params={"key": "2"}
+        )
+
+        self.assertEqual(first, VIDEO_CATEGORIES)
+        self.assertEqual(second, VIDEO_CATEGORIES)
+        self.assertEqual(
+            [request.headers.get("If-None-Match") for request in self.requests],
+            [None, '"etag"'],
+        )
+        self.assertEqual(mock_acquire.call_count, 2)
+
+    async def test_get_without_etag(self, mock_acquire: AsyncMock):
+        self.mock_client(lambda request: Response(200, json=VIDEO_CATEGORIES))
+
+        for _ in range(2):
+            await google_api._get(path="/youtube/v3/videoCategories", params={})
+
+        self.assertEqual(
+            [request.headers.get("If-None-Match") for request in self.requests],
+            [None, None],
+        )
+
+    async def test_get_with_changed_params(self, mock_acquire: AsyncMock):
+        self.mock_client(
+            lambda request: Response(
+                200, json=VIDEO_CATEGORIES, headers={"ETag": '"etag"'}
+            )
+        )
+
+        await google_api._get(path="/youtube/v3/videoCategories", params={"id": "1"})
+        await google_api._get(path="/youtube/v3/videoCategories", params={"id": "2"})
+
+        self.assertEqual(
+            [request.headers.get("If-None-Match") for request in self.requests],
+            [None, None],
+        )
+
+    async def test_get_channel_upload_playlist_items_caches_playlist_id(
+        self, mock_acquire: AsyncMock
+    ):
+        def handler(request: Request):
+            if request.url.path == "/youtube/v3/channels":
+                return Response(
+                    200,
+                    json={
+                        "items": [
+                            {
+                                "contentDetails": {
+                                    "relatedPlaylists": {"uploads": "uploads_id"}
+                                }
+                            }
+                        ]
+                    },
+                )
+            self.assertEqual(request.url.params["playlistId"], "uploads_id")
+            return Response(
+                200,
+                json={
+                    "items": [
+                        {
+                            "contentDetails": {
+                                "videoId": "video_id",
+                                "videoPublishedAt": "2024-01-01T00:00:00Z",
+                            }
+                        }
+                    ]
+                },
+            )
+
+        self.mock_client(handler)
+
+        for _ in range(2):
+            pages = [
+                page
+                async for page in google_api.get_channel_upload_playlist_items(
+                    channel_id="channel_id"
+                )
+            ]
+            self.assertEqual(
+                pages,
+                [
+                    [
+                        google_api.YoutubePlaylistItemInfo(
+                            video_id="video_id", published="2024-01-01T00:00:00Z"
+                        )
+                    ]
+                ],
+            )
+
+        self.assertEqual(
+            [request.url.path for request in self.requests],
+            [
+                "/youtube/v3/channels",
+                "/youtube/v3/playlistItems",
+                "/youtube/v3/playlistItems",
+            ],
+        )
+
+    async def test_get_skips_cache_for_later_pages(self, mock_acquire: AsyncMock):
+        self.mock_client(
+            lambda request: Response(
+                200, json=VIDEO_CATEGORIES, headers={"ETag": '"etag"'}
+            )
+        )
+
+        for _ in range(2):
+            await google_api._get(
+                path="/youtube/v3/videoCategories", params={"pageToken": "page"}
+            )
+
+        self.assertEqual(
+            [request.headers.get("If-None-Match") for request in self.requests],
+            [None, None],
+        )
+        self.assertEqual(await self.redis.keys("google_api:response:*"), [])
+
+    async def test_get_skips_cache_for_videos(self, mock_acquire: AsyncMock):
+        self.mock_client(
+            lambda request: Response(
+                200, json={"items": []}, headers={"ETag": '"etag"'}
+            )
+        )
+
+        for _ in range(2):
+            await google_api._get(path="/youtube/v3/videos", params={"id": "1,2"})
+
+        self.assertEqual(
+            [request.headers.get("If-None-Match") for request in self.requests],
+            [None, None],
+        )
+        self.assertEqual(await self.redis.keys("google_api:response:*"), [])
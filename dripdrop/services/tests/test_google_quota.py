@@ -0,0 +1,96 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+from redis.exceptions import ConnectionError
+
+from dripdrop.base.test import BaseTest
+from dripdrop.services import google_quota, redis_client
+from dripdrop.services.google_quota import (
+    QuotaDeferredError,
+    QuotaExceededError,
+    QuotaPriority,
+)
+from dripdrop.settings import settings
+
+
+class GoogleQuotaTestCase(BaseTest):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        for patcher in [
+            patch.object(settings, "google_api_daily_quota", 100),
+            patch.object(settings, "google_api_low_priority_reserve", 30),
+            patch.object(settings, "google_api_rate_limit", 1000.0),
+            patch.object(settings, "google_api_burst", 1000),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def get_used(self):
+        return (await google_quota.get_status()).used
+
+    async def set_used(self, used: int):
+        await redis_client.get_client().set(google_quota._get_ledger_key(), used)
+
+    async def test_acquire_spends_endpoint_cost(self):
+        with patch.dict(google_quota.ENDPOINT_COSTS, {"/youtube/v3/search": 5}):
+            for path, cost in google_quota.ENDPOINT_COSTS.items():
+                used = await self.get_used()
+                await google_quota.acquire(path=path)
+                self.assertEqual(await self.get_used(), used + cost)
+
+        await google_quota.acquire(path="/youtube/v3/unknown")
+
+        self.assertEqual(
+            await self.get_used(),
+            sum(google_quota.ENDPOINT_COSTS.values()) + 5 + google_quota.DEFAULT_COST,
+        )
+
+    async def test_acquire_low_priority_deferred_at_reserve(self):
+        await self.set_used(70)
+
+        with self.assertRaises(QuotaDeferredError):
+            await google_quota.acquire(
+                path="/youtube/v3/videos", priority=QuotaPriority.LOW
+            )
+        self.assertEqual(await self.get_used(), 70)
+
+        await google_quota.acquire(
+            path="/youtube/v3/videos", priority=QuotaPriority.HIGH
+        )
+        self.assertEqual(await self.get_used(), 71)
+
+    async def test_acquire_exceeding_daily_quota(self):
+        await self.set_used(100)
+
+        with self.assertRaises(QuotaExceededError):
+            await google_quota.acquire(path="/youtube/v3/videos")
+
+        self.assertEqual(await self.get_used(), 100)
+        status = await google_quota.get_status()
+        self.assertEqual(status.remaining, 0)
+
+    async def test_acquire_waits_for_tokens(self):
+        sleep = AsyncMock(wraps=asyncio.sleep)
+
+        with (
+            patch.object(settings, "google_api_rate_limit", 100.0),
+            patch.object(settings, "google_api_burst", 1),
+            patch.object(google_quota.asyncio, "sleep", sleep),
+        ):
+            await google_quota.acquire(path="/youtube/v3/videos")
+            sleep.assert_not_called()
+            await google_quota.acquire(path="/youtube/v3/videos")
+
+        sleep.assert_called()
+        wait = sleep.call_args_list[0].args[0]
+        self.assertGreater(wait, 0)
+        self.assertLessEqual(wait, 0.01)
+
+    async def test_acquire_fails_open_on_redis_error(self):
+        with patch.object(
+            redis_client, "get_client", side_effect=ConnectionError("Redis is down")
+        ):
+            await google_quota.acquire(
+                path="/youtube/v3/videos", priority=QuotaPriority.LOW
+            )
+            await google_quota.acquire(path="/youtube/v3/videos")
@@ -0,0 +1,166 @@
+import os
+
+from httpx import (
+    AsyncByteStream,
+    AsyncClient,
+    MockTransport,
+    PoolTimeout,
+    ReadError,
+    Request,
+    Response,
+    Timeout,
+)
+
+from dripdrop.base.test import BaseTest
+from dripdrop.services import http_client, temp_files
+
+CONTENT = bytes(range(256)) * 64
+
+
+class InterruptedStream(AsyncByteStream):
+    def __init__(self, content: bytes):
+        self._content = content
+
+    async def __aiter__(self):
+        yield self._content
+        raise ReadError("Connection reset")
+
+
+class ChunkedStream(AsyncByteStream):
+    def __init__(self, content: bytes, chunk_size: int):
+        self._content = content
+        self._chunk_size = chunk_size
+
+    async def __aiter__(self):
+        for i in range(0, len(self._content), self._chunk_size):
+            yield self._content[i : i + self._chunk_size]
+
+
+class DownloadFileTestCase(BaseTest):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        directory = await temp_files.create_new_directory(
+            directory="downloads", raise_on_exists=False
+        )
+        self.path = os.path.join(directory, "file")
+
+    def mock_client(self, handler):
+        self.requests = self.mock_http_client(handler)
+
+    def get_range_headers(self):
+        return [request.headers.get("Range") for request in self.requests]
+
+    def read_file(self):
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    async def test_download_file_resumes_partial_download(self):
+        half = len(CONTENT) // 2
+
+        def handler(request: Request):
+            range_header = request.headers.get("Range")
+            if not range_header:
+                return Response(200, stream=InterruptedStream(CONTENT[:half]))
+            offset = int(range_header.removeprefix("bytes=").removesuffix("-"))
+            return Response(206, content=CONTENT[offset:])
+
+        self.mock_client(handler)
+
+        size = await http_client.download_file(
+            url="http://test/file", path=self.path, chunk_size=1024, resume_attempts=1
+        )
+
+        self.assertEqual(size, len(CONTENT))
+        self.assertEqual(self.read_file(), CONTENT)
+        self.assertEqual(self.get_range_headers(), [None, f"bytes={half}-"])
+
+    async def test_download_file_restarts_when_range_is_ignored(self):
+        def handler(request: Request):
+            if not request.headers.get("Range"):
+                return Response(200, stream=InterruptedStream(CONTENT[:1024]))
+            return Response(200, content=CONTENT)
+
+        self.mock_client(handler)
+
+        size = await http_client.download_file(
+            url="http://test/file", path=self.path, chunk_size=1024, resume_attempts=1
+        )
+
+        self.assertEqual(size, len(CONTENT))
+        self.assertEqual(self.read_file(), CONTENT)
+
+    async def test_download_file_without_resume_attempts_left(self):
+        self.mock_client(
+            lambda request: Response(200, stream=InterruptedStream(CONTENT[:1024]))
+        )
+
+        with self.assertRaises(ReadError):
+            await http_client.download_file(
+                url="http://test/file",
+                path=self.path,
+                chunk_size=1024,
+                resume_attempts=2,
+            )
+
+        self.assertEqual(self.get_range_headers(), [None, "bytes=1024-", "bytes=1024-"])
+
+    async def test_download_file_exceeding_max_size_by_content_length(self):
+        self.mock_client(lambda request: Response(200, content=CONTENT))
+
+        with self.assertRaisesRegex(Exception, "max download size"):
+            await http_client.download_file(
+                url="http://test/file", path=self.path, max_size=len(CONTENT) - 1
+            )
+
+        self.assertFalse(os.path.exists(self.path))
+
+    async def test_download_file_exceeding_max_size_while_streaming(self):
+        self.mock_client(
+            lambda request: Response(
+                200, stream=ChunkedStream(content=CONTENT, chunk_size=1024)
+            )
+        )
+
+        with self.assertRaisesRegex(Exception, "max download size"):
+            await http_client.download_file(
+                url="http://test/file",
+                path=self.path,
+                chunk_size=1024,
+                max_size=4096,
+            )
+
+        self.assertEqual(self.read_file(), CONTENT[:4096])
+
+
+class HostLimitedTransportTestCase(BaseTest):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        transport = http_client.HostLimitedTransport(
+            transport=MockTransport(
+                lambda request: Response(
+                    200, stream=ChunkedStream(content=CONTENT, chunk_size=1024)
+                )
+            ),
+            max_connections_per_host=1,
+        )
+        self.client = AsyncClient(transport=transport)
+        self.addAsyncCleanup(self.client.aclose)
+
+    async def test_request_times_out_waiting_for_host(self):
+        async with self.client.stream("GET", "http://test/file"):
+            with self.assertRaises(PoolTimeout):
+                await self.client.get(
+                    "http://test/file", timeout=Timeout(None, pool=0.01)
+                )
+            response = await self.client.get("http://other/file")
+            self.assertEqual(response.status_code, 200)
+
+    async def test_request_waits_for_released_host(self):
+        async with self.client.stream("GET", "http://test/file"):
+            pass
+
+        response = await self.client.get(
+            "http://test/file", timeout=Timeout(None, pool=0.01)
+        )
+
+        self.assertEqual(response.content, CONTENT)
@@ -0,0 +1,56 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from dripdrop.base.test import BaseTest
+from dripdrop.services import rq_client
+
+
+@rq_client.worker_task
+async def get_running_loop():
+    return asyncio.get_running_loop()
+
+
+@rq_client.worker_task
+async def fail():
+    raise ValueError("Job failed")
+
+
+class EventLoopRunnerTestCase(BaseTest):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.runner = rq_client.EventLoopRunner()
+        self.runner.start()
+        self.addAsyncCleanup(self.close_runner)
+        patcher = patch.object(rq_client, "event_loop", self.runner)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def close_runner(self):
+        # The test's own database, http and redis clients belong to the test
+        # loop, so the runner must not close them
+        with (
+            patch.object(rq_client, "database", MagicMock()) as mock_database,
+            patch.object(rq_client, "http_client", AsyncMock()),
+            patch.object(rq_client, "redis_client", AsyncMock()),
+        ):
+            mock_database.engine.dispose = AsyncMock()
+            await asyncio.to_thread(self.runner.close)
+        self.assertFalse(self.runner.running)
+
+    async def test_jobs_share_event_loop(self):
+        first_loop = await asyncio.to_thread(get_running_loop)
+        second_loop = await asyncio.to_thread(get_running_loop)
+
+        self.assertIs(first_loop, second_loop)
+        self.assertIsNot(first_loop, asyncio.get_running_loop())
+        self.assertTrue(first_loop.is_running())
+
+    async def test_event_loop_survives_failed_job(self):
+        first_loop = await asyncio.to_thread(get_running_loop)
+
+        with self.assertRaises(ValueError):
+            await asyncio.to_thread(fail)
+
+        self.assertTrue(self.runner.running)
+        second_loop = await asyncio.to_thread(get_running_loop)
+        self.assertIs(first_loop, second_loop)
@@ -0,0 +1,88 @@
+import time
+from unittest.mock import MagicMock, patch
+
+from dripdrop.base.test import BaseTest
+from dripdrop.services import s3
+
+
+async def create_parts(count: int):
+    for i in range(count):
+        yield f"part {i + 1}".encode()
+
+
+@patch("dripdrop.services.s3._client")
+class UploadMultipartTestCase(BaseTest):
+    def mock_upload_part(self, mock_client: MagicMock, failed_part: int | None = None):
+        def upload_part(PartNumber: int, **kwargs):
+            # Later parts finish first so completion order differs from part order
+            time.sleep(0.01 * (4 - PartNumber))
+            if PartNumber == failed_part:
+                raise Exception("Part upload failed")
+            return {"ETag": f"etag-{PartNumber}"}
+
+        mock_client.create_multipart_upload.return_value = {"UploadId": "upload_id"}
+        mock_client.upload_part.side_effect = upload_part
+
+    async def test_upload_multipart_completes_parts_in_order(
+        self, mock_client: MagicMock
+    ):
+        self.mock_upload_part(mock_client)
+
+        parts = await s3._upload_multipart(
+            filename="file",
+            parts=create_parts(count=3),
+            content_type="audio/mpeg",
+            acl="public-read",
+        )
+
+        self.assertEqual(parts, 3)
+        mock_client.complete_multipart_upload.assert_called_once()
+        self.assertEqual(
+            mock_client.complete_multipart_upload.call_args.kwargs["MultipartUpload"],
+            {
+                "Parts": [
+                    {"ETag": "etag-1", "PartNumber": 1},
+                    {"ETag": "etag-2", "PartNumber": 2},
+                    {"ETag": "etag-3", "PartNumber": 3},
+                ]
+            },
+        )
+        mock_client.abort_multipart_upload.assert_not_called()
+
+    async def test_upload_multipart_aborts_on_part_failure(
+        self, mock_client: MagicMock
+    ):
+        self.mock_upload_part(mock_client, failed_part=2)
+
+        with self.assertRaisesRegex(Exception, "Part upload failed"):
+            await s3._upload_multipart(
+                filename="file",
+                parts=create_parts(count=3),
+                content_type="audio/mpeg",
+                acl="public-read",
+            )
+
+        mock_client.complete_multipart_upload.assert_not_called()
+        mock_client.abort_multipart_upload.assert_called_once_with(
+            Bucket=s3.BUCKET, Key="file", UploadId="upload_id"
+        )
+
+    async def test_upload_multipart_aborts_on_stream_failure(
+        self, mock_client: MagicMock
+    ):
+        self.mock_upload_part(mock_client)
+
+        async def failing_parts():
+            yield b"part 1"
+            raise Exception("Stream failed")
+
+        with self.assertRaisesRegex(Exception, "Stream failed"):
+            await s3._upload_multipart(
+                filename="file",
+                parts=failing_parts(),
+                content_type="audio/mpeg",
+                acl="public-read",
+            )
+
+        mock_client.complete_multipart_upload.assert_not_called()
+        mock_client.abort_multipart_upload.assert_called_once()
@@ -1,6 +1,6 @@
 import asyncio
 import traceback
-from asyncio import Task
+from asyncio import Queue, Task
 from enum import Enum
 from typing import Coroutine, Literal
 
@@ -11,6 +11,7 @@ from websockets.exceptions import ConnectionClosedError, ConnectionClosedOK
 from dripdrop.base.responses import ResponseBaseModel
 from dripdrop.logger import logger
 from dripdrop.services import redis_client
+from dripdrop.settings import settings
 
 
 class PingResponse(ResponseBaseModel):
@@ -22,7 +23,71 @@ class RedisChannels(Enum):
     YOUTUBE_CHANNEL_UPDATE = "YOUTUBE_CHANNEL_UPDATE"
 
 
-WEBSOCKET_LISTEN = "websocket:listen"
+class BroadcastHub:
+    def __init__(self):
+        self.running = False
+        self._listeners: dict[RedisChannels, set[Queue]] = {}
+        self._readers: dict[RedisChannels, Task] = {}
+
+    async def start(self):
+        self.running = True
+
+    async def close(self):
+        self.running = False
+        for queues in self._listeners.values():
+            for queue in queues:
+                try:
+                    queue.put_nowait(None)
+                except asyncio.QueueFull:
+                    pass
+        self._listeners.clear()
+        readers = list(self._readers.values())
+        self._readers.clear()
+        for reader in readers:
+            reader.cancel()
+        await asyncio.gather(*readers, return_exceptions=True)
+
+    def register(self, channel: RedisChannels):
+        queue = Queue(maxsize=settings.websocket_queue_size)
+        self._listeners.setdefault(channel, set()).add(queue)
+        reader = self._readers.get(channel)
+        if not reader or reader.done():
+            self._readers[channel] = asyncio.create_task(self._read(channel=channel))
+        return queue
+
+    def unregister(self, channel: RedisChannels, queue: Queue):
+        queues = self._listeners.get(channel)
+        if queues:
+            queues.discard(queue)
+
+    def _dispatch(self, channel: RedisChannels, message: dict):
+        for queue in self._listeners.get(channel, set()):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                logger.warning(f"Dropped {channel.value} message for slow websocket")
+
+    async def _read(self, channel: RedisChannels):
+        while True:
+            try:
+                async with redis_client.create_client() as client:
+                    async with client.pubsub() as pubsub:
+                        await pubsub.subscribe(channel.value)
+                        async for message in pubsub.listen():
+                            if message.get("type") != "message":
+                                continue
+                            self._dispatch(
+                                channel=channel,
+                                message=orjson.loads(message.get("data")),
+                            )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception(traceback.format_exc())
+                await asyncio.sleep(1)
+
+
+hub = BroadcastHub()
 
 
 class WebsocketChannel:
@@ -31,32 +96,23 @@ class WebsocketChannel:
 
     @classmethod
     async def start(cls):
-        async with redis_client.create_client() as client:
-            await client.set(WEBSOCKET_LISTEN, "1")
+        await hub.start()
 
     @classmethod
     async def close(cls):
-        async with redis_client.create_client() as client:
-            await client.delete(WEBSOCKET_LISTEN)
+        await hub.close()
 
     async def publish(self, message: ResponseBaseModel):
         async with redis_client.create_client() as redis:
             await redis.publish(self.channel.value, orjson.dumps(message.model_dump()))
 
     async def listen(self, websocket: WebSocket, handler: Coroutine):
-        task: Task = None
+        queue: Queue | None = None
         try:
             await websocket.accept()
-            task = asyncio.create_task(self._subscribe(handler=handler))
-            async with redis_client.create_client() as client:
-                while await client.get(WEBSOCKET_LISTEN):
-                    await websocket.send_json(PingResponse(status="PING").model_dump())
-                    if task.done():
-                        exception = task.exception()
-                        if exception:
-                            raise exception
-                        break
-                    await asyncio.sleep(1)
+            if hub.running:
+                queue = hub.register(channel=self.channel)
+                await self._listen(websocket=websocket, queue=queue, handler=handler)
             await websocket.close()
         except WebSocketDisconnect:
             await websocket.close()
@@ -67,19 +123,22 @@ class WebsocketChannel:
         except Exception:
             logger.exception(traceback.format_exc())
         finally:
-            if task and not task.done():
-                task.cancel()
-                try:
-                    await task
-                except asyncio.CancelledError:
-                    pass
+            if queue:
+                hub.unregister(channel=self.channel, queue=queue)
 
-    async def _subscribe(self, handler: Coroutine):
-        async with redis_client.create_client() as redis:
-            pubsub = redis.pubsub()
-            await pubsub.subscribe(self.channel.value)
-            while True:
-                message = await pubsub.get_message(ignore_subscribe_messages=True)
-                if message and message.get("type") == "message":
-                    await handler(orjson.loads(message.get("data").decode()))
-                await asyncio.sleep(1)
+    async def _listen(self, websocket: WebSocket, queue: Queue, handler: Coroutine):
+        loop = asyncio.get_running_loop()
+        next_ping = loop.time()
+        while hub.running:
+            if loop.time() >= next_ping:
+                await websocket.send_json(PingResponse(status="PING").model_dump())
+                next_ping = loop.time() + settings.websocket_heartbeat_interval
+            try:
+                message = await asyncio.wait_for(
+                    queue.get(), timeout=max(next_ping - loop.time(), 0)
+                )
+            except asyncio.TimeoutError:
+                continue
+            if message is None:
+                break
+            await handler(message)
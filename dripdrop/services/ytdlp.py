@@ -6,19 +6,16 @@ import yt_dlp
 async def download_audio_from_video(download_path: str, url: str):
     def _download_audio_from_video():
         ydl_opts = {
-            "format": "best",
+            "format": "bestaudio/best",
             "fixup": "never",
-            "postprocessors": [
-                {
-                    "key": "FFmpegExtractAudio",
-                    "preferredcodec": "mp3",
-                    "preferredquality": "0",
-                }
-            ],
-            "outtmpl": download_path,
+            "outtmpl": f"{download_path}.%(ext)s",
         }
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download(url)
+            info = ydl.extract_info(url, download=True)
+            requested_downloads = info.get("requested_downloads")
+            if requested_downloads:
+                return requested_downloads[0]["filepath"]
+            return ydl.prepare_filename(info)
 
     return await asyncio.to_thread(_download_audio_from_video)
 
@@ -10,10 +10,24 @@ class ENV(Enum):
     TESTING = "testing"
 
 
+class AudioProfile(Enum):
+    CBR_320 = "cbr_320"
+    VBR_V0 = "vbr_v0"
+    VBR_V2 = "vbr_v2"
+
+
+class DownloadMode(Enum):
+    ACCEL_REDIRECT = "accel_redirect"
+    PRESIGNED = "presigned"
+    PROXY = "proxy"
+
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(extra="ignore", env_file=".env")
 
     async_database_url: str
+    audio_cache_enabled: bool = True
+    audio_cache_max_size: int = 2 * 1024 * 1024 * 1024
     aws_access_key_id: str
     aws_endpoint_url: str
     aws_region_name: str
@@ -21,11 +35,44 @@ class Settings(BaseSettings):
     aws_s3_artwork_folder: str
     aws_s3_bucket: str
     aws_s3_music_folder: str
+    database_max_overflow: int = 10
+    database_pool_enabled: bool = True
+    database_pool_pre_ping: bool = True
+    database_pool_recycle: int = 1800
+    database_pool_size: int = 5
+    database_pool_timeout: int = 30
     database_url: str
+    download_chunk_size: int = 1024 * 1024
+    download_max_size: int = 500 * 1024 * 1024
+    download_resume_attempts: int = 3
     env: ENV = ENV.DEVELOPMENT
+    ffmpeg_audio_profile: AudioProfile = AudioProfile.CBR_320
+    ffmpeg_max_concurrency: int | None = None
+    ffmpeg_nice: int = 10
+    ffmpeg_threads: int = 2
+    google_api_burst: int = 10
+    google_api_cache_ttl: int = 7 * 24 * 60 * 60
+    google_api_daily_quota: int = 10000
     google_api_key: str
+    google_api_low_priority_reserve: int = 2000
+    google_api_rate_limit: float = 5.0
+    http_client_http2: bool = True
+    http_client_keepalive_expiry: float = 30.0
+    http_client_max_connections: int = 100
+    http_client_max_connections_per_host: int = 10
+    http_client_max_keepalive_connections: int = 20
     invidious_api_url: str
+    music_download_accel_prefix: str = "/s3"
+    music_download_chunk_size: int = 64 * 1024
+    music_download_mode: DownloadMode = DownloadMode.PRESIGNED
+    music_job_streaming: bool = False
+    password_hasher_max_pending: int = 64
+    password_hasher_workers: int = 2
     redis_url: str
+    s3_multipart_concurrency: int = 4
+    s3_multipart_part_size: int = 8 * 1024 * 1024
+    s3_multipart_threshold: int = 8 * 1024 * 1024
+    s3_presigned_url_expiry: int = 300
     secret_key: str
     sendgrid_api_key: str
     test_async_database_url: str
@@ -33,6 +80,17 @@ class Settings(BaseSettings):
     test_redis_url: str
     timeout: int = 600
     timezone: tz | None = tz.utc
+    user_cache_local_ttl: float = 5.0
+    user_cache_size: int = 1024
+    user_cache_ttl: int = 60
+    websocket_heartbeat_interval: float = 1.0
+    websocket_queue_size: int = 100
+    worker_event_loop: bool = True
+    youtube_crawl_batch_size: int = 50
+    youtube_crawl_jitter: float = 0.1
+    youtube_crawl_max_channels: int = 500
+    youtube_crawl_max_interval: int = 24 * 60 * 60
+    youtube_crawl_min_interval: int = 60 * 60
 
 
 settings = Settings()
@@ -43,6 +101,9 @@ if settings.env == ENV.TESTING or settings.env == ENV.DEVELOPMENT:
 
 if settings.env == ENV.TESTING:
     settings.async_database_url = settings.test_async_database_url
+    # Tasks are run with asyncio.run in a separate thread during tests, so
+    # connections can't be shared between event loops
+    settings.database_pool_enabled = False
     # settings.redis_url = settings.test_redis_url
 
 if settings.async_database_url.find("sqlite") != -1:
@@ -1,11 +1,12 @@
 from redis import Redis
-from rq import Connection, Worker
+from rq import Connection, SimpleWorker, Worker
 from rq.job import Job
 from rq.timeouts import JobTimeoutException
 
 import dripdrop.music.tasks  # noqa
 import dripdrop.youtube.tasks  # noqa
 from dripdrop.logger import logger
+from dripdrop.services import rq_client
 from dripdrop.services.rq_client import CustomJob, default, high
 from dripdrop.settings import settings
 
@@ -19,7 +20,22 @@ def timeout_handler(job: Job, exc_type, exc_value, traceback):
     return False
 
 
+class EventLoopWorker(SimpleWorker):
+    # Jobs run in this process on a long-lived event loop, so the database,
+    # http and redis pools are kept between jobs instead of a fork per job
+    def kill_horse(self, sig=None):
+        rq_client.event_loop.cancel()
+
+    def work(self, *args, **kwargs):
+        rq_client.event_loop.start()
+        try:
+            return super().work(*args, **kwargs)
+        finally:
+            rq_client.event_loop.close()
+
+
 if __name__ == "__main__":
     with Connection(connection=Redis.from_url(settings.redis_url)):
-        worker = Worker([high, default], job_class=CustomJob)
+        worker_class = EventLoopWorker if settings.worker_event_loop else Worker
+        worker = worker_class([high, default], job_class=CustomJob)
         worker.work(with_scheduler=True)
@@ -45,7 +45,7 @@ api = APIRouter(
 async def listen_channels(websocket: WebSocket):
     async def handler(msg):
         await websocket.send_json(
-            YoutubeChannelUpdateResponse.model_validate_json(msg).model_dump()
+            YoutubeChannelUpdateResponse.model_validate(msg).model_dump()
         )
 
     await WebsocketChannel(channel=RedisChannels.YOUTUBE_CHANNEL_UPDATE).listen(
@@ -34,6 +34,10 @@ class YoutubeChannel(Base):
     last_videos_updated: Mapped[datetime] = mapped_column(
         TIMESTAMP(timezone=True), nullable=False
     )
+    next_videos_update: Mapped[datetime | None] = mapped_column(
+        TIMESTAMP(timezone=True), nullable=True, index=True
+    )
+    upload_interval: Mapped[float | None] = mapped_column(nullable=True)
     updating: Mapped[bool] = mapped_column(nullable=False, default=False)
     subscriptions: Mapped[list["YoutubeSubscription"]] = relationship(
         "YoutubeSubscription", back_populates="channel"
@@ -76,22 +80,6 @@ class YoutubeSubscription(Base):
     )
 
 
-class YoutubeNewSubscription(Base):
-    __tablename__ = "youtube_new_subscriptions"
-
-    channel_id: Mapped[str] = mapped_column(primary_key=True)
-    email: Mapped[str] = mapped_column(
-        ForeignKey(
-            User.email,
-            onupdate="CASCADE",
-            ondelete="CASCADE",
-            name="youtube_new_subscriptions_email_fkey",
-        ),
-        nullable=False,
-        primary_key=True,
-    )
-
-
 class YoutubeVideoCategory(Base):
     __tablename__ = "youtube_video_categories"
 
@@ -1,42 +1,30 @@
 import asyncio
+import math
+import traceback
 from datetime import datetime, timedelta
 
 import dateutil.parser
 from rq.job import Retry
-from sqlalchemy import and_, delete, false, select
+from sqlalchemy import or_, select, update
 
 from dripdrop.authentication.models import User
+from dripdrop.logger import logger
 from dripdrop.services import database, google_api, rq_client
 from dripdrop.services.database import AsyncSession
+from dripdrop.services.google_quota import QuotaDeferredError, QuotaPriority
 from dripdrop.services.websocket_channel import RedisChannels, WebsocketChannel
 from dripdrop.settings import settings
 from dripdrop.utils import get_current_time
+from dripdrop.youtube import utils
 from dripdrop.youtube.models import (
     YoutubeChannel,
-    YoutubeNewSubscription,
     YoutubeSubscription,
     YoutubeUserChannel,
-    YoutubeVideo,
     YoutubeVideoCategory,
 )
 from dripdrop.youtube.responses import YoutubeChannelUpdateResponse
 
 
-@rq_client.worker_task
-async def delete_subscription(
-    channel_id: str = ..., email: str = ..., session: AsyncSession = ...
-):
-    query = select(YoutubeSubscription).where(
-        YoutubeSubscription.channel_id == channel_id,
-        YoutubeSubscription.email == email,
-    )
-    subscription = await session.scalar(query)
-    if not subscription:
-        raise Exception(f"Subscription ({channel_id}, {email}) not found")
-    subscription.deleted_at = get_current_time()
-    await session.commit()
-
-
 @rq_client.worker_task
 async def update_user_subscriptions(email: str = ..., session: AsyncSession = ...):
     query = select(YoutubeUserChannel).where(YoutubeUserChannel.email == email)
@@ -44,95 +32,91 @@ async def update_user_subscriptions(email: str = ..., session: AsyncSession = ..
     if not user_channel:
         return
 
-    async for subscribed_channels in google_api.get_channel_subscriptions(
+    subscribed_channels: list[google_api.YoutubeChannelInfo] = []
+    async for channels in google_api.get_channel_subscriptions(
         channel_id=user_channel.id
     ):
-        for subscribed_channel in subscribed_channels:
-            query = select(YoutubeChannel).where(
-                YoutubeChannel.id == subscribed_channel.id
-            )
-            channel = await session.scalar(query)
-            if channel:
-                channel.title = subscribed_channel.title
-                channel.thumbnail = subscribed_channel.thumbnail
-            else:
-                channel = YoutubeChannel(
-                    id=subscribed_channel.id,
-                    title=subscribed_channel.title,
-                    thumbnail=subscribed_channel.thumbnail,
-                    last_videos_updated=get_current_time() - timedelta(days=365),
-                )
-                session.add(channel)
-                await session.commit()
-                await asyncio.to_thread(
-                    rq_client.default.enqueue,
-                    add_channel_videos,
-                    channel_id=channel.id,
-                )
-            query = select(YoutubeSubscription).where(
-                YoutubeSubscription.channel_id == channel.id,
-                YoutubeSubscription.email == email,
-            )
-            subscription = await session.scalar(query)
-            if not subscription:
-                session.add(YoutubeSubscription(email=email, channel_id=channel.id))
-            else:
-                if not subscription.user_submitted:
-                    subscription.deleted_at = None
+        subscribed_channels.extend(channels)
 
-            query = select(YoutubeNewSubscription).where(
-                YoutubeNewSubscription.channel_id == subscribed_channel.id,
-                YoutubeNewSubscription.email == email,
-            )
-            new_subscription = await session.scalar(query)
-            if not new_subscription:
-                session.add(
-                    YoutubeNewSubscription(
-                        channel_id=subscribed_channel.id, email=email
-                    )
-                )
-            await session.commit()
-
-    query = (
-        select(YoutubeSubscription.channel_id)
-        .join(
-            YoutubeNewSubscription,
-            and_(
-                YoutubeNewSubscription.channel_id == YoutubeSubscription.channel_id,
-                YoutubeNewSubscription.email == YoutubeSubscription.email,
-            ),
-            isouter=True,
-        )
-        .where(
-            YoutubeSubscription.email == user_channel.email,
-            YoutubeSubscription.deleted_at.is_(None),
-            YoutubeSubscription.user_submitted == false(),
-            YoutubeNewSubscription.channel_id.is_(None),
-        )
+    result = await utils.reconcile_user_subscriptions(
+        session=session, email=email, channels=subscribed_channels
+    )
+    await session.commit()
+    logger.info(
+        "User ({email}) subscriptions: {inserted} inserted, {revived} revived, "
+        "{deleted} deleted".format(email=email, **result.model_dump())
     )
-    async for channel_id in database.stream_scalar(query=query, session=session):
+
+    for channel_id in result.new_channel_ids:
         await asyncio.to_thread(
             rq_client.default.enqueue,
-            delete_subscription,
+            add_channel_videos,
             channel_id=channel_id,
-            email=email,
         )
-    query = delete(YoutubeNewSubscription).where(YoutubeNewSubscription.email == email)
-    await session.execute(query)
-    await session.commit()
+
+
+def _get_date_limit(date_after: str | None):
+    if not date_after:
+        return None
+    return datetime.strptime(date_after, "%Y%m%d").replace(tzinfo=settings.timezone)
+
+
+async def _get_channel_video_ids(
+    session: AsyncSession,
+    channel_id: str,
+    date_limit: datetime | None,
+    priority: QuotaPriority,
+    stop_at_known: bool = True,
+):
+    # Uploads are listed newest first, so paging stops at the first page that
+    # reaches a known video or one older than the date limit. Backfills only
+    # stop at the date limit so known videos are refreshed and gaps are filled
+    async for playlist_items in google_api.get_channel_upload_playlist_items(
+        channel_id=channel_id, priority=priority
+    ):
+        known_video_ids = set()
+        if stop_at_known:
+            known_video_ids = await utils.get_known_video_ids(
+                session=session,
+                channel_id=channel_id,
+                video_ids=[item.video_id for item in playlist_items],
+            )
+        reached_watermark = False
+        new_video_ids = []
+        for item in playlist_items:
+            published = (
+                dateutil.parser.parse(item.published) if item.published else None
+            )
+            if item.video_id in known_video_ids or (
+                date_limit and published and published < date_limit
+            ):
+                reached_watermark = True
+                continue
+            new_video_ids.append(item.video_id)
+        if new_video_ids:
+            yield new_video_ids
+        if reached_watermark:
+            break
+
+
+async def _schedule_channel_update(
+    session: AsyncSession, channel: YoutubeChannel, subscriber_count: int
+):
+    cadence = await utils.get_upload_cadence(session=session, channel_id=channel.id)
+    channel.upload_interval = cadence.interval
+    channel.next_videos_update = utils.get_next_videos_update(
+        cadence=cadence, subscriber_count=subscriber_count
+    )
 
 
 @rq_client.worker_task
 async def add_channel_videos(
     channel_id: str = ...,
     date_after: str | None = None,
+    priority: QuotaPriority = QuotaPriority.HIGH,
     session: AsyncSession = ...,
 ):
-    date_limit = (
-        datetime.strptime(date_after, "%Y%m%d").replace(tzinfo=settings.timezone)
-        if date_after
-        else None
-    )
+    date_limit = _get_date_limit(date_after=date_after)
 
     query = select(YoutubeChannel).where(YoutubeChannel.id == channel_id)
     channel = await session.scalar(query)
@@ -147,76 +131,250 @@ async def add_channel_videos(
         message=YoutubeChannelUpdateResponse(id=channel.id, updating=True)
     )
 
-    async for videos in google_api.get_channel_latest_videos(channel_id=channel_id):
-        end_update = False
-        for video in videos:
-            video_upload_date = dateutil.parser.parse(video.published)
-            if date_limit and video_upload_date < date_limit:
-                end_update = True
-                break
-
-            query = select(YoutubeVideo).where(YoutubeVideo.id == video.id)
-            existing_video = await session.scalar(query)
-
-            if existing_video:
-                existing_video.title = video.title
-                existing_video.thumbnail = video.thumbnail
-                existing_video.description = video.description
-                if (
-                    existing_video.title != video.title
-                    or existing_video.thumbnail != video.thumbnail
-                ):
-                    existing_video.published_at = video_upload_date
-            else:
-                session.add(
-                    YoutubeVideo(
-                        id=video.id,
-                        title=video.title,
-                        thumbnail=video.thumbnail,
-                        channel_id=channel_id,
-                        category_id=video.category_id,
-                        description=video.description,
-                        published_at=video_upload_date,
-                    )
+    upsert_result = utils.VideoUpsertResult()
+    deferred = False
+    try:
+        # Paging stops at the first known video unless backfilling from
+        # date_after, and details are only fetched for the listed ids
+        async for video_ids in _get_channel_video_ids(
+            session=session,
+            channel_id=channel_id,
+            date_limit=date_limit,
+            priority=priority,
+            stop_at_known=not date_after,
+        ):
+            videos = await google_api.get_videos(video_ids=video_ids, priority=priority)
+            upsert_result.add(
+                await utils.upsert_videos(
+                    session=session, channel_id=channel_id, videos=videos
                 )
-        if end_update:
-            break
+            )
+    except QuotaDeferredError:
+        # Left for a later sweep, last_videos_updated is kept so nothing is missed
+        logger.warning(f"Channel ({channel_id}) update deferred, quota is running low")
+        deferred = True
+    logger.info(
+        "Channel ({channel_id}) videos: {inserted} inserted, {updated} updated, "
+        "{unchanged} unchanged".format(
+            channel_id=channel_id, **upsert_result.model_dump()
+        )
+    )
 
     websocket_channel = WebsocketChannel(channel=RedisChannels.YOUTUBE_CHANNEL_UPDATE)
     await websocket_channel.publish(
         message=YoutubeChannelUpdateResponse(id=channel.id, updating=False)
     )
     channel.updating = False
-    channel.last_videos_updated = get_current_time()
+    if not deferred:
+        channel.last_videos_updated = get_current_time()
+        subscriber_counts = await utils.get_subscriber_counts(
+            session=session, channel_ids=[channel.id]
+        )
+        await _schedule_channel_update(
+            session=session,
+            channel=channel,
+            subscriber_count=subscriber_counts.get(channel.id, 0),
+        )
 
     await session.commit()
 
 
+async def _publish_channel_update(channel: YoutubeChannel):
+    websocket_channel = WebsocketChannel(channel=RedisChannels.YOUTUBE_CHANNEL_UPDATE)
+    await websocket_channel.publish(
+        message=YoutubeChannelUpdateResponse(id=channel.id, updating=channel.updating)
+    )
+
+
+@rq_client.worker_task
+async def crawl_channel_videos(
+    channel_ids: list[str] = ...,
+    date_after: str | None = None,
+    priority: QuotaPriority = QuotaPriority.LOW,
+    session: AsyncSession = ...,
+):
+    # New video ids are collected from every channel's uploads playlist first,
+    # then resolved together so one videos request covers up to 50 channels
+    query = (
+        select(YoutubeChannel)
+        .where(YoutubeChannel.id.in_(channel_ids))
+        .order_by(YoutubeChannel.id)
+    )
+    channels = (await session.scalars(query)).all()
+    for channel in channels:
+        channel.updating = True
+    await session.commit()
+    for channel in channels:
+        await _publish_channel_update(channel=channel)
+
+    try:
+        await _crawl_channels(
+            channels=channels, date_after=date_after, priority=priority, session=session
+        )
+    finally:
+        for channel in channels:
+            channel.updating = False
+        await session.commit()
+        for channel in channels:
+            await _publish_channel_update(channel=channel)
+
+
+async def _crawl_channels(
+    channels: list[YoutubeChannel],
+    date_after: str | None,
+    priority: QuotaPriority,
+    session: AsyncSession,
+):
+    # Deferred and failed channels keep last_videos_updated so a later sweep
+    # picks up from the same point
+    video_channel_ids: dict[str, str] = {}
+    deferred_channel_ids: set[str] = set()
+    failed_channel_ids: set[str] = set()
+    for channel in channels:
+        if deferred_channel_ids:
+            deferred_channel_ids.add(channel.id)
+            continue
+        date_limit = _get_date_limit(
+            date_after=date_after
+            or min(
+                get_current_time() - timedelta(days=1), channel.last_videos_updated
+            ).strftime("%Y%m%d")
+        )
+        channel_video_ids: dict[str, str] = {}
+        try:
+            async for video_ids in _get_channel_video_ids(
+                session=session,
+                channel_id=channel.id,
+                date_limit=date_limit,
+                priority=priority,
+                stop_at_known=not date_after,
+            ):
+                channel_video_ids.update(
+                    (video_id, channel.id) for video_id in video_ids
+                )
+        except QuotaDeferredError:
+            logger.warning(
+                f"Channel ({channel.id}) crawl deferred, quota is running low"
+            )
+            deferred_channel_ids.add(channel.id)
+            continue
+        except Exception:
+            logger.exception(traceback.format_exc())
+            failed_channel_ids.add(channel.id)
+            continue
+        video_channel_ids.update(channel_video_ids)
+
+    channel_videos: dict[str, list[google_api.YoutubeVideoInfo]] = {}
+    video_ids = list(video_channel_ids)
+    for i in range(0, len(video_ids), google_api.VIDEOS_BATCH_SIZE):
+        batch = video_ids[i : i + google_api.VIDEOS_BATCH_SIZE]
+        try:
+            videos = await google_api.get_videos(video_ids=batch, priority=priority)
+        except QuotaDeferredError:
+            logger.warning("Video details deferred, quota is running low")
+            deferred_channel_ids.update(
+                video_channel_ids[video_id] for video_id in video_ids[i:]
+            )
+            break
+        except Exception:
+            logger.exception(traceback.format_exc())
+            failed_channel_ids.update(video_channel_ids[video_id] for video_id in batch)
+            continue
+        for video in videos:
+            channel_videos.setdefault(video_channel_ids[video.id], []).append(video)
+
+    upsert_result = utils.VideoUpsertResult()
+    subscriber_counts = await utils.get_subscriber_counts(
+        session=session, channel_ids=[channel.id for channel in channels]
+    )
+    for channel in channels:
+        if channel.id in deferred_channel_ids or channel.id in failed_channel_ids:
+            continue
+        try:
+            async with session.begin_nested():
+                upsert_result.add(
+                    await utils.upsert_videos(
+                        session=session,
+                        channel_id=channel.id,
+                        videos=channel_videos.get(channel.id, []),
+                    )
+                )
+        except Exception:
+            logger.exception(traceback.format_exc())
+            failed_channel_ids.add(channel.id)
+            continue
+        await _schedule_channel_update(
+            session=session,
+            channel=channel,
+            subscriber_count=subscriber_counts.get(channel.id, 0),
+        )
+        channel.last_videos_updated = get_current_time()
+    # Without a backoff the lease would expire and retry these every min interval
+    for channel in channels:
+        if channel.id in deferred_channel_ids or channel.id in failed_channel_ids:
+            channel.next_videos_update = utils.get_retry_videos_update(
+                last_videos_updated=channel.last_videos_updated
+            )
+    logger.info(
+        "Crawled {channels} channels with {requests} video requests: {inserted} "
+        "inserted, {updated} updated, {unchanged} unchanged, {deferred} deferred, "
+        "{failed} failed".format(
+            channels=len(channels),
+            requests=math.ceil(len(video_ids) / google_api.VIDEOS_BATCH_SIZE),
+            deferred=len(deferred_channel_ids),
+            failed=len(failed_channel_ids),
+            **upsert_result.model_dump(),
+        )
+    )
+
+
 @rq_client.worker_task
 async def update_channel_videos(
     date_after: str | None = None, session: AsyncSession = ...
 ):
-    query = (
-        select(YoutubeSubscription.channel_id)
-        .where(YoutubeSubscription.deleted_at.is_(None))
-        .distinct()
+    subscribed_channel_ids = select(YoutubeSubscription.channel_id).where(
+        YoutubeSubscription.deleted_at.is_(None)
+    )
+    query = select(YoutubeChannel.id).where(
+        YoutubeChannel.id.in_(subscribed_channel_ids)
     )
-    async for channel_id in database.stream_scalar(query=query, session=session):
-        query = select(YoutubeChannel).where(YoutubeChannel.id == channel_id)
-        channel = await session.scalar(query)
-        if channel:
-            date_after_time = min(
-                get_current_time() - timedelta(days=1),
-                channel.last_videos_updated,
+    # An explicit date_after is a backfill of every channel, otherwise only
+    # channels that are due are crawled, most overdue first
+    if not date_after:
+        query = (
+            query.where(
+                or_(
+                    YoutubeChannel.next_videos_update.is_(None),
+                    YoutubeChannel.next_videos_update <= get_current_time(),
+                )
             )
-            if date_after:
-                date_after_time = datetime.strptime(date_after, "%Y%m%d")
-            await asyncio.to_thread(
-                rq_client.default.enqueue,
-                add_channel_videos,
-                channel_id=channel_id,
-                date_after=date_after_time.strftime("%Y%m%d"),
+            .order_by(YoutubeChannel.next_videos_update.asc().nulls_first())
+            .limit(settings.youtube_crawl_max_channels)
+        )
+    channel_ids = [
+        channel_id
+        async for channel_id in database.stream_scalar(query=query, session=session)
+    ]
+    if not date_after and channel_ids:
+        # Due channels are leased until their crawl reschedules them, so a
+        # backed up queue doesn't get the same channels enqueued again
+        query = (
+            update(YoutubeChannel)
+            .where(YoutubeChannel.id.in_(channel_ids))
+            .values(
+                next_videos_update=get_current_time()
+                + timedelta(seconds=settings.youtube_crawl_min_interval)
             )
+        )
+        await session.execute(query)
+        await session.commit()
+    for i in range(0, len(channel_ids), settings.youtube_crawl_batch_size):
+        await asyncio.to_thread(
+            rq_client.default.enqueue,
+            crawl_channel_videos,
+            channel_ids=channel_ids[i : i + settings.youtube_crawl_batch_size],
+            date_after=date_after,
+        )
 
 
 def update_channel_videos_cron():
@@ -0,0 +1,247 @@
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+from sqlalchemy import select
+
+from dripdrop.services import google_api
+from dripdrop.services.google_quota import QuotaDeferredError, QuotaPriority
+from dripdrop.settings import settings
+from dripdrop.youtube.models import YoutubeVideo
+from dripdrop.youtube.tasks import add_channel_videos
+from dripdrop.youtube.tests.test_base import YoutubeBaseTest
+
+
+@patch("dripdrop.services.google_api.get_videos")
+@patch("dripdrop.services.google_api.get_channel_upload_playlist_items")
+class TestAddChannelVideos(YoutubeBaseTest):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.channel = await self.create_youtube_channel(
+            id="channel_id", title="channel", thumbnail="thumbnail"
+        )
+        self.category = await self.create_youtube_video_category(id=1, name="category")
+        self.current_time = datetime.now(tz=settings.timezone)
+
+    def mock_channel_uploads(
+        self,
+        mock_get_channel_upload_playlist_items: AsyncMock,
+        mock_get_videos: AsyncMock,
+        pages: list[list[tuple[str, datetime]]],
+        titles: dict[str, str] | None = None,
+        deferred_page: int | None = None,
+    ):
+        self.fetched_pages = 0
+        published = {video_id: date for page in pages for video_id, date in page}
+
+        async def get_channel_upload_playlist_items(
+            channel_id: str, priority: QuotaPriority
+        ):
+            for page in pages:
+                if self.fetched_pages == deferred_page:
+                    raise QuotaDeferredError()
+                self.fetched_pages += 1
+                yield [
+                    google_api.YoutubePlaylistItemInfo(
+                        video_id=video_id, published=date.isoformat()
+                    )
+                    for video_id, date in page
+                ]
+
+        async def get_videos(video_ids: list[str], priority: QuotaPriority):
+            return [
+                google_api.YoutubeVideoInfo(
+                    id=video_id,
+                    title=(titles or {}).get(video_id, video_id),
+                    thumbnail="thumbnail",
+                    category_id=self.category.id,
+                    description="description",
+                    published=published[video_id].isoformat(),
+                )
+                for video_id in video_ids
+            ]
+
+        mock_get_channel_upload_playlist_items.side_effect = (
+            get_channel_upload_playlist_items
+        )
+        mock_get_videos.side_effect = get_videos
+
+    async def get_videos(self):
+        self.session.expire_all()
+        query = select(YoutubeVideo).order_by(YoutubeVideo.id)
+        results = await self.session.scalars(query)
+        return results.all()
+
+    async def test_add_channel_videos_with_new_videos(
+        self,
+        mock_get_channel_upload_playlist_items: AsyncMock,
+        mock_get_videos: AsyncMock,
+    ):
+        self.mock_channel_uploads(
+            mock_get_channel_upload_playlist_items,
+            mock_get_videos,
+            pages=[
+                [("1", self.current_time), ("2", self.current_time)],
+                [("3", self.current_time)],
+            ],
+        )
+
+        await asyncio.to_thread(add_channel_videos, channel_id=self.channel.id)
+
+        videos = await self.get_videos()
+        self.assertEqual([video.id for video in videos], ["1", "2", "3"])
+        for video in videos:
+            self.assertEqual(video.channel_id, "channel_id")
+        self.assertEqual(mock_get_videos.call_count, 2)
+
+    async def test_add_channel_videos_stops_at_known_video(
+        self,
+        mock_get_channel_upload_playlist_items: AsyncMock,
+        mock_get_videos: AsyncMock,
+    ):
+        await self.create_youtube_video(
+            id="1",
+            title="1",
+            thumbnail="thumbnail",
+            channel_id=self.channel.id,
+            category_id=self.category.id,
+            description="description",
+            published_at=self.current_time - timedelta(hours=2),
+        )
+        self.mock_channel_uploads(
+            mock_get_channel_upload_playlist_items,
+            mock_get_videos,
+            pages=[
+                [
+                    ("3", self.current_time),
+                    ("2", self.current_time - timedelta(hours=1)),
+                    ("1", self.current_time - timedelta(hours=2)),
+                ],
+                [("0", self.current_time - timedelta(hours=3))],
+            ],
+        )
+
+        await asyncio.to_thread(add_channel_videos, channel_id=self.channel.id)
+
+        videos = await self.get_videos()
+        self.assertEqual([video.id for video in videos], ["1", "2", "3"])
+        self.assertEqual(self.fetched_pages, 1)
+        mock_get_videos.assert_called_once()
+        self.assertEqual(mock_get_videos.call_args.kwargs["video_ids"], ["3", "2"])
+
+    async def test_add_channel_videos_without_new_videos(
+        self,
+        mock_get_channel_upload_playlist_items: AsyncMock,
+        mock_get_videos: AsyncMock,
+    ):
+        await self.create_youtube_video(
+            id="1",
+            title="1",
+            thumbnail="thumbnail",
+            channel_id=self.channel.id,
+            category_id=self.category.id,
+            description="description",
+            published_at=self.current_time,
+        )
+        self.mock_channel_uploads(
+            mock_get_channel_upload_playlist_items,
+            mock_get_videos,
+            pages=[[("1", self.current_time)], [("0", self.current_time)]],
+        )
+
+        await asyncio.to_thread(add_channel_videos, channel_id=self.channel.id)
+
+        self.assertEqual(self.fetched_pages, 1)
+        mock_get_videos.assert_not_called()
+
+    async def test_add_channel_videos_with_date_after(
+        self,
+        mock_get_channel_upload_playlist_items: AsyncMock,
+        mock_get_videos: AsyncMock,
+    ):
+        self.mock_channel_uploads(
+            mock_get_channel_upload_playlist_items,
+            mock_get_videos,
+            pages=[
+                [
+                    ("1", self.current_time),
+                    ("2", self.current_time - timedelta(days=5)),
+                ],
+                [("3", self.current_time)],
+            ],
+        )
+
+        await asyncio.to_thread(
+            add_channel_videos,
+            channel_id=self.channel.id,
+            date_after=(self.current_time - timedelta(days=1)).strftime("%Y%m%d"),
+        )
+
+        videos = await self.get_videos()
+        self.assertEqual([video.id for video in videos], ["1"])
+        self.assertEqual(self.fetched_pages, 1)
+
+    async def test_add_channel_videos_deferred_by_quota(
+        self,
+        mock_get_channel_upload_playlist_items: AsyncMock,
+        mock_get_videos: AsyncMock,
+    ):
+        last_videos_updated = self.channel.last_videos_updated
+        self.mock_channel_uploads(
+            mock_get_channel_upload_playlist_items,
+            mock_get_videos,
+            pages=[[("1", self.current_time)], [("2", self.current_time)]],
+            deferred_page=1,
+        )
+
+        await asyncio.to_thread(
+            add_channel_videos, channel_id=self.channel.id, priority=QuotaPriority.LOW
+        )
+
+        self.assertEqual(
+            mock_get_videos.call_args.kwargs["priority"], QuotaPriority.LOW
+        )
+        videos = await self.get_videos()
+        self.assertEqual([video.id for video in videos], ["1"])
+        await self.session.refresh(self.channel)
+        self.assertFalse(self.channel.updating)
+        self.assertEqual(self.channel.last_videos_updated, last_videos_updated)
+
+    async def test_add_channel_videos_backfill_refreshes_known_videos(
+        self,
+        mock_get_channel_upload_playlist_items: AsyncMock,
+        mock_get_videos: AsyncMock,
+    ):
+        await self.create_youtube_video(
+            id="2",
+            title="2",
+            thumbnail="thumbnail",
+            channel_id=self.channel.id,
+            category_id=self.category.id,
+            description="description",
+            published_at=self.current_time - timedelta(hours=1),
+        )
+        self.mock_channel_uploads(
+            mock_get_channel_upload_playlist_items,
+            mock_get_videos,
+            pages=[
+                [
+                    ("3", self.current_time),
+                    ("2", self.current_time - timedelta(hours=1)),
+                ],
+                [("1", self.current_time - timedelta(hours=2))],
+                [("0", self.current_time - timedelta(days=5))],
+            ],
+            titles={"2": "new title"},
+        )
+
+        await asyncio.to_thread(
+            add_channel_videos,
+            channel_id=self.channel.id,
+            date_after=(self.current_time - timedelta(days=1)).strftime("%Y%m%d"),
+        )
+
+        videos = await self.get_videos()
+        self.assertEqual([video.id for video in videos], ["1", "2", "3"])
+        self.assertEqual(videos[1].title, "new title")
+        self.assertEqual(self.fetched_pages, 3)
@@ -0,0 +1,375 @@
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+from sqlalchemy import select, update
+
+from dripdrop.services import google_api
+from dripdrop.services.google_quota import QuotaDeferredError, QuotaPriority
+from dripdrop.settings import settings
+from dripdrop.youtube.models import YoutubeChannel, YoutubeVideo
+from dripdrop.youtube.tasks import crawl_channel_videos
+from dripdrop.youtube.tests.test_base import YoutubeBaseTest
+
+
+@patch("dripdrop.services.google_api.get_videos")
+@patch("dripdrop.services.google_api.get_channel_upload_playlist_items")
+class TestCrawlChannelVideos(YoutubeBaseTest):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.last_videos_updated = datetime.now(tz=settings.timezone) - timedelta(
+            hours=1
+        )
+        for channel_id in ["channel_1", "channel_2", "channel_3"]:
+            await self.create_youtube_channel(
+                id=channel_id,
+                title=channel_id,
+                thumbnail="thumbnail",
+                last_videos_updated=self.last_videos_updated,
+            )
+        self.category = await self.create_youtube_video_category(id=1, name="category")
+
+    def mock_channel_uploads(
+        self,
+        mock_get_channel_upload_playlist_items: AsyncMock,
+        mock_get_videos: AsyncMock,
+        uploads: dict[str, list[str]],
+        deferred_channel_id: str | None = None,
+        failed_channel_id: str | None = None,
+        deferred_video_id: str | None = None,
+    ):
+        current_time = datetime.now(tz=settings.timezone)
+
+        async def get_channel_upload_playlist_items(
+            channel_id: str, priority: QuotaPriority
+        ):
+            if channel_id == deferred_channel_id:
+                raise QuotaDeferredError()
+            if channel_id == failed_channel_id:
+                raise Exception("Failed to list uploads")
+            yield [
+                google_api.YoutubePlaylistItemInfo(
+                    video_id=video_id, published=current_time.isoformat()
+                )
+                for video_id in uploads.get(channel_id, [])
+            ]
+
+        async def get_videos(video_ids: list[str], priority: QuotaPriority):
+            if deferred_video_id in video_ids:
+                raise QuotaDeferredError()
+            return [
+                google_api.YoutubeVideoInfo(
+                    id=video_id,
+                    title=video_id,
+                    thumbnail="thumbnail",
+                    category_id=self.category.id,
+                    description="description",
+                    published=current_time.isoformat(),
+                )
+                for video_id in video_ids
+            ]
+
+        mock_get_channel_upload_playlist_items.side_effect = (
+            get_channel_upload_playlist_items
+        )
+        mock_get_videos.side_effect = get_videos
+
+    async def get_videos(self):
+        self.session.expire_all()
+        query = select(YoutubeVideo).order_by(YoutubeVideo.id)
+        results = await self.session.scalars(query)
+        return results.all()
+
+    async def get_channels(self):
+        self.session.expire_all()
+        query = select(YoutubeChannel).order_by(YoutubeChannel.id)
+        results = await self.session.scalars(query)
+        return results.all()
+
+    async def test_crawl_channel_videos_batches_video_details(
+        self,
+        mock_get_channel_upload_playlist_items: AsyncMock,
+        mock_get_videos: AsyncMock,
+    ):
+        self.mock_channel_uploads(
+            mock_get_channel_upload_playlist_items,
+            mock_get_videos,
+            uploads={"channel_1": ["1", "2"], "channel_2": ["3"], "channel_3": []},
+        )
+
+        await asyncio.to_thread(
+            crawl_channel_videos, channel_ids=["channel_1", "channel_2", "channel_3"]
+        )
+
+        mock_get_videos.assert_called_once()
+        self.assertEqual(
+            sorted(mock_get_videos.call_args.kwargs["video_ids"]), ["1", "2", "3"]
+        )
+        videos = await self.get_videos()
+        self.assertEqual(
+            [(video.id, video.channel_id) for video in videos],
+            [("1", "channel_1"), ("2", "channel_1"), ("3", "channel_2")],
+        )
+        for channel in await self.get_channels():
+            self.assertFalse(channel.updating)
+            self.assertGreater(channel.last_videos_updated, self.last_videos_updated)
+
+    async def test_crawl_channel_videos_splits_video_batches(
+        self,
+        mock_get_channel_upload_playlist_items: AsyncMock,
+        mock_get_videos: AsyncMock,
+    ):
+        self.mock_channel_uploads(
+            mock_get_channel_upload_playlist_items,
+            mock_get_videos,
+            uploads={"channel_1": ["1", "2"], "channel_2": ["3"]},
+        )
+
+        with patch.object(google_api, "VIDEOS_BATCH_SIZE", 2):
+            await asyncio.to_thread(
+                crawl_channel_videos, channel_ids=["channel_1", "channel_2"]
+            )
+
+        self.assertEqual(mock_get_videos.call_count, 2)
+        videos = await self.get_videos()
+        self.assertEqual([video.id for video in videos], ["1", "2", "3"])
+
+    async def test_crawl_channel_videos_deferred_by_quota(
+        self,
+        mock_get_channel_upload_playlist_items: AsyncMock,
+        mock_get_videos: AsyncMock,
+    ):
+        self.mock_channel_uploads(
+            mock_get_channel_upload_playlist_items,
+            mock_get_videos,
+            uploads={"channel_1": ["1"], "channel_3": ["3"]},
+            deferred_channel_id="channel_2",
+        )
+
+        await asyncio.to_thread(
+            crawl_channel_videos, channel_ids=["channel_1", "channel_2", "channel_3"]
+        )
+
+        videos = await self.get_videos()
+        self.assertEqual([video.id for video in videos], ["1"])
+        channels = await self.get_channels()
+        self.assertGreater(channels[0].last_videos_updated, self.last_videos_updated)
+        for channel in channels[1:]:
+            self.assertFalse(channel.updating)
+            self.assertEqual(channel.last_videos_updated, self.last_videos_updated)
+            self.assertGreater(
+                channel.next_videos_update,
+                datetime.now(tz=settings.timezone)
+                + timedelta(seconds=settings.youtube_crawl_min_interval * 1.5),
+            )
+
+    async def test_crawl_channel_videos_schedules_next_update(
+        self,
+        mock_get_channel_upload_playlist_items: AsyncMock,
+        mock_get_videos: AsyncMock,
+    ):
+        current_time = datetime.now(tz=settings.timezone)
+        for days in range(3):
+            await self.create_youtube_video(
+                id=str(days),
+                title=str(days),
+                thumbnail="thumbnail",
+                channel_id="channel_1",
+                category_id=self.category.id,
+                description="description",
+                published_at=current_time - timedelta(days=days * 2),
+            )
+        self.mock_channel_uploads(
+            mock_get_channel_upload_playlist_items, mock_get_videos, uploads={}
+        )
+
+        await asyncio.to_thread(
+            crawl_channel_videos, channel_ids=["channel_1", "channel_2"]
+        )
+
+        active_channel, dormant_channel = (await self.get_channels())[:2]
+        self.assertAlmostEqual(
+            active_channel.upload_interval, timedelta(days=2).total_seconds()
+        )
+        self.assertIsNone(dormant_channel.upload_interval)
+        self.assertLess(
+            active_channel.next_videos_update, dormant_channel.next_videos_update
+        )
+        self.assertGreater(
+            active_channel.next_videos_update,
+            current_time + timedelta(seconds=settings.youtube_crawl_min_interval / 2),
+        )
+
+    async def test_crawl_channel_videos_stops_at_known_video(
+        self,
+        mock_get_channel_upload_playlist_items: AsyncMock,
+        mock_get_videos: AsyncMock,
+    ):
+        current_time = datetime.now(tz=settings.timezone)
+        await self.create_youtube_video(
+            id="1",
+            title="1",
+            thumbnail="thumbnail",
+            channel_id="channel_1",
+            category_id=self.category.id,
+            description="description",
+            published_at=current_time,
+        )
+        self.mock_channel_uploads(
+            mock_get_channel_upload_playlist_items, mock_get_videos, uploads={}
+        )
+        fetched_pages = []
+
+        async def get_channel_upload_playlist_items(
+            channel_id: str, priority: QuotaPriority
+        ):
+            for page in [["3", "2", "1"], ["0"]]:
+                fetched_pages.append(page)
+                yield [
+                    google_api.YoutubePlaylistItemInfo(
+                        video_id=video_id, published=current_time.isoformat()
+                    )
+                    for video_id in page
+                ]
+
+        mock_get_channel_upload_playlist_items.side_effect = (
+            get_channel_upload_playlist_items
+        )
+
+        await asyncio.to_thread(crawl_channel_videos, channel_ids=["channel_1"])
+
+        self.assertEqual(len(fetched_pages), 1)
+        mock_get_videos.assert_called_once()
+        self.assertEqual(mock_get_videos.call_args.kwargs["video_ids"], ["3", "2"])
+        videos = await self.get_videos()
+        self.assertEqual([video.id for video in videos], ["1", "2", "3"])
+
+    async def test_crawl_channel_videos_backfill_ignores_known_videos(
+        self,
+        mock_get_channel_upload_playlist_items: AsyncMock,
+        mock_get_videos: AsyncMock,
+    ):
+        current_time = datetime.now(tz=settings.timezone)
+        await self.create_youtube_video(
+            id="1",
+            title="1",
+            thumbnail="thumbnail",
+            channel_id="channel_1",
+            category_id=self.category.id,
+            description="description",
+            published_at=current_time,
+        )
+        self.mock_channel_uploads(
+            mock_get_channel_upload_playlist_items,
+            mock_get_videos,
+            uploads={"channel_1": ["3", "1", "0"]},
+        )
+
+        await asyncio.to_thread(
+            crawl_channel_videos,
+            channel_ids=["channel_1"],
+            date_after=(current_time - timedelta(days=1)).strftime("%Y%m%d"),
+        )
+
+        mock_get_videos.assert_called_once()
+        self.assertEqual(mock_get_videos.call_args.kwargs["video_ids"], ["3", "1", "0"])
+        videos = await self.get_videos()
+        self.assertEqual([video.id for video in videos], ["0", "1", "3"])
+
+    async def test_crawl_channel_videos_deferred_video_details(
+        self,
+        mock_get_channel_upload_playlist_items: AsyncMock,
+        mock_get_videos: AsyncMock,
+    ):
+        self.mock_channel_uploads(
+            mock_get_channel_upload_playlist_items,
+            mock_get_videos,
+            uploads={"channel_1": ["1"], "channel_2": ["2", "3"]},
+            deferred_video_id="3",
+        )
+
+        with patch.object(google_api, "VIDEOS_BATCH_SIZE", 2):
+            await asyncio.to_thread(
+                crawl_channel_videos, channel_ids=["channel_1", "channel_2"]
+            )
+
+        videos = await self.get_videos()
+        self.assertEqual([video.id for video in videos], ["1"])
+        channel_1, channel_2 = (await self.get_channels())[:2]
+        self.assertGreater(channel_1.last_videos_updated, self.last_videos_updated)
+        self.assertEqual(channel_2.last_videos_updated, self.last_videos_updated)
+        self.assertFalse(channel_2.updating)
+
+    async def test_crawl_channel_videos_with_failed_channel(
+        self,
+        mock_get_channel_upload_playlist_items: AsyncMock,
+        mock_get_videos: AsyncMock,
+    ):
+        self.mock_channel_uploads(
+            mock_get_channel_upload_playlist_items,
+            mock_get_videos,
+            uploads={"channel_1": ["1"], "channel_2": ["2"], "channel_3": ["3"]},
+            failed_channel_id="channel_2",
+        )
+
+        await asyncio.to_thread(
+            crawl_channel_videos, channel_ids=["channel_1", "channel_2", "channel_3"]
+        )
+
+        videos = await self.get_videos()
+        self.assertEqual([video.id for video in videos], ["1", "3"])
+        channel_1, channel_2, channel_3 = await self.get_channels()
+        self.assertGreater(channel_1.last_videos_updated, self.last_videos_updated)
+        self.assertEqual(channel_2.last_videos_updated, self.last_videos_updated)
+        self.assertGreater(channel_3.last_videos_updated, self.last_videos_updated)
+        for channel in [channel_1, channel_2, channel_3]:
+            self.assertFalse(channel.updating)
+
+    async def test_crawl_channel_videos_backs_off_failed_channel(
+        self,
+        mock_get_channel_upload_playlist_items: AsyncMock,
+        mock_get_videos: AsyncMock,
+    ):
+        current_time = datetime.now(tz=settings.timezone)
+        query = (
+            update(YoutubeChannel)
+            .where(YoutubeChannel.id == "channel_1")
+            .values(last_videos_updated=current_time - timedelta(hours=8))
+        )
+        await self.session.execute(query)
+        await self.session.commit()
+        self.mock_channel_uploads(
+            mock_get_channel_upload_playlist_items,
+            mock_get_videos,
+            uploads={},
+            failed_channel_id="channel_1",
+        )
+
+        await asyncio.to_thread(crawl_channel_videos, channel_ids=["channel_1"])
+
+        channel = (await self.get_channels())[0]
+        self.assertGreater(
+            channel.next_videos_update, current_time + timedelta(hours=7)
+        )
+        self.assertLess(channel.next_videos_update, current_time + timedelta(hours=9))
+
+    @patch("dripdrop.youtube.utils.get_upload_cadence")
+    async def test_crawl_channel_videos_resets_updating_on_error(
+        self,
+        mock_get_upload_cadence: AsyncMock,
+        mock_get_channel_upload_playlist_items: AsyncMock,
+        mock_get_videos: AsyncMock,
+    ):
+        mock_get_upload_cadence.side_effect = Exception("Failed to schedule")
+        self.mock_channel_uploads(
+            mock_get_channel_upload_playlist_items, mock_get_videos, uploads={}
+        )
+
+        with self.assertRaises(Exception):
+            await asyncio.to_thread(
+                crawl_channel_videos, channel_ids=["channel_1", "channel_2"]
+            )
+
+        for channel in (await self.get_channels())[:2]:
+            self.assertFalse(channel.updating)
+            self.assertEqual(channel.last_videos_updated, self.last_videos_updated)
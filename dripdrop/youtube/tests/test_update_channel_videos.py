@@ -0,0 +1,87 @@
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy import select
+
+from dripdrop.settings import settings
+from dripdrop.youtube.models import YoutubeChannel
+from dripdrop.youtube.tasks import update_channel_videos
+from dripdrop.youtube.tests.test_base import YoutubeBaseTest
+
+
+@patch("dripdrop.services.rq_client.default.enqueue")
+class TestUpdateChannelVideos(YoutubeBaseTest):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.user = await self.create_user(email="user@gmail.com", password="password")
+
+    async def create_subscribed_channel(
+        self, id: str, next_videos_update: datetime | None = None
+    ):
+        channel = await self.create_youtube_channel(
+            id=id, title=id, thumbnail="thumbnail"
+        )
+        channel.next_videos_update = next_videos_update
+        await self.session.commit()
+        await self.create_youtube_subscription(channel_id=id, email=self.user.email)
+        return channel
+
+    def get_enqueued_channel_ids(self, mock_enqueue: MagicMock):
+        return [
+            channel_id
+            for call in mock_enqueue.call_args_list
+            for channel_id in call.kwargs["channel_ids"]
+        ]
+
+    async def test_update_channel_videos_enqueues_due_channels(
+        self, mock_enqueue: MagicMock
+    ):
+        current_time = datetime.now(tz=settings.timezone)
+        await self.create_subscribed_channel(id="new")
+        await self.create_subscribed_channel(
+            id="due", next_videos_update=current_time - timedelta(hours=1)
+        )
+        await self.create_subscribed_channel(
+            id="not_due", next_videos_update=current_time + timedelta(hours=1)
+        )
+        await self.create_youtube_channel(
+            id="unsubscribed", title="unsubscribed", thumbnail="thumbnail"
+        )
+
+        await asyncio.to_thread(update_channel_videos)
+
+        self.assertEqual(self.get_enqueued_channel_ids(mock_enqueue), ["new", "due"])
+        self.session.expire_all()
+        query = select(YoutubeChannel).where(YoutubeChannel.id.in_(["new", "due"]))
+        for channel in await self.session.scalars(query):
+            self.assertGreater(channel.next_videos_update, current_time)
+
+    async def test_update_channel_videos_with_channel_budget(
+        self, mock_enqueue: MagicMock
+    ):
+        current_time = datetime.now(tz=settings.timezone)
+        for hours in range(1, 4):
+            await self.create_subscribed_channel(
+                id=str(hours), next_videos_update=current_time - timedelta(hours=hours)
+            )
+
+        with (
+            patch.object(settings, "youtube_crawl_max_channels", 2),
+            patch.object(settings, "youtube_crawl_batch_size", 1),
+        ):
+            await asyncio.to_thread(update_channel_videos)
+
+        self.assertEqual(mock_enqueue.call_count, 2)
+        self.assertEqual(self.get_enqueued_channel_ids(mock_enqueue), ["3", "2"])
+
+    async def test_update_channel_videos_with_date_after(self, mock_enqueue: MagicMock):
+        current_time = datetime.now(tz=settings.timezone)
+        await self.create_subscribed_channel(
+            id="not_due", next_videos_update=current_time + timedelta(hours=1)
+        )
+
+        await asyncio.to_thread(update_channel_videos, date_after="20240101")
+
+        self.assertEqual(self.get_enqueued_channel_ids(mock_enqueue), ["not_due"])
+        self.assertEqual(mock_enqueue.call_args.kwargs["date_after"], "20240101")
@@ -4,6 +4,7 @@ from unittest.mock import AsyncMock, patch
 from sqlalchemy import select
 
 from dripdrop.services import google_api
+from dripdrop.utils import get_current_time
 from dripdrop.youtube.models import YoutubeChannel, YoutubeSubscription
 from dripdrop.youtube.tasks import update_user_subscriptions
 from dripdrop.youtube.tests.test_base import YoutubeBaseTest
@@ -135,3 +136,49 @@ class TestUpdateUserSubscriptions(YoutubeBaseTest):
         self.assertEqual(len(youtube_channels), 2)
         youtube_channel = youtube_channels[0]
         self.assertEqual(youtube_channel.title, test_channel.title)
+
+    async def test_update_user_subscriptions_with_deleted_and_user_submitted_subscriptions(
+        self, mock_get_channel_subscriptions: AsyncMock
+    ):
+        user = await self.create_user(email="test@mail.com", password="password")
+        test_channel = google_api.YoutubeChannelInfo(
+            id="123456", title="title", thumbnail="thumbnail"
+        )
+        mock_get_channel_subscriptions.return_value = self.create_mock_async_generator(
+            [[test_channel]]
+        )
+        await self.create_user_youtube_channel(email=user.email, channel_id="user_1234")
+        deleted_channel = await self.create_youtube_channel(
+            id=test_channel.id, title=test_channel.title, thumbnail="thumbnail"
+        )
+        deleted_subscription = await self.create_youtube_subscription(
+            channel_id=deleted_channel.id,
+            email=user.email,
+            deleted_at=get_current_time(),
+        )
+        user_submitted_channel = await self.create_youtube_channel(
+            id="234567", title="title", thumbnail="thumbnail"
+        )
+        await self.create_youtube_subscription(
+            channel_id=user_submitted_channel.id,
+            email=user.email,
+            user_submitted=True,
+        )
+        self.session.expunge(deleted_subscription)
+
+        await asyncio.to_thread(update_user_subscriptions, email=user.email)
+
+        query = (
+            select(YoutubeSubscription)
+            .where(
+                YoutubeSubscription.email == user.email,
+                YoutubeSubscription.deleted_at.is_(None),
+            )
+            .order_by(YoutubeSubscription.channel_id)
+        )
+        results = await self.session.scalars(query)
+        youtube_subscriptions = results.all()
+        self.assertEqual(
+            [subscription.channel_id for subscription in youtube_subscriptions],
+            [deleted_channel.id, user_submitted_channel.id],
+        )
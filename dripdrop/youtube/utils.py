@@ -0,0 +1,336 @@
+import math
+import random
+from datetime import datetime, timedelta
+
+import dateutil.parser
+from pydantic import BaseModel
+from sqlalchemy import func, insert, literal_column, or_, select, update
+from sqlalchemy.dialects import postgresql
+
+from dripdrop.services.database import AsyncSession
+from dripdrop.services.google_api import YoutubeChannelInfo, YoutubeVideoInfo
+from dripdrop.settings import settings
+from dripdrop.utils import get_current_time
+from dripdrop.youtube.models import YoutubeChannel, YoutubeSubscription, YoutubeVideo
+
+
+class VideoUpsertResult(BaseModel):
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+    def add(self, result: "VideoUpsertResult"):
+        self.inserted += result.inserted
+        self.updated += result.updated
+        self.unchanged += result.unchanged
+
+
+class UploadCadence(BaseModel):
+    interval: float | None = None
+    last_upload: datetime | None = None
+
+
+UPLOAD_CADENCE_SAMPLE_SIZE = 10
+CHECKS_PER_UPLOAD = 4
+
+
+class SubscriptionReconcileResult(BaseModel):
+    new_channel_ids: list[str] = []
+    inserted: int = 0
+    revived: int = 0
+    deleted: int = 0
+
+
+def _get_video_rows(channel_id: str, videos: list[YoutubeVideoInfo]):
+    current_time = get_current_time()
+    rows = {}
+    for video in videos:
+        rows[video.id] = {
+            "id": video.id,
+            "title": video.title,
+            "thumbnail": video.thumbnail,
+            "channel_id": channel_id,
+            "category_id": video.category_id,
+            "description": video.description,
+            "published_at": dateutil.parser.parse(video.published),
+            "created_at": current_time,
+            "modified_at": current_time,
+        }
+    return list(rows.values())
+
+
+async def _upsert_videos_postgresql(session: AsyncSession, rows: list[dict]):
+    query = postgresql.insert(YoutubeVideo).values(rows)
+    excluded = query.excluded
+    query = query.on_conflict_do_update(
+        index_elements=[YoutubeVideo.id],
+        set_={
+            "title": excluded.title,
+            "thumbnail": excluded.thumbnail,
+            "description": excluded.description,
+            "modified_at": excluded.modified_at,
+        },
+        where=or_(
+            YoutubeVideo.title.is_distinct_from(excluded.title),
+            YoutubeVideo.thumbnail.is_distinct_from(excluded.thumbnail),
+            YoutubeVideo.description.is_distinct_from(excluded.description),
+        ),
+    ).returning(YoutubeVideo.id, literal_column("xmax = 0").label("inserted"))
+    results = await session.execute(query)
+    changed_rows = results.all()
+    inserted = len([row for row in changed_rows if row.inserted])
+    updated = len(changed_rows) - inserted
+    return VideoUpsertResult(
+        inserted=inserted,
+        updated=updated,
+        unchanged=len(rows) - inserted - updated,
+    )
+
+
+async def _upsert_videos(session: AsyncSession, rows: list[dict]):
+    query = select(
+        YoutubeVideo.id,
+        YoutubeVideo.title,
+        YoutubeVideo.thumbnail,
+        YoutubeVideo.description,
+    ).where(YoutubeVideo.id.in_([row["id"] for row in rows]))
+    results = await session.execute(query)
+    existing_videos = {video.id: video for video in results.all()}
+    new_rows = []
+    updated_rows = []
+    for row in rows:
+        existing_video = existing_videos.get(row["id"])
+        if not existing_video:
+            new_rows.append(row)
+        elif (
+            existing_video.title != row["title"]
+            or existing_video.thumbnail != row["thumbnail"]
+            or existing_video.description != row["description"]
+        ):
+            updated_rows.append(
+                {
+                    "id": row["id"],
+                    "title": row["title"],
+                    "thumbnail": row["thumbnail"],
+                    "description": row["description"],
+                    "modified_at": row["modified_at"],
+                }
+            )
+    if new_rows:
+        await session.execute(insert(YoutubeVideo), new_rows)
+    if updated_rows:
+        await session.execute(update(YoutubeVideo), updated_rows)
+    return VideoUpsertResult(
+        inserted=len(new_rows),
+        updated=len(updated_rows),
+        unchanged=len(rows) - len(new_rows) - len(updated_rows),
+    )
+
+
+async def upsert_videos(
+    session: AsyncSession, channel_id: str, videos: list[YoutubeVideoInfo]
+):
+    rows = _get_video_rows(channel_id=channel_id, videos=videos)
+    if not rows:
+        return VideoUpsertResult()
+    if session.bind.dialect.name == "postgresql":
+        return await _upsert_videos_postgresql(session=session, rows=rows)
+    return await _upsert_videos(session=session, rows=rows)
+
+
+async def get_known_video_ids(
+    session: AsyncSession, channel_id: str, video_ids: list[str]
+):
+    if not video_ids:
+        return set()
+    query = select(YoutubeVideo.id).where(
+        YoutubeVideo.channel_id == channel_id, YoutubeVideo.id.in_(video_ids)
+    )
+    return set(await session.scalars(query))
+
+
+async def get_upload_cadence(session: AsyncSession, channel_id: str):
+    query = (
+        select(YoutubeVideo.published_at)
+        .where(YoutubeVideo.channel_id == channel_id)
+        .order_by(YoutubeVideo.published_at.desc())
+        .limit(UPLOAD_CADENCE_SAMPLE_SIZE)
+    )
+    published = (await session.scalars(query)).all()
+    if not published:
+        return UploadCadence()
+    if len(published) == 1:
+        return UploadCadence(last_upload=published[0])
+    return UploadCadence(
+        interval=(published[0] - published[-1]).total_seconds() / (len(published) - 1),
+        last_upload=published[0],
+    )
+
+
+async def get_subscriber_counts(session: AsyncSession, channel_ids: list[str]):
+    query = (
+        select(YoutubeSubscription.channel_id, func.count())
+        .where(
+            YoutubeSubscription.channel_id.in_(channel_ids),
+            YoutubeSubscription.deleted_at.is_(None),
+        )
+        .group_by(YoutubeSubscription.channel_id)
+    )
+    results = await session.execute(query)
+    return {channel_id: count for channel_id, count in results.all()}
+
+
+def get_next_videos_update(cadence: UploadCadence, subscriber_count: int):
+    # Channels are checked a few times per expected upload. A silence longer
+    # than the usual cadence stretches the interval so dormant channels back
+    # off, and channels with more subscribers are checked more often.
+    current_time = get_current_time()
+    if cadence.last_upload is None:
+        interval = settings.youtube_crawl_max_interval
+    else:
+        since_last_upload = (current_time - cadence.last_upload).total_seconds()
+        interval = max(cadence.interval or 0, since_last_upload) / CHECKS_PER_UPLOAD
+    interval /= 1 + math.log2(max(subscriber_count, 1))
+    interval = min(
+        max(interval, settings.youtube_crawl_min_interval),
+        settings.youtube_crawl_max_interval,
+    )
+    jitter = settings.youtube_crawl_jitter
+    interval *= random.uniform(1 - jitter, 1 + jitter)
+    return current_time + timedelta(seconds=interval)
+
+
+def get_retry_videos_update(last_videos_updated: datetime):
+    # Deferred and failed channels wait as long as it has been since their last
+    # successful crawl, so the wait doubles with every consecutive retry
+    current_time = get_current_time()
+    interval = (current_time - last_videos_updated).total_seconds()
+    interval = min(
+        max(interval, 2 * settings.youtube_crawl_min_interval),
+        settings.youtube_crawl_max_interval,
+    )
+    jitter = settings.youtube_crawl_jitter
+    interval *= random.uniform(1 - jitter, 1 + jitter)
+    return current_time + timedelta(seconds=interval)
+
+
+async def _reconcile_channels(
+    session: AsyncSession, channels: dict[str, YoutubeChannelInfo]
+):
+    current_time = get_current_time()
+    query = select(
+        YoutubeChannel.id, YoutubeChannel.title, YoutubeChannel.thumbnail
+    ).where(YoutubeChannel.id.in_(list(channels.keys())))
+    results = await session.execute(query)
+    existing_channels = {channel.id: channel for channel in results.all()}
+    new_rows = []
+    updated_rows = []
+    for channel in channels.values():
+        existing_channel = existing_channels.get(channel.id)
+        if not existing_channel:
+            new_rows.append(
+                {
+                    "id": channel.id,
+                    "title": channel.title,
+                    "thumbnail": channel.thumbnail,
+                    "last_videos_updated": current_time - timedelta(days=365),
+                    "updating": False,
+                    "created_at": current_time,
+                    "modified_at": current_time,
+                }
+            )
+        elif (
+            existing_channel.title != channel.title
+            or existing_channel.thumbnail != channel.thumbnail
+        ):
+            updated_rows.append(
+                {
+                    "id": channel.id,
+                    "title": channel.title,
+                    "thumbnail": channel.thumbnail,
+                    "modified_at": current_time,
+                }
+            )
+    if new_rows:
+        await session.execute(insert(YoutubeChannel), new_rows)
+    if updated_rows:
+        await session.execute(update(YoutubeChannel), updated_rows)
+    return [row["id"] for row in new_rows]
+
+
+async def reconcile_user_subscriptions(
+    session: AsyncSession, email: str, channels: list[YoutubeChannelInfo]
+):
+    current_time = get_current_time()
+    subscribed_channels = {channel.id: channel for channel in channels}
+    result = SubscriptionReconcileResult()
+    if subscribed_channels:
+        result.new_channel_ids = await _reconcile_channels(
+            session=session, channels=subscribed_channels
+        )
+
+    query = select(
+        YoutubeSubscription.channel_id,
+        YoutubeSubscription.user_submitted,
+        YoutubeSubscription.deleted_at,
+    ).where(YoutubeSubscription.email == email)
+    results = await session.execute(query)
+    existing_subscriptions = {
+        subscription.channel_id: subscription for subscription in results.all()
+    }
+
+    new_rows = []
+    revived_channel_ids = []
+    for channel_id in subscribed_channels:
+        existing_subscription = existing_subscriptions.get(channel_id)
+        if not existing_subscription:
+            new_rows.append(
+                {
+                    "channel_id": channel_id,
+                    "email": email,
+                    "user_submitted": False,
+                    "deleted_at": None,
+                    "created_at": current_time,
+                    "modified_at": current_time,
+                }
+            )
+        elif (
+            not existing_subscription.user_submitted
+            and existing_subscription.deleted_at is not None
+        ):
+            revived_channel_ids.append(channel_id)
+    deleted_channel_ids = [
+        channel_id
+        for channel_id, subscription in existing_subscriptions.items()
+        if channel_id not in subscribed_channels
+        and not subscription.user_submitted
+        and subscription.deleted_at is None
+    ]
+
+    if new_rows:
+        await session.execute(insert(YoutubeSubscription), new_rows)
+    if revived_channel_ids:
+        query = (
+            update(YoutubeSubscription)
+            .where(
+                YoutubeSubscription.email == email,
+                YoutubeSubscription.channel_id.in_(revived_channel_ids),
+            )
+            .values(deleted_at=None, modified_at=current_time)
+        )
+        await session.execute(query)
+    if deleted_channel_ids:
+        query = (
+            update(YoutubeSubscription)
+            .where(
+                YoutubeSubscription.email == email,
+                YoutubeSubscription.channel_id.in_(deleted_channel_ids),
+            )
+            .values(deleted_at=current_time, modified_at=current_time)
+        )
+        await session.execute(query)
+
+    result.inserted = len(new_rows)
+    result.revived = len(revived_channel_ids)
+    result.deleted = len(deleted_channel_ids)
+    return result
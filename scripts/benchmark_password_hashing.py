@@ -0,0 +1,90 @@
+"""
+Measures latency of an unrelated endpoint while a burst of logins is verifying
+passwords, once with bcrypt on the event loop and once through the executor.
+
+    uv run python scripts/benchmark_password_hashing.py --logins 50 --interval 0.01
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from fastapi import FastAPI, Response
+from httpx import ASGITransport, AsyncClient
+
+from dripdrop.authentication import passwords
+
+
+def create_app(hashed_password: str):
+    app = FastAPI()
+
+    @app.post("/login/inline")
+    async def login_inline():
+        passwords.password_context.verify_and_update("password", hashed_password)
+        return Response(None)
+
+    @app.post("/login/executor")
+    async def login_executor():
+        await passwords.verify_and_update_password(
+            password="password", hashed_password=hashed_password
+        )
+        return Response(None)
+
+    @app.get("/ping")
+    async def ping():
+        return Response(None)
+
+    return app
+
+
+async def run_storm(client: AsyncClient, mode: str, logins: int, interval: float):
+    latencies = []
+    done = asyncio.Event()
+
+    async def ping():
+        # Latency is measured from when the request was due, so time spent
+        # waiting for a blocked event loop is counted
+        scheduled = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(max(scheduled - time.perf_counter(), 0))
+            await client.get("/ping")
+            latencies.append(time.perf_counter() - scheduled)
+            scheduled = max(scheduled + interval, time.perf_counter())
+
+    async def storm():
+        await asyncio.gather(*[client.post(f"/login/{mode}") for _ in range(logins)])
+        done.set()
+
+    start = time.perf_counter()
+    await asyncio.gather(ping(), storm())
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(
+        f"{mode:>8}: {logins} logins in {elapsed:.2f}s, "
+        f"/ping p50={p50:.2f}ms p99={p99:.2f}ms max={latencies[-1] * 1000:.2f}ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--interval", type=float, default=0.01)
+    args = parser.parse_args()
+
+    hashed_password = await passwords.hash_password("password")
+    app = create_app(hashed_password=hashed_password)
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://benchmark"
+    ) as client:
+        for mode in ("inline", "executor"):
+            await run_storm(
+                client=client, mode=mode, logins=args.logins, interval=args.interval
+            )
+    print(passwords.get_hasher_status().model_dump_json(indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())